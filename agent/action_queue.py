@@ -0,0 +1,247 @@
+"""
+Action Queue Module
+
+Prioritised queue behind AutonomousAgent.action_loop. Commands, autonomous
+(boredom) actions, batch learning and activity research are submitted here
+instead of running inline or as fire-and-forget tasks.
+
+- priority: lower number starts first (commands before background work)
+- key: identical pending/running actions are deduplicated (the caller gets
+  the existing future)
+- per-kind concurrency limits (ACTION_QUEUE_LIMITS)
+- deadline: an action that has not started `deadline` seconds after
+  submission is dropped; once started it runs to completion (cancelling a
+  half-executed tool call would leave its memory unwritten)
+- cancel(key=..., kind=...) cancels queued and running actions
+
+Depth, throughput and wait time are shown in !debug actions and on the dashboard.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import config_settings
+from .telemetry import RollingStats
+
+logger = logging.getLogger(__name__)
+
+# Default priority and start deadline (max queue wait in seconds, None = no deadline) per kind
+KIND_DEFAULTS = {
+    'command': (0, None),
+    'learning': (1, None),
+    'autonomous': (2, 600),
+    'activity': (3, 900),
+}
+
+
+class Action:
+    """One queued unit of work."""
+
+    def __init__(self, seq: int, kind: str, factory: Callable[[], Awaitable], key: Optional[str],
+                 priority: int, deadline: Optional[float], label: str):
+        self.seq = seq
+        self.kind = kind
+        self.factory = factory
+        self.key = key
+        self.priority = priority
+        self.submitted_at = time.time()
+        self.deadline = self.submitted_at + deadline if deadline else None
+        self.label = label or kind
+        self.started_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.cancelled = False
+
+    def __lt__(self, other: 'Action') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ActionQueue:
+    """Priority queue with dedup, per-kind limits, deadlines and cancellation."""
+
+    def __init__(self, limits: Dict[str, int] = None, gate: Callable[[Action], bool] = None):
+        """
+        Args:
+            limits: Max concurrently running actions per kind (missing kind -> 1)
+            gate: Optional check run before starting an action; False keeps it queued
+        """
+        self.limits = limits or getattr(config_settings, 'ACTION_QUEUE_LIMITS',
+                                        {'command': 4, 'learning': 1, 'autonomous': 1, 'activity': 1})
+        self.gate = gate
+        self._heap: List[Action] = []
+        self._by_key: Dict[str, Action] = {}
+        self._running: Dict[str, List[Action]] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+        self.wait_ms = RollingStats()
+        self.run_ms = RollingStats()
+        self._completions = deque(maxlen=1000)  # Completion timestamps (throughput)
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'deduplicated': 0,
+                         'expired': 0, 'cancelled': 0}
+
+    # --- Submission / cancellation ---
+
+    def submit(self, kind: str, factory: Callable[[], Awaitable], key: str = None,
+               priority: int = None, deadline: float = None, label: str = "") -> asyncio.Future:
+        """Queues `factory()` (a coroutine function) and returns a future with its result.
+
+        If an action with the same key is already queued or running, its future is returned.
+        """
+        if key is not None and key in self._by_key:
+            self.counters['deduplicated'] += 1
+            return self._by_key[key].future
+
+        default_priority, default_deadline = KIND_DEFAULTS.get(kind, (5, None))
+        action = Action(
+            next(self._seq), kind, factory, key,
+            default_priority if priority is None else priority,
+            default_deadline if deadline is None else deadline,
+            label
+        )
+        heapq.heappush(self._heap, action)
+        if key is not None:
+            self._by_key[key] = action
+        self.counters['submitted'] += 1
+        self._wakeup.set()
+        return action.future
+
+    def cancel(self, key: str = None, kind: str = None, running: bool = True) -> int:
+        """Cancels queued (and optionally running) actions matching key and/or kind."""
+        def matches(action: Action) -> bool:
+            return (key is None or action.key == key) and (kind is None or action.kind == kind)
+
+        count = 0
+        for action in list(self._heap):
+            if matches(action) and not action.cancelled:
+                self._drop(action, 'cancelled')
+                count += 1
+        if running:
+            for actions in self._running.values():
+                for action in actions:
+                    if matches(action) and action.task and not action.task.done():
+                        action.task.cancel()
+                        count += 1
+        if count:
+            logger.info(f"Cancelled {count} action(s) (key={key}, kind={kind})")
+        return count
+
+    def _drop(self, action: Action, reason: str):
+        """Removes a queued action without running it (lazily deleted from the heap)."""
+        action.cancelled = True
+        self.counters[reason] += 1
+        self._release_key(action)
+        if not action.future.done():
+            action.future.cancel()
+
+    def _release_key(self, action: Action):
+        if action.key is not None and self._by_key.get(action.key) is action:
+            del self._by_key[action.key]
+
+    # --- Dispatch ---
+
+    async def run(self, is_running: Callable[[], bool]):
+        """Dispatcher loop (runs inside action_loop)."""
+        while is_running():
+            self._dispatch()
+            self._wakeup.clear()
+            try:
+                # Re-check at least every second (deadlines, gate changes)
+                await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self):
+        now = time.time()
+        deferred = []
+        while self._heap:
+            action = heapq.heappop(self._heap)
+            if action.cancelled:
+                continue
+            if action.deadline is not None and now >= action.deadline:
+                logger.warning(f"Action '{action.label}' expired after {now - action.submitted_at:.0f}s in queue")
+                self._drop(action, 'expired')
+                continue
+            running = self._running.setdefault(action.kind, [])
+            if len(running) >= self.limits.get(action.kind, 1) or (self.gate and not self.gate(action)):
+                deferred.append(action)
+                continue
+            self._start(action, now)
+        for action in deferred:
+            heapq.heappush(self._heap, action)
+
+    def _start(self, action: Action, now: float):
+        action.started_at = now
+        self.wait_ms.add((now - action.submitted_at) * 1000)
+        self._running[action.kind].append(action)
+        action.task = asyncio.create_task(self._execute(action), name=f"action:{action.label}")
+
+    async def _execute(self, action: Action):
+        result = None
+        error = None
+        finished = False
+        try:
+            result = await action.factory()
+            self.counters['completed'] += 1
+            finished = True
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+        except Exception as e:
+            self.counters['failed'] += 1
+            error = e
+            logger.error(f"Action '{action.label}' failed: {e}")
+        finally:
+            self._running[action.kind].remove(action)
+            self._release_key(action)
+            self.run_ms.add((time.time() - action.started_at) * 1000)
+            self._completions.append(time.time())
+            self._wakeup.set()
+
+        if action.future.done():
+            return
+        if error is not None:
+            action.future.set_exception(error)
+            action.future.exception()  # Mark retrieved - failure is already logged
+        elif finished:
+            action.future.set_result(result)
+        else:
+            action.future.cancel()  # Cancelled
+
+    def clear_pending(self) -> int:
+        """Drops all queued (not running) actions, e.g. on shutdown."""
+        return self.cancel(running=False)
+
+    # --- Introspection ---
+
+    def pending(self) -> List[Action]:
+        return sorted(a for a in self._heap if not a.cancelled)
+
+    def is_active(self, key: str) -> bool:
+        """True if an action with this key is queued or running."""
+        return key in self._by_key
+
+    def running_count(self, kind: str) -> int:
+        return len(self._running.get(kind, ()))
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        pending = self.pending()
+        depth = {}
+        for action in pending:
+            depth[action.kind] = depth.get(action.kind, 0) + 1
+        running = {kind: len(actions) for kind, actions in self._running.items() if actions}
+        return {
+            'depth': len(pending),
+            'depth_by_kind': ", ".join(f"{k}={v}" for k, v in sorted(depth.items())) or "-",
+            'running': ", ".join(f"{k}={v}/{self.limits.get(k, 1)}" for k, v in sorted(running.items())) or "-",
+            'throughput_per_min': sum(1 for t in self._completions if now - t <= 60),
+            'wait_p50_ms': round(self.wait_ms.percentile(50)) if self.wait_ms.samples else None,
+            'wait_p95_ms': round(self.wait_ms.percentile(95)) if self.wait_ms.samples else None,
+            'oldest_wait_s': round(now - min(a.submitted_at for a in pending)) if pending else 0,
+            **self.counters
+        }
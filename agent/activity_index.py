@@ -0,0 +1,163 @@
+"""
+Activity Index Module
+
+Remembers which Discord activities (games, apps) the agent has already
+researched, so "what are my friends doing" boredom cycles and
+DiscordActivityTool calls do not run a web search, an LLM summary and a
+memory insert for the same game again and again.
+
+Each activity (keyed by its normalised name) stores the memory id of its
+activity_knowledge memory, when it was last researched and which users were
+seen doing it. An activity is researched again only once the entry is older
+than ACTIVITY_REFRESH_TTL; after a failed search it is retried after
+ACTIVITY_RETRY_AFTER. An activity that is being researched right now is never
+queued a second time.
+
+The entries are persisted in the agent state file (StateStore section
+"activity_index"); existing activity_knowledge memories are imported once
+the memory database is open.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+def normalize_activity(name: str) -> str:
+    """Index key: case- and whitespace-insensitive activity name."""
+    return " ".join(name.split()).casefold()
+
+
+class ActivityIndex:
+    """Activity name -> memory id, last research time and users seen (with refresh TTL)."""
+
+    def __init__(self, entries: dict = None, ttl: float = None, retry_after: float = None):
+        self.ttl = ttl or getattr(config_settings, 'ACTIVITY_REFRESH_TTL', 30 * DAY)
+        self.retry_after = retry_after or getattr(config_settings, 'ACTIVITY_RETRY_AFTER', 3600)
+        self.max_users = getattr(config_settings, 'ACTIVITY_MAX_USERS', 20)
+        self.entries: Dict[str, dict] = dict(entries or {})
+        self._in_flight = set()
+        self.on_change = None  # Called after every change (marks the state store dirty)
+
+        self.skipped = 0  # Sightings that did not need research
+        self.researched = 0
+        self.failed = 0
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def _entry(self, name: str) -> dict:
+        key = normalize_activity(name)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {
+                'name': name,
+                'memory_id': None,
+                'researched_at': None,
+                'failed_at': None,
+                'users': {},  # user_id -> user name
+                'last_seen': None,
+                'sightings': 0
+            }
+        return entry
+
+    # --- Sightings / research decisions ---
+
+    def observe(self, name: str, user_id=None, user_name: str = None) -> bool:
+        """Records that a user was seen doing the activity. Returns True if it should be researched."""
+        entry = self._entry(name)
+        entry['last_seen'] = time.time()
+        entry['sightings'] += 1
+        if user_id is not None:
+            users = entry['users']
+            users.pop(str(user_id), None)  # Re-insert so the most recent users are kept
+            users[str(user_id)] = user_name
+            while len(users) > self.max_users:
+                users.pop(next(iter(users)))
+        self._changed()
+        if self.needs_research(name):
+            return True
+        self.skipped += 1
+        return False
+
+    def needs_research(self, name: str) -> bool:
+        """True if the activity is unknown, its knowledge is older than the TTL, or a failed try may be retried."""
+        key = normalize_activity(name)
+        if key in self._in_flight:
+            return False
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        now = time.time()
+        if entry.get('failed_at') and now - entry['failed_at'] < self.retry_after:
+            return False
+        return not entry.get('researched_at') or now - entry['researched_at'] >= self.ttl
+
+    def claim(self, name: str) -> bool:
+        """Marks the activity as being researched. False if it does not need research (or already is)."""
+        if not self.needs_research(name):
+            return False
+        self._in_flight.add(normalize_activity(name))
+        return True
+
+    def complete(self, name: str, memory_id: Optional[int]):
+        """Research finished (memory_id is None if the memory filter rejected the summary)."""
+        entry = self._entry(name)
+        entry['memory_id'] = memory_id if memory_id is not None else entry.get('memory_id')
+        entry['researched_at'] = time.time()
+        entry['failed_at'] = None
+        self._in_flight.discard(normalize_activity(name))
+        self.researched += 1
+        self._changed()
+
+    def fail(self, name: str):
+        """Research failed (search error) - retried after ACTIVITY_RETRY_AFTER."""
+        self._entry(name)['failed_at'] = time.time()
+        self._in_flight.discard(normalize_activity(name))
+        self.failed += 1
+        self._changed()
+
+    def release(self, name: str):
+        """Drops the claim without a result (research cancelled) - the next sighting may research it again."""
+        self._in_flight.discard(normalize_activity(name))
+
+    # --- Import / introspection ---
+
+    def import_memories(self, memories: List[dict]) -> int:
+        """Adds activity_knowledge memories that are not indexed yet (first start after upgrade)."""
+        added = 0
+        for memory in memories:
+            name = (memory.get('metadata') or {}).get('activity')
+            known = self.entries.get(normalize_activity(name)) if name else None
+            if not name or (known and known.get('researched_at')):
+                continue
+            entry = self._entry(name)
+            entry['memory_id'] = memory.get('id')
+            entry['researched_at'] = time.time()
+            added += 1
+        if added:
+            logger.info(f"Imported {added} known activities from memory")
+            self._changed()
+        return added
+
+    def to_dict(self) -> dict:
+        return self.entries
+
+    def get_stats(self) -> dict:
+        return {
+            'activities': len(self.entries),
+            'fresh': sum(1 for e in self.entries.values()
+                         if e.get('researched_at') and time.time() - e['researched_at'] < self.ttl),
+            'in_flight': len(self._in_flight),
+            'researched': self.researched,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'ttl_days': round(self.ttl / DAY, 1)
+        }
@@ -0,0 +1,199 @@
+"""
+Circuit Breaker Module
+
+Remembers when a remote backend (Gemini, DuckDuckGo, wttr.in, Google Translate)
+is failing so callers fall back instantly instead of paying the full network
+timeout on every call.
+
+States:
+    closed     - calls pass; failures are counted in a sliding time window
+    open       - calls are rejected until the probe interval elapses
+    half_open  - one probe call is let through; success closes the breaker,
+                 failure re-opens it with a doubled probe interval
+
+Breakers are shared per backend name via get_breaker(). Shown in !debug breakers.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with exponential probe intervals (thread-safe)."""
+
+    def __init__(self, name: str, window_s: float = None, min_calls: int = None,
+                 failure_rate: float = None, consecutive_failures: int = None,
+                 open_s: float = None, max_open_s: float = None):
+        """
+        Args:
+            name: Backend name (shown in !debug)
+            window_s: Sliding window for the failure rate
+            min_calls: Calls needed in the window before the rate is evaluated
+            failure_rate: Failure ratio (0-1) that opens the breaker
+            consecutive_failures: Consecutive failures that open it regardless of the window
+            open_s: First probe interval; doubles after every failed probe
+            max_open_s: Cap for the probe interval
+        """
+        self.name = name
+        self.window_s = window_s or getattr(config_settings, 'CIRCUIT_WINDOW_SECONDS', 300)
+        self.min_calls = min_calls or getattr(config_settings, 'CIRCUIT_MIN_CALLS', 4)
+        self.failure_rate = failure_rate or getattr(config_settings, 'CIRCUIT_FAILURE_RATE', 0.5)
+        self.consecutive_threshold = consecutive_failures or getattr(config_settings, 'CIRCUIT_CONSECUTIVE_FAILURES', 3)
+        self.base_open_s = open_s or getattr(config_settings, 'CIRCUIT_OPEN_SECONDS', 30)
+        self.max_open_s = max_open_s or getattr(config_settings, 'CIRCUIT_MAX_OPEN_SECONDS', 1800)
+
+        self.state = CLOSED
+        self._calls = deque()  # (timestamp, succeeded)
+        self._consecutive = 0
+        self._open_until = 0.0
+        self._open_s = self.base_open_s
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.last_error: Optional[str] = None
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """True if a call may go out now. In half-open only one probe is allowed at a time."""
+        with self._lock:
+            now = time.time()
+            if self.state == OPEN:
+                if now < self._open_until:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+                logger.info(f"Circuit '{self.name}': half-open, probing backend")
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    @property
+    def available(self) -> bool:
+        """Non-consuming check: False while open and the probe interval has not elapsed."""
+        return self.state != OPEN or time.time() >= self._open_until
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed (0 if calls pass)."""
+        return max(0.0, self._open_until - time.time()) if self.state == OPEN else 0.0
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}': closed (backend recovered)")
+                self._calls.clear()  # Failures before the outage must not re-trip it right away
+            self._add_call(True)
+            self._consecutive = 0
+            self.state = CLOSED
+            self._probe_in_flight = False
+            self._open_s = self.base_open_s
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._add_call(False)
+            self._consecutive += 1
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+            if self.state == HALF_OPEN:
+                # Failed probe - back off exponentially
+                self._open_s = min(self._open_s * 2, self.max_open_s)
+                self._trip()
+            elif self.state == CLOSED and self._should_trip():
+                self._trip()
+
+    def release_probe(self):
+        """Gives up a half-open probe without a verdict (e.g. the call was cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """Forces the breaker closed (e.g. after the API key was fixed)."""
+        with self._lock:
+            self.state = CLOSED
+            self._calls.clear()
+            self._consecutive = 0
+            self._probe_in_flight = False
+            self._open_s = self.base_open_s
+
+    def _add_call(self, succeeded: bool):
+        now = time.time()
+        self._calls.append((now, succeeded))
+        while self._calls and self._calls[0][0] < now - self.window_s:
+            self._calls.popleft()
+
+    def _should_trip(self) -> bool:
+        if self._consecutive >= self.consecutive_threshold:
+            return True
+        if len(self._calls) < self.min_calls:
+            return False
+        failures = sum(1 for _, ok in self._calls if not ok)
+        return failures / len(self._calls) >= self.failure_rate
+
+    def _trip(self):
+        self.state = OPEN
+        self._probe_in_flight = False
+        self.opened_at = time.time()
+        self._open_until = self.opened_at + self._open_s
+        self.times_opened += 1
+        logger.warning(f"Circuit '{self.name}': OPEN for {self._open_s:.0f}s ({self.last_error or 'failures'})")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            calls = len(self._calls)
+            failures = sum(1 for _, ok in self._calls if not ok)
+        return {
+            'state': self.state,
+            'failure_rate': f"{failures}/{calls}",
+            'consecutive_failures': self._consecutive,
+            'retry_in': round(self.retry_in()),
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+            'last_error': (self.last_error or "")[:100]
+        }
+
+    def format_status(self) -> str:
+        """One-line state for !debug."""
+        stats = self.get_stats()
+        icon = {CLOSED: "✅", HALF_OPEN: "🟡", OPEN: "🔴"}[self.state]
+        line = f"{icon} {self.state} | failures {stats['failure_rate']} in {self.window_s:.0f}s"
+        if self.state == OPEN:
+            line += f" | probe in {stats['retry_in']}s"
+        if stats['times_opened']:
+            line += f" | opened {stats['times_opened']}x, rejected {stats['rejected']}"
+        if self.state != CLOSED and stats['last_error']:
+            line += f" | {stats['last_error']}"
+        return line
+
+
+# Global registry (one breaker per backend)
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get or create the shared breaker for a backend."""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_all_breakers() -> Dict[str, CircuitBreaker]:
+    with _registry_lock:
+        return dict(_breakers)
@@ -11,6 +11,9 @@ import aiohttp
 import config_settings
 import os
 import json
+from .circuit_breaker import get_all_breakers
+from .system_metrics import get_metrics_sampler
+from .topic_store import get_topic_store
 try:
     import discord
 except ImportError:
@@ -506,7 +509,7 @@ class CommandHandler:
         "!monitor cpu", "!monitor ram", "!monitor disk", "!monitor network",
         
         # !debug subcommands
-        "!debug quick", "!debug deep", "!debug tools", "!debug compile",
+        "!debug quick", "!debug deep", "!debug tools", "!debug compile", "!debug llm", "!debug llm-tune", "!debug breakers", "!debug actions", "!debug lag", "!debug tasks", "!debug startup",
         
         # !goals subcommands
         "!goals add", "!goals remove", "!goals clear",
@@ -874,19 +877,17 @@ class CommandHandler:
         # --- Data Collection ---
 
         # 1. System Resources
-        cpu_percent = psutil.cpu_percent()
-        ram = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        sample = get_metrics_sampler().latest()
         
-        ram_used = to_gb(ram.used)
-        ram_total = to_gb(ram.total)
-        disk_used = to_gb(disk.used)
-        disk_total = to_gb(disk.total)
+        ram_used = to_gb(sample.ram_used)
+        ram_total = to_gb(sample.ram_total)
+        disk_used = to_gb(sample.disk_used)
+        disk_total = to_gb(sample.disk_total)
 
         system_resources = (
-            f"**CPU:** {cpu_percent}%\n"
-            f"**RAM:** {ram.percent}% ({ram_used} / {ram_total})\n"
-            f"**Disk:** {disk.percent}% ({disk_used} / {disk_total})"
+            f"**CPU:** {sample.cpu_percent}%\n"
+            f"**RAM:** {sample.ram_percent}% ({ram_used} / {ram_total})\n"
+            f"**Disk:** {sample.disk_percent}% ({disk_used} / {disk_total})"
         )
 
         # 2. System Info
@@ -1323,15 +1324,12 @@ class CommandHandler:
                 results.append("❓ **Network**: Check failed")
             
             # 7. Resource Check
-            import psutil
-            cpu = psutil.cpu_percent(interval=1)
-            mem = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            sample = get_metrics_sampler().latest()
             results.append(
                 f"📊 **Resources**:\n"
-                f"  - CPU: {cpu}%\n"
-                f"  - RAM: {mem.percent}% ({mem.available / 1024**3:.1f}GB free)\n"
-                f"  - Disk: {disk.percent}% ({disk.free / 1024**3:.1f}GB free)"
+                f"  - CPU: {sample.cpu_percent}%\n"
+                f"  - RAM: {sample.ram_percent}% ({sample.ram_available / 1024**3:.1f}GB free)\n"
+                f"  - Disk: {sample.disk_percent}% ({sample.disk_free / 1024**3:.1f}GB free)"
             )
         
         # === TOOLS MODE ===
@@ -1491,7 +1489,6 @@ class CommandHandler:
         import platform
         import time
         import asyncio
-        import psutil
 
         hostname = platform.node()
         os_name = platform.system()
@@ -1507,9 +1504,9 @@ class CommandHandler:
         start_time = time.time()
         llm_status = "🔴 Unavailable"
         
-        if self.agent.llm and self.agent.llm.llm:
+        if self.agent.llm and self.agent.llm.is_available:
             try:
-                # Quick generation test
+                # Quick generation test (waits for background model load if needed)
                 response = await self.agent.llm.generate_response("ping", system_prompt="Reply with 'pong'.")
                 latency = (time.time() - start_time) * 1000
                 if response and "LLM not available" not in response:
@@ -1542,8 +1539,7 @@ class CommandHandler:
 
         # 3. Disk Space
         try:
-            disk = psutil.disk_usage('/')
-            free_gb = disk.free / (1024**3)
+            free_gb = get_metrics_sampler().latest().disk_free / (1024**3)
             status_text += f"• **Disk Free:** {free_gb:.1f} GB\n"
         except:
             pass
@@ -1696,7 +1692,7 @@ _{desc}_"""
             # Single forced learning (original behavior)
             await self.agent.discord.send_message(channel_id, "🎓 Forcing single learning session...")
             self.agent.actions_without_tools = 2
-            self.agent.boredom_score = 1.0 # Force immediate action
+            self.agent.submit_autonomous_action()
             await self.agent.discord.send_message(channel_id, "✅ Learning forced. I will try to learn something new now.")
             return
 
@@ -1720,27 +1716,34 @@ _{desc}_"""
         if subcommand != raw_subcommand:
              await self.agent.discord.send_message(channel_id, f"💡 Did you mean `{subcommand}`? Executing...")
         
-        # Queue command - show current learning queue
+        # Queue command - show current learning jobs
         if subcommand == 'queue':
-            if not self.agent.learning_queue:
+            jobs = await asyncio.to_thread(self.agent.learning_jobs.active_jobs)
+            if not jobs:
                 await self.agent.discord.send_message(channel_id, "📋 **Learning Queue: Empty**\nUse `!learn all` to start learning all tools.")
                 return
             
-            queue_list = "\n".join([f"{i+1}. `{tool}`" for i, tool in enumerate(self.agent.learning_queue)])
-            total = len(self.agent.learning_queue)
+            icons = {'running': "🔄", 'pending': "⏳"}
+            queue_list = "\n".join([f"{i+1}. {icons.get(job['status'], '')} `{job['tool']}`"
+                                    + (f" (attempt {job['attempts']}, last error: {(job['error'] or '')[:60]})" if job['attempts'] else "")
+                                    for i, job in enumerate(jobs)])
+            total = len(jobs)
             status = "🔄 Active" if self.agent.is_learning_mode else "⏸️ Paused"
+            counts = await asyncio.to_thread(self.agent.learning_jobs.counts)
             
             await self.agent.discord.send_message(channel_id, 
                 f"📋 **Learning Queue Status:** {status}\n\n"
                 f"**Remaining Tools ({total}):**\n{queue_list}\n\n"
+                f"✅ Learned: {counts.get('done', 0)} | ✖️ Failed: {counts.get('failed', 0)}\n"
                 f"💡 *Use `!learn stop` to cancel the queue*")
             return
         
         # Stop command
         if subcommand == 'stop':
-            if self.agent.is_learning_mode:
+            if self.agent.is_learning_mode or await asyncio.to_thread(self.agent.learning_jobs.has_work):
                 self.agent.is_learning_mode = False
-                self.agent.learning_queue = []
+                await asyncio.to_thread(self.agent.learning_jobs.cancel_all)
+                self.agent.actions.cancel(kind='learning')
                 await self.agent.discord.send_message(channel_id, "🛑 **Learning Session Stopped.**\nResuming normal autonomous behavior.")
             else:
                 await self.agent.discord.send_message(channel_id, "ℹ️ No active learning session to stop.")
@@ -1758,10 +1761,9 @@ _{desc}_"""
                 f"📋 Plan: I will systematically learn and test {count} tools.\n"
                 f"Tools: {', '.join(tools_to_learn)}")
             
-            # Set learning mode
-            self.agent.learning_queue = tools_to_learn
-            self.agent.is_learning_mode = True
-            self.agent.boredom_score = 1.0  # Force immediate action
+            # Persist the jobs and start (or wake) the learning runner
+            await asyncio.to_thread(self.agent.learning_jobs.enqueue, tools_to_learn)
+            self.agent.submit_learning()
             
             await self.agent.discord.send_message(channel_id, "🚀 Learning sequence initiated!")
             return
@@ -1772,10 +1774,9 @@ _{desc}_"""
         if tool_name in self.agent.tools.tools:
             await self.agent.discord.send_message(channel_id, f"🎓 **Targeted Learning:** `{tool_name}`")
             
-            # Set up single-item queue
-            self.agent.learning_queue = [tool_name]
-            self.agent.is_learning_mode = True
-            self.agent.boredom_score = 1.0
+            # Persist a single job
+            await asyncio.to_thread(self.agent.learning_jobs.enqueue, [tool_name])
+            self.agent.submit_learning()
             
             await self.agent.discord.send_message(channel_id, f"🚀 Learning sequence initiated for `{tool_name}`!")
         else:
@@ -1939,8 +1940,9 @@ _{desc}_"""
                     else:
                         duration = value  # seconds or no unit
             
-            # Run as background task so other commands can be processed
-            asyncio.create_task(self._cmd_logs_live(channel_id, min(duration, 3600)))
+            # Run as background task so other commands can be processed (one stream at a time)
+            if not self.agent.supervisor.spawn('live_logs', self._cmd_logs_live(channel_id, min(duration, 3600))):
+                await self.agent.discord.send_message(channel_id, "⚠️ A live log stream is already running.")
         else:
             await self.agent.discord.send_message(channel_id, f"❓ Unknown subcommand: `{subcommand}`. Use `!live logs`")
     
@@ -2188,13 +2190,13 @@ _{desc}_"""
                 for attachment in message_obj['attachments']:
                     if attachment.get('content_type', '').startswith('image/'):
                         try:
-                            # Download image
-                            async with aiohttp.ClientSession() as session:
-                                async with session.get(attachment.get('url')) as resp:
-                                    if resp.status == 200:
-                                        image_data = await resp.read()
-                                        await thinking_msg.edit(content="🖼️ Analyzing image...")
-                                        break
+                            # Download image (shared keep-alive session)
+                            async with self.agent.http.session().get(attachment.get('url')) as resp:
+                                if resp.status == 200:
+                                    image_data = await resp.read()
+                            if image_data:
+                                await thinking_msg.edit(content="🖼️ Analyzing image...")
+                                break
                         except Exception as e:
                             logger.error(f"Failed to download image: {e}")
             
@@ -2230,14 +2232,12 @@ _{desc}_"""
             if image_data:
                 difficulty_score += 10
             
-            # Check availability of Local LLM
-            local_available = self.agent.llm.llm is not None
-            
-            # Determine Route
+            # Determine Route (LLMClient router)
             # Use Gemini if:
             # 1. High difficulty/Image
             # 2. OR Local LLM is NOT available (Fallback to Gemini Fast)
-            use_gemini = (difficulty_score >= 1 or image_data is not None) or (not local_available)
+            route = self.agent.llm.select_model("chat", difficulty=difficulty_score, has_image=image_data is not None)
+            use_gemini = route == "gemini"
             
             model_type = "high" if difficulty_score >= 2 else "fast"
             
@@ -2266,20 +2266,20 @@ _{desc}_"""
                     self.agent.is_processing = False
                     return
 
-                # RAG Logic
-                memories = []
+                # Working memory: one cached, bounded summary instead of raw memories
+                memory_text = ""
                 try:
-                    memories = self.agent.memory.search_relevant_memories(question, limit=3)
+                    self.agent.working_memory.maybe_refresh()
+                    memory_text = self.agent.working_memory.get_context()
                 except Exception as e:
-                    logger.error(f"Memory search error: {e}")
+                    logger.error(f"Working memory error: {e}")
 
                 # Determine context
                 system_prompt = "You are a helpful AI assistant. Answer the user's question clearly and concisely."
                 context_prompt = f"User Question: {question}"
                 
                 # Add memories to context
-                if memories:
-                    memory_text = "\n".join([f"- {m['content']}" for m in memories])
+                if memory_text:
                     context_prompt = f"Context from memory:\n{memory_text}\n\n{context_prompt}"
                 
                 if self.agent.last_message_content:
@@ -2288,7 +2288,8 @@ _{desc}_"""
                 # Direct generation without tool-forcing `decide_action`
                 response_text = await self.agent.llm.generate_response(
                     prompt=context_prompt,
-                    system_prompt=system_prompt
+                    system_prompt=system_prompt,
+                    call_site="ask"
                 )
 
             # 5. Send Response
@@ -2380,7 +2381,9 @@ _{desc}_"""
             
             tool_selection_response = await self.agent.llm.generate_response(
                 prompt=f"User Question: {question}\n\nSelect the best tool (or NO_TOOL):",
-                system_prompt=system_prompt
+                system_prompt=system_prompt,
+                task="classify",
+                call_site="ask_tool_select"
             )
             
             tools_logger.info(f"cmd_ask: Tool selection response: {tool_selection_response}")
@@ -2460,7 +2463,9 @@ _{desc}_"""
                             
                             final_answer = await self.agent.llm.generate_response(
                                 prompt=answer_prompt,
-                                system_prompt="You are a helpful assistant. Use the tool result to answer the question naturally."
+                                system_prompt="You are a helpful assistant. Use the tool result to answer the question naturally.",
+                                prompt_lookup=True,  # Extractive summary - output copies the input
+                                call_site="ask_summary"
                             )
                             
                             await self.agent.discord.send_message(channel_id, f"💬 **Answer:**\n{final_answer}")
@@ -2497,7 +2502,8 @@ _{desc}_"""
             logger.debug("cmd_ask: Sending prompt to LLM...")
             initial_response = await self.agent.llm.generate_response(
                 prompt=full_prompt,
-                system_prompt=system_prompt
+                system_prompt=system_prompt,
+                call_site="ask"
             )
             logger.debug(f"cmd_ask: LLM response received: '{initial_response}'")
             
@@ -2560,7 +2566,8 @@ _{desc}_"""
                     try:
                         memory_answer = await self.agent.llm.generate_response(
                             prompt=formulate_prompt,
-                            system_prompt="You are a helpful assistant. Answer based only on the provided information. Be concise and clear."
+                            system_prompt="You are a helpful assistant. Answer based only on the provided information. Be concise and clear.",
+                            call_site="ask"
                         )
                         
                         # Check if this answer is also bad
@@ -2628,7 +2635,9 @@ _{desc}_"""
                     
                     final_answer = await self.agent.llm.generate_response(
                         prompt=final_prompt,
-                        system_prompt="You are a helpful AI assistant. Synthesize the search results to answer the user's question."
+                        system_prompt="You are a helpful AI assistant. Synthesize the search results to answer the user's question.",
+                        prompt_lookup=True,  # Extractive summary - output copies the input
+                        call_site="ask_summary"
                     )
                     
                     # Save to memory
@@ -2919,7 +2928,7 @@ _{desc}_"""
             test_areas = ['llm', 'network', 'database', 'filesystem', 'tools', 'memory', 'ngrok', 'discord', 'resources', 'loops']
             verify_only = True
         elif area == 'quick':
-            test_areas = ['llm', 'network', 'database', 'discord', 'resources', 'filesystem', 'loops', 'tools']
+            test_areas = ['llm', 'network', 'database', 'discord', 'resources', 'filesystem', 'loops', 'tools', 'breakers', 'actions', 'lag']
             verify_only = False
         elif area == 'deep':
             # DEEP DEBUG MODE
@@ -2983,6 +2992,16 @@ _{desc}_"""
                     results['memory'] = await self._test_memory()
                 elif test_area in ['code_integrity', 'code', 'compile']:
                     results['code_integrity'] = await self._test_code_integrity()
+                elif test_area == 'breakers':
+                    results['breakers'] = self._test_breakers()
+                elif test_area == 'actions':
+                    results['actions'] = self._test_actions()
+                elif test_area == 'lag':
+                    results['lag'] = self._test_lag()
+                elif test_area == 'tasks':
+                    results['tasks'] = self._test_tasks()
+                elif test_area == 'startup':
+                    results['startup'] = self._test_startup()
                 elif test_area in ['boredom', 'discord', 'resources']:
                     # Use existing debug_info for these
                     debug_info = self.agent.get_debug_info(test_area)
@@ -3001,7 +3020,7 @@ _{desc}_"""
         
         valid_areas = ['all', 'quick', 'deep', 'tools', 'llm', 'network', 'ngrok', 
                        'database', 'filesystem', 'memory', 'boredom', 'discord', 'resources',
-                       'errors', 'logs', 'config', 'code_integrity', 'code', 'compile']
+                       'errors', 'logs', 'config', 'code_integrity', 'code', 'compile', 'llm-tune', 'breakers', 'actions', 'lag', 'tasks', 'startup']
         
         if area not in valid_areas:
             # Fuzzy matching
@@ -3036,6 +3055,9 @@ _{desc}_"""
         elif area == 'config':
             await self._cmd_debug_config(channel_id)
             return
+        elif area == 'llm-tune':
+            await self._cmd_debug_llm_tune(channel_id, full=len(args) > 1 and args[1].lower() == 'full')
+            return
         elif area in ['code_integrity', 'code', 'compile']:
             analyzing_msg = await self.agent.discord.send_message(
                 channel_id, 
@@ -3213,20 +3235,80 @@ _{desc}_"""
         results['summary'] = f"✅ {passed}/{total_tools} tools available"
         return results
     
+    async def _cmd_debug_llm_tune(self, channel_id: int, full: bool = False):
+        """Runs the LLM autotuner in a subprocess and reloads the resulting profile."""
+        import sys
+        from .llm_tuner import PROGRESS_PREFIX, profile_path
+        
+        if getattr(self, '_llm_tune_running', False):
+            await self.agent.discord.send_message(channel_id, "⏳ LLM tuning is already running.")
+            return
+        self._llm_tune_running = True
+        
+        grid_name = "full" if full else "quick"
+        msg_obj = await self.agent.discord.send_message(
+            channel_id,
+            f"🔧 **LLM Autotune ({grid_name})**\n```\nStarting... (measurements share the CPU with the running agent)\n```"
+        )
+        
+        lines = []
+        try:
+            cmd = [sys.executable, "-m", "agent.llm_tuner"] + (["--full"] if full else [])
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            )
+            last_edit = 0
+            async for raw in proc.stdout:
+                line = raw.decode('utf-8', errors='replace').rstrip()
+                if not line:
+                    continue
+                lines.append(line[len(PROGRESS_PREFIX):] if line.startswith(PROGRESS_PREFIX) else line)
+                # Throttle Discord edits
+                if msg_obj and time.time() - last_edit > 5:
+                    last_edit = time.time()
+                    body = "\n".join(lines[-12:])[-1800:]
+                    try:
+                        await msg_obj.edit(content=f"🔧 **LLM Autotune ({grid_name})**\n```\n{body}\n```")
+                    except Exception:
+                        pass
+            await proc.wait()
+            
+            loaded = self.agent.llm.reload_tuned_profile()
+            status = f"✅ Profile saved to `{profile_path()}` and loaded (full effect after restart)" if loaded else "✖️ No profile produced"
+            body = "\n".join(lines[-14:])[-1700:]
+            content = f"🔧 **LLM Autotune ({grid_name})** finished\n```\n{body}\n```\n{status}"
+            if msg_obj:
+                await msg_obj.edit(content=content)
+            else:
+                await self.agent.discord.send_message(channel_id, content)
+        except Exception as e:
+            logger.error(f"LLM autotune failed: {e}")
+            await self.agent.discord.send_message(channel_id, f"✖️ LLM autotune failed: {e}")
+        finally:
+            self._llm_tune_running = False
+
     async def _test_llm(self):
         """Test LLM inference capability."""
         results = {}
         start_time = time.time()
         
         try:
-            if not self.agent.llm or not self.agent.llm.llm:
+            if not self.agent.llm or not self.agent.llm.is_available:
                 results['status'] = "✖️ Not initialized"
                 return results
             
+            if self.agent.llm.is_loading:
+                results['status'] = "⏳ Model loading in background"
+                return results
+            
             # Test inference
             response = await self.agent.llm.generate_response(
                 "Reply with just the word 'OK'",
-                system_prompt="You are a test system. Reply exactly as requested."
+                system_prompt="You are a test system. Reply exactly as requested.",
+                call_site="debug_test"
             )
             
             latency = (time.time() - start_time) * 1000
@@ -3236,6 +3318,16 @@ _{desc}_"""
                 results['latency'] = f"{latency:.0f}ms"
                 results['provider'] = getattr(self.agent.llm, 'provider_type', 'Unknown')
                 results['model'] = getattr(self.agent.llm, 'model_filename', 'Unknown')
+                results['tuned_profile'] = "✅ Loaded" if self.agent.llm.tuned_profile else "➖ None (run !debug llm-tune)"
+                if self.agent.llm.server_client:
+                    results['inference_server'] = self.agent.llm.server_client.get_stats()
+                batch_stats = self.agent.llm.get_batch_stats()
+                if batch_stats:
+                    results['batched_inference'] = (f"{batch_stats['active']}/{batch_stats['slots']} active, "
+                                                    f"{batch_stats['queued']} queued, peak {batch_stats['peak_active']}, "
+                                                    f"avg {batch_stats['avg_batch_tokens']} tok/step")
+                if self.agent.llm.model_load_duration is not None:
+                    results['model_load_time'] = f"{self.agent.llm.model_load_duration:.1f}s"
             elif response == "LLM not available.":
                 results['status'] = "✖️ Unavailable"
             else:
@@ -3245,6 +3337,54 @@ _{desc}_"""
         except Exception as e:
             results['status'] = f"✖️ Error: {str(e)[:50]}"
         
+        if self.agent.llm.gemini_enabled:
+            results['gemini_circuit'] = self.agent.llm.gemini_breaker.format_status()
+        
+        # Rolling latency percentiles (p50/p95/p99) per call site and provider
+        telemetry = self.agent.llm.telemetry.format_summary()
+        if telemetry:
+            results['telemetry (p50/p95/p99)'] = telemetry
+        
+        return results
+    
+    def _test_breakers(self) -> dict:
+        """Circuit breaker state of remote backends (Gemini, search, weather, translate)."""
+        breakers = get_all_breakers()
+        if not breakers:
+            return {'status': "➖ No remote backend called yet"}
+        results = {'status': "✅ All closed"}
+        if any(not b.available for b in breakers.values()):
+            results['status'] = "⚠️ Backend(s) down - using fallbacks"
+        for name, breaker in sorted(breakers.items()):
+            results[name] = breaker.format_status()
+        return results
+    
+    def _test_actions(self) -> dict:
+        """Action queue depth, throughput, wait times and the next queued actions."""
+        queue = self.agent.actions
+        results = queue.get_stats()
+        stalled = results['depth'] and results['oldest_wait_s'] > 300
+        results['status'] = "⚠️ Actions waiting > 5 min" if stalled else "✅ OK"
+        for i, action in enumerate(queue.pending()[:5], 1):
+            results[f'next_{i}'] = f"[{action.kind}] {action.label} (waiting {time.time() - action.submitted_at:.0f}s)"
+        return results
+    
+    def _test_lag(self) -> dict:
+        """Event-loop scheduling lag and the functions that blocked the loop the longest."""
+        monitor = self.agent.lag_monitor
+        results = monitor.get_stats()
+        p95 = results['lag_p95_ms']
+        if not results['watchdog']:
+            results['status'] = "⚠️ Watchdog not running"
+        elif p95 is not None and p95 >= monitor.threshold_ms:
+            results['status'] = "⚠️ Event loop often blocked"
+        else:
+            results['status'] = "✅ OK"
+        for i, offender in enumerate(monitor.top_offenders(5), 1):
+            results[f'top_{i}'] = (f"{offender['function']} - {offender['count']}x, "
+                                   f"total {offender['total_ms']:.0f}ms, max {offender['max_ms']:.0f}ms")
+            if i == 1 and offender['stack']:
+                results['top_1_stack'] = " <- ".join(reversed(offender['stack'][-3:]))
         return results
     
     async def _test_network(self):
@@ -3284,6 +3424,17 @@ _{desc}_"""
         except:
             results['discord_api'] = "✖️ Error"
         
+        # Shared HTTP session: connection reuse and DNS cache telemetry
+        try:
+            http = self.agent.http.get_stats()
+            results['http_session'] = f"{http['session']} | {http['requests']} requests, {http['errors']} errors | limits {http['limits']}"
+            results['http_reuse'] = f"{http['reuse_ratio']} reused ({http['connections_reused']} reused / {http['connections_new']} new)"
+            results['http_dns_cache'] = f"{http['dns_cache_hit_ratio']} hits"
+            if http['latency_p95_ms'] is not None:
+                results['http_latency'] = f"p50 {http['latency_p50_ms']} ms / p95 {http['latency_p95_ms']} ms"
+        except Exception as e:
+            results['http_session'] = f"❓ {e}"
+        
         return results
     
     async def _test_ngrok(self):
@@ -3306,17 +3457,17 @@ _{desc}_"""
                 
                 # Check for active tunnels (without showing URL)
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get('http://127.0.0.1:4040/api/tunnels', timeout=5) as resp:
-                            if resp.status == 200:
-                                data = await resp.json()
-                                tunnels = data.get('tunnels', [])
-                                if tunnels:
-                                    results['tunnel'] = "✅ Active"
-                                else:
-                                    results['tunnel'] = "⚠️ Not Active"
+                    ngrok_api = 'http://127.0.0.1:4040/api/tunnels'
+                    async with self.agent.http.session().get(ngrok_api, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                        if resp.status == 200:
+                            data = await resp.json()
+                            tunnels = data.get('tunnels', [])
+                            if tunnels:
+                                results['tunnel'] = "✅ Active"
                             else:
-                                results['tunnel'] = "⚠️ API Error"
+                                results['tunnel'] = "⚠️ Not Active"
+                        else:
+                            results['tunnel'] = "⚠️ API Error"
                 except:
                     results['tunnel'] = "⚠️ Cannot reach API"
             else:
@@ -3466,56 +3617,76 @@ _{desc}_"""
         return results
 
     async def _check_loop_health(self) -> dict:
-        """Check if all task loops are running and restart if needed."""
+        """Status of the agent loops (restarts are handled by the task supervisor)."""
         results = {}
         
-        # Check if loop tasks exist and are not done
-        if hasattr(self.agent, 'loop_tasks'):
-            loop_names = ['boredom_loop', 'observation_loop', 'action_loop', 'backup_loop']
-            loop_functions = [
-                self.agent.boredom_loop,
-                self.agent.observation_loop,
-                self.agent.action_loop,
-                self.agent.backup_loop
-            ]
-            
-            for i, task in enumerate(self.agent.loop_tasks):
-                loop_name = loop_names[i] if i < len(loop_names) else f'loop_{i}'
-                
-                if task.done():
-                    # Loop has stopped
-                    try:
-                        exception = task.exception()
-                        results[loop_name] = f"❌ Stopped (Exception: {exception})"
-                        logger.error(f"Loop {loop_name} crashed: {exception}")
-                    except:
-                        results[loop_name] = "❌ Stopped"
-                        logger.warning(f"Loop {loop_name} stopped without exception")
-                    
-                    # Auto-restart if agent is still running (not a deliberate shutdown)
-                    if self.agent.is_running and i < len(loop_functions):
-                        try:
-                            import asyncio
-                            logger.info(f"Auto-restarting {loop_name}...")
-                            # Replace the dead task with a new one
-                            self.agent.loop_tasks[i] = asyncio.create_task(loop_functions[i]())
-                            results[loop_name] += " → 🔄 Restarted"
-                            
-                            # Notify admin
-                            await self.agent.send_admin_dm(
-                                f"⚠️ **Loop Auto-Restart**\n{loop_name} crashed and was automatically restarted.",
-                                category="system"
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to restart {loop_name}: {e}")
-                            results[loop_name] += f" (Restart failed: {e})"
-                else:
-                    results[loop_name] = "✅ Running"
-        else:
+        if not hasattr(self.agent, 'loop_tasks'):
             results['status'] = "❌ Loop tasks not initialized"
+            return results
+        
+        tasks = {t['name']: t for t in self.agent.supervisor.tasks()}
+        for loop_name in self.agent.loop_names:
+            task = tasks.get(loop_name)
+            if task is None:
+                results[loop_name] = "❌ Not started"
+            elif task['state'] == 'running':
+                results[loop_name] = "✅ Running" + (f" ({task['restarts']} restarts)" if task['restarts'] else "")
+            elif task['state'] == 'backoff':
+                results[loop_name] = f"🔄 Restarting in {task['restart_in_s']}s ({task['last_error'] or 'exited'})"
+            else:
+                results[loop_name] = f"❌ Stopped ({task['last_error'] or task['state']})"
             
         return results
 
+    def _test_tasks(self) -> dict:
+        """Supervised loops and ad-hoc tasks with age, state, restarts and last error."""
+        supervisor = self.agent.supervisor
+        results = supervisor.get_stats()
+        tasks = supervisor.tasks()
+        broken = [t for t in tasks if t['state'] in ('backoff', 'failed')]
+        results['status'] = f"⚠️ {len(broken)} task(s) restarting/failed" if broken else "✅ OK"
+        for task in tasks[:20]:
+            line = f"{task['state']} | {task['kind']} | age {task['age_s']}s"
+            if task['restarts']:
+                line += f" | {task['restarts']} restarts"
+            if task['last_error']:
+                line += f" | {task['last_error']}"
+            results[task['name']] = line
+        return results
+
+    def _test_startup(self) -> dict:
+        """Startup timeline of this boot: per-phase offset/duration, compared with the previous boot."""
+        timeline = self.agent.startup
+        boot = timeline.to_dict()
+        failed = [p['name'] for p in boot['phases'] if p['status'] == 'failed']
+        degraded = [p['name'] for p in boot['phases'] if p['status'] == 'degraded']
+        if failed:
+            results = {'status': f"❌ Failed: {', '.join(failed)}"}
+        elif degraded:
+            results = {'status': f"⚠️ Degraded: {', '.join(degraded)}"}
+        else:
+            results = {'status': "✅ OK"}
+        results['ready_after'] = f"{boot['ready_s']:.2f}s" if boot['ready_s'] is not None else "starting..."
+        
+        previous = [b for b in timeline.load_history() if b.get('started_at') != boot['started_at']]
+        prev_phases = {}
+        if previous:
+            last = previous[-1]
+            prev_phases = {p['name']: p['duration_s'] for p in last.get('phases', [])}
+            if last.get('ready_s') is not None:
+                results['previous_boot'] = f"{last['ready_s']:.2f}s"
+        
+        for phase in boot['phases']:
+            line = f"{phase['group']} | +{phase['start_s']:.2f}s | {phase['duration_s']:.2f}s"
+            if phase['name'] in prev_phases:
+                line += f" (prev {prev_phases[phase['name']]:.2f}s)"
+            if phase['status'] != 'ok':
+                line += f" | {phase['status']}"
+            if phase['error']:
+                line += f" | {phase['error'][:80]}"
+            results[phase['name']] = line
+        return results
+
     async def _test_memory(self) -> dict:
         """Test memory system."""
         results = {}
@@ -3783,8 +3954,9 @@ _{description}_
 
         # Start monitoring loop
         if is_live:
-            # Run in background to avoid blocking
-            asyncio.create_task(self._monitor_loop(msg, end_time, is_live=True))
+            # Run in background to avoid blocking (capped per SUPERVISOR_KIND_LIMITS)
+            if not self.agent.supervisor.spawn('live_monitor', self._monitor_loop(msg, end_time, is_live=True)):
+                await self.agent.discord.send_message(channel_id, "⚠️ Too many live monitors running. Wait for one to finish.")
         else:
             # Run once and wait
             await self._monitor_loop(msg, end_time, is_live=False)
@@ -3849,55 +4021,34 @@ _{description}_
             return gpu_data
 
         cpu_model = get_cpu_model()
-        last_net_io = psutil.net_io_counters()
-        last_time = time.time()
         end_time_str = end_time.strftime("%H:%M:%S")
-        
-        # If live mode, we need a small delay to calc net speed for first frame
-        if not is_live:
-            await asyncio.sleep(0.5) 
+        sampler = get_metrics_sampler()
 
         # Update loop
         while True:
             try:
+                sample = sampler.latest()
+                
                 # 1. CPU
-                cpu_percent = psutil.cpu_percent(interval=None)
+                cpu_percent = sample.cpu_percent
                 
                 # 2. RAM
-                ram = psutil.virtual_memory()
-                ram_gb_used = ram.used / (1024**3)
-                ram_gb_total = ram.total / (1024**3)
+                ram_gb_used = sample.ram_used / (1024**3)
+                ram_gb_total = sample.ram_total / (1024**3)
                 
                 # 3. GPU
                 gpu_info = get_gpu_info()
                 
                 # 4. Disks
                 disk_str = ""
-                for part in psutil.disk_partitions():
-                    if 'cdrom' in part.opts or part.fstype == '':
-                        continue
-                    try:
-                        usage = psutil.disk_usage(part.mountpoint)
-                        free_gb = usage.free / (1024**3)
-                        disk_bar = create_bar(usage.percent, 10)
-                        disk_str += f"  {part.device:<3} [{disk_bar}] {usage.percent:>3}% (Free: {free_gb:.0f}GB)\n"
-                    except:
-                        pass
-
-                # 5. Network Speed
-                current_net_io = psutil.net_io_counters()
-                current_time = time.time()
-                time_delta = current_time - last_time
-                
-                if time_delta > 0:
-                    sent_speed = (current_net_io.bytes_sent - last_net_io.bytes_sent) / time_delta / 1024 # KB/s
-                    recv_speed = (current_net_io.bytes_recv - last_net_io.bytes_recv) / time_delta / 1024 # KB/s
-                else:
-                    sent_speed = 0
-                    recv_speed = 0
-                
-                last_net_io = current_net_io
-                last_time = current_time
+                for part in sample.disks:
+                    free_gb = part['free'] / (1024**3)
+                    disk_bar = create_bar(part['percent'], 10)
+                    disk_str += f"  {part['device']:<3} [{disk_bar}] {part['percent']:>3}% (Free: {free_gb:.0f}GB)\n"
+
+                # 5. Network Speed (sampler rates, bytes/s)
+                sent_speed = sample.net_sent_rate / 1024 # KB/s
+                recv_speed = sample.net_recv_rate / 1024 # KB/s
                 
                 # Format speed
                 def fmt_speed(kb):
@@ -3916,7 +4067,7 @@ _{description}_
                 dashboard += f"      {cpu_model}\n"
                 
                 # RAM Section
-                dashboard += f"RAM:  [{create_bar(ram.percent)}] {ram.percent:>3}% ({ram_gb_used:.1f}/{ram_gb_total:.1f} GB)\n"
+                dashboard += f"RAM:  [{create_bar(sample.ram_percent)}] {sample.ram_percent:>3}% ({ram_gb_used:.1f}/{ram_gb_total:.1f} GB)\n"
                 
                 # GPU Section
                 if gpu_info['util'] is not None:
@@ -4376,17 +4527,10 @@ _{description}_
         subcommand = args[0].lower()
         topic_text = " ".join(args[1:]) if len(args) > 1 else None
         
-        # Load topics
-        topics_file = getattr(config_settings, 'TOPICS_FILE', 'boredom_topics.json')
-        topics = []
-        if os.path.exists(topics_file):
-            try:
-                with open(topics_file, 'r', encoding='utf-8') as f:
-                    topics = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading topics: {e}")
+        store = get_topic_store()
         
         if subcommand == "list":
+            topics = store.topics()
             if not topics:
                  await self.agent.discord.send_message(channel_id, "ℹ️ No topics defined.")
             else:
@@ -4405,10 +4549,7 @@ _{description}_
                 await self.agent.discord.send_message(channel_id, "❓ Usage: `!topic add <topic text>`")
                 return
             
-            if topic_text not in topics:
-                topics.append(topic_text)
-                with open(topics_file, 'w', encoding='utf-8') as f:
-                    json.dump(topics, f, indent=2)
+            if store.add(topic_text):
                 await self.agent.discord.send_message(channel_id, f"✅ Topic added: `{topic_text}`")
             else:
                 await self.agent.discord.send_message(channel_id, f"ℹ️ Topic already exists: `{topic_text}`")
@@ -4424,22 +4565,15 @@ _{description}_
              
              # Try remove by index
              if topic_text.isdigit():
-                 idx = int(topic_text) - 1
-                 if 0 <= idx < len(topics):
-                     removed = topics.pop(idx)
-                     with open(topics_file, 'w', encoding='utf-8') as f:
-                        json.dump(topics, f, indent=2)
+                 removed = store.remove_at(int(topic_text) - 1)
+                 if removed is not None:
                      await self.agent.discord.send_message(channel_id, f"✅ Topic removed: `{removed}`")
-                     return
                  else:
-                     await self.agent.discord.send_message(channel_id, f"✖️ Invalid index: {topic_text}. Range: 1-{len(topics)}")
-                     return
+                     await self.agent.discord.send_message(channel_id, f"✖️ Invalid index: {topic_text}. Range: 1-{len(store.topics())}")
+                 return
 
              # Try remove by text
-             if topic_text in topics:
-                 topics.remove(topic_text)
-                 with open(topics_file, 'w', encoding='utf-8') as f:
-                    json.dump(topics, f, indent=2)
+             if store.remove(topic_text):
                  await self.agent.discord.send_message(channel_id, f"✅ Topic removed: `{topic_text}`")
              else:
                  await self.agent.discord.send_message(channel_id, f"✖️ Topic not found: `{topic_text}`")
@@ -4449,18 +4583,13 @@ _{description}_
                  await self.agent.discord.send_message(channel_id, "⛔ **Access Denied.** Only admins can clear all topics.")
                  return
 
-             topics = []
-             with open(topics_file, 'w', encoding='utf-8') as f:
-                json.dump(topics, f, indent=2)
+             store.clear()
              await self.agent.discord.send_message(channel_id, "✅ All topics cleared.")
              
         else:
              # Implicit add for convenience if not a recognized command
              full_text = " ".join(args)
-             if full_text not in topics:
-                  topics.append(full_text)
-                  with open(topics_file, 'w', encoding='utf-8') as f:
-                      json.dump(topics, f, indent=2)
+             if store.add(full_text):
                   await self.agent.discord.send_message(channel_id, f"✅ Topic added: `{full_text}`")
              else:
                   await self.agent.discord.send_message(channel_id, f"ℹ️ Topic already exists: `{full_text}`")
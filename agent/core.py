@@ -7,20 +7,29 @@ import platform
 import os
 import json
 import discord
-import psutil
 import datetime
 from .reports import DailyStats
+from .telemetry import RollingStats
+from .topic_store import get_topic_store
+from .startup_timeline import get_startup_timeline
+from .activity_index import ActivityIndex, normalize_activity
+import config_settings
 
 logger = logging.getLogger(__name__)
 
 class AutonomousAgent:
     def __init__(self, discord_token: str = None, daily_stats=None):
+        init_start = time.time()
+        self.startup = get_startup_timeline()  # Per-phase boot durations (!debug startup)
         self.os_type = sys.platform
         self.is_linux = self.os_type.startswith('linux')
         logger.info(f"Initializing Agent on {platform.system()} ({platform.release()})")
         
-        # Load persistent state
-        state = self._load_agent_state()
+        # Load persistent state (one write-behind store for boredom, admin DMs and tool stats)
+        from .state_store import StateStore
+        with self.startup.phase('state'):
+            self.state_store = StateStore()
+            state = self._load_agent_state()
         self.boredom_score = state.get("boredom_score", 0.0)
         
         # Load admin DMs state with backward compatibility
@@ -41,9 +50,19 @@ class AutonomousAgent:
         self.action_history = []  # Track last actions (non-boredom)
         self.tool_usage_count = self._load_tool_stats()  # Track tool usage (persistent)
         self.tool_last_used = self._load_tool_timestamps() # Track last usage time
+        self.state_store.register("boredom_score", lambda: self.boredom_score)
+        self.state_store.register("admin_dms", lambda: self.admin_dms)
+        self.state_store.register("tool_stats", lambda: self.tool_usage_count)
+        self.state_store.register("tool_timestamps", lambda: self.tool_last_used)
+        self.activity_index = ActivityIndex(state.get("activity_index"))  # Researched Discord activities (refresh TTL)
+        self.activity_index.on_change = lambda: self.state_store.mark_dirty("activity_index")
+        self.state_store.register("activity_index", self.activity_index.to_dict)
         self.successful_learnings = 0  # Track successful learnings
         self.start_time = time.time()  # Track uptime
-        self.learning_queue = []  # Queue for forced learning
+        from .learning_jobs import LearningJobStore
+        with self.startup.phase('learning_jobs'):
+            self.learning_jobs = LearningJobStore()  # Persistent learning jobs (!learn), resumed after restart
+            self.learning_jobs.recover_interrupted()
         self.is_learning_mode = False # Flag for learning mode
         self.is_processing = False # Flag for active LLM processing
         self.maintenance_mode = False # Flag for maintenance/debug mode
@@ -76,8 +95,21 @@ class AutonomousAgent:
         import config_settings
         self.BOREDOM_INTERVAL = getattr(config_settings, 'BOREDOM_INTERVAL', 300)  # Default 300s (5min) if not in config
         
+        # Message intake: per-channel reply workers with bounded LLM concurrency
+        self.channel_queues = {}  # channel_id -> asyncio.Queue of DMs/mentions
+        self.channel_workers = {}  # channel_id -> worker task
+        self._reply_semaphore = asyncio.Semaphore(getattr(config_settings, 'MESSAGE_MAX_CONCURRENT_REPLIES', 2))
+        self._replies_in_progress = 0  # Replies waiting for the semaphore, generating or sending
+        self.intake_latency = RollingStats()  # Discord receive -> dispatch (ms)
+        
+        # Action queue (commands, autonomous actions, learning, activity research) - dispatched by action_loop
+        from .action_queue import ActionQueue
+        self.actions = ActionQueue(gate=self._action_allowed)
+        from .scheduler import BackgroundScheduler
+        self.scheduler = BackgroundScheduler(self)  # When autonomous work may start (boredom_loop)
+        self._tool_semaphores = {}  # tool name -> asyncio.Semaphore (multi-tool plans)
+        
         # Subsystems
-        from .memory import VectorStore
         from .llm import LLMClient
         from .discord_client import DiscordClient
         from .hardware import HardwareMonitor, LedIndicator
@@ -88,10 +120,16 @@ class AutonomousAgent:
                             TranslateTool, WikipediaTool, DiscordActivityTool)
         from .error_tracker import get_error_tracker
         from .web_interface import WebServer
+        from .working_memory import WorkingMemory
+        from .system_metrics import get_metrics_sampler
+        from .loop_monitor import LoopLagMonitor
+        from .http_client import get_http_client
         
         
-        self.memory = VectorStore()
-        self.memory = VectorStore()
+        self.metrics = get_metrics_sampler()  # Background psutil sampler shared by all consumers
+        self.http = get_http_client()  # Shared aiohttp session (keep-alive, DNS cache) for tools and commands
+        self.lag_monitor = LoopLagMonitor()  # Event-loop lag + blocking-call stack capture (lag_loop)
+        self.memory = None  # Opened concurrently with Discord login and web server in bootstrap()
         # Initial stats early for LLM
         if daily_stats:
             self.daily_stats = daily_stats
@@ -102,14 +140,24 @@ class AutonomousAgent:
             stats_handler.setLevel(logging.ERROR)
             logging.getLogger().addHandler(stats_handler)
 
-        self.llm = LLMClient(daily_stats=self.daily_stats)
-        self.discord = DiscordClient(token=discord_token)
+        with self.startup.phase('llm_client'):
+            self.llm = LLMClient(daily_stats=self.daily_stats)
+        with self.startup.phase('discord_client'):
+            self.discord = DiscordClient(token=discord_token)
         self.hardware = HardwareMonitor()
         self.led = LedIndicator()
         self.resource_manager = ResourceManager(self)  # Add resource manager
+        self.llm.resource_manager = self.resource_manager  # Router reads the current tier
+        self.working_memory = WorkingMemory(self)  # Bounded rolling summary for decision / !ask prompts
         self.network_monitor = NetworkMonitor(self)  # Add network monitor
         self.error_tracker = get_error_tracker()  # Add error tracker
-        self.web_server = WebServer(self) # Add web interface
+        from .supervisor import get_supervisor
+        self.supervisor = get_supervisor()  # Named loops + ad-hoc tasks with restart/backoff and error capture
+        self.supervisor.configure(error_tracker=self.error_tracker,
+                                  should_restart=lambda: self.is_running,
+                                  on_restart=self._on_task_restart)
+        with self.startup.phase('web_app'):
+            self.web_server = WebServer(self) # Add web interface
         
         # self.daily_stats handled above before LLM init
         
@@ -118,26 +166,30 @@ class AutonomousAgent:
         if not os.path.exists(self.agent_workspace):
              os.makedirs(self.agent_workspace)
 
-        self.tools = ToolRegistry()
-        self.tools.register(FileTool(workspace_dir=self.agent_workspace))
-        self.tools.register(SystemTool())
-        self.tools.register(WebTool(agent=self))
-        self.tools.register(TimeTool())
-        self.tools.register(MathTool())
-        self.tools.register(WeatherTool())
-        self.tools.register(CodeTool())
-        self.tools.register(NoteTool(notes_file=os.path.join(self.agent_workspace, "notes.json")))
-        # git_tool removed - dependency issues and not needed
-        self.tools.register(DatabaseTool(db_path=os.path.join(self.agent_workspace, "agent.db")))
-        self.tools.register(DiscordActivityTool(self))
-        self.tools.register(RSSTool())
-        self.tools.register(TranslateTool())
-        self.tools.register(WikipediaTool())
+        with self.startup.phase('tools'):
+            self.tools = ToolRegistry()
+            self.tools.register(FileTool(workspace_dir=self.agent_workspace))
+            self.tools.register(SystemTool())
+            self.tools.register(WebTool(agent=self))
+            self.tools.register(TimeTool())
+            self.tools.register(MathTool())
+            self.tools.register(WeatherTool())
+            self.tools.register(CodeTool())
+            self.tools.register(NoteTool(notes_file=os.path.join(self.agent_workspace, "notes.json")))
+            # git_tool removed - dependency issues and not needed
+            self.tools.register(DatabaseTool(db_path=os.path.join(self.agent_workspace, "agent.db")))
+            self.tools.register(DiscordActivityTool(self))
+            self.tools.register(RSSTool())
+            self.tools.register(TranslateTool())
+            self.tools.register(WikipediaTool())
         
         
         # Command handler
         from .commands import CommandHandler
-        self.command_handler = CommandHandler(self)
+        with self.startup.phase('command_handler'):
+            self.command_handler = CommandHandler(self)
+        
+        logger.info(f"Agent initialized in {time.time() - init_start:.2f}s (database, Discord, web server and model load run in bootstrap)")
     
     async def graceful_shutdown(self, timeout: int = 10, channel_id: int = None) -> bool:
         """Gracefully shutdown agent, closing all resources safely."""
@@ -162,23 +214,25 @@ class AutonomousAgent:
             # 1. Stop autonomous loops
             logger.info("Stopping autonomous behaviors...")
             self.is_running = False
+            self.actions.clear_pending()
             await asyncio.sleep(0.5)
             
-            # 2. Save agent state
-            logger.info("Saving agent state...")
+            # 1.5 Cancel supervised loops and ad-hoc tasks (live logs/monitor, SSH tunnel start).
+            # The Discord client stays up for the force-shutdown prompt and is closed in step 7.
             try:
-                self._save_agent_state()
+                await asyncio.wait_for(self.supervisor.cancel_all(exclude=('discord_client',)), timeout=5)
             except Exception as e:
-                logger.error(f"Failed to save agent state: {e}")
-                failed_services.append("Agent State Save")
+                logger.error(f"Failed to cancel background tasks: {e}")
+                failed_services.append("Background Tasks")
             
-            # 3. Save tool stats
-            logger.info("Saving tool statistics...")
+            # 2. Flush agent state and tool stats (pending debounced writes included)
+            logger.info("Saving agent state...")
             try:
-                self._save_tool_stats()
-                self._save_tool_timestamps()
+                if not await self.state_store.flush(force=True):
+                    failed_services.append("Agent State Save")
             except Exception as e:
-                logger.error(f"Failed to save tool stats: {e}")
+                logger.error(f"Failed to save agent state: {e}")
+                failed_services.append("Agent State Save")
             
             # 3.5 Save Daily Stats
             logger.info("Saving daily stats...")
@@ -188,6 +242,27 @@ class AutonomousAgent:
             except Exception as e:
                 logger.error(f"Failed to save daily stats: {e}")
             
+            # 3.6 Detach from the LLM inference server (it keeps the model loaded for the next start) and stop batched decoding
+            try:
+                if self.llm.server_client:
+                    await self.llm.server_client.close()
+                await asyncio.get_running_loop().run_in_executor(None, self.llm.close_batch_engine)
+            except Exception as e:
+                logger.error(f"Failed to close LLM server connection: {e}")
+            
+            # 3.65 Close the shared HTTP session (pooled keep-alive connections)
+            try:
+                await self.http.close()
+            except Exception as e:
+                logger.error(f"Failed to close HTTP session: {e}")
+            
+            # 3.7 Stop the system metrics sampler and the loop lag watchdog threads
+            try:
+                self.metrics.stop()
+                self.lag_monitor.stop()
+            except Exception as e:
+                logger.error(f"Failed to stop metrics sampler: {e}")
+            
             # 4. Commit and close database
             logger.info("Closing database...")
             try:
@@ -195,6 +270,7 @@ class AutonomousAgent:
                     self.memory.conn.commit()
                     self.memory.conn.close()
                     logger.info("Database closed successfully")
+                self.learning_jobs.close()
             except Exception as e:
                 logger.error(f"Failed to close database: {e}")
                 failed_services.append("Database Close")
@@ -397,14 +473,8 @@ class AutonomousAgent:
         # Cleanup old test files
         self._cleanup_old_tests()
         
-        # Start discord
-        await self.discord.start()
-        
-        # Start web server
-        try:
-            self.web_server.start()
-        except Exception as e:
-            logger.error(f"Failed to start web server: {e}")
+        # Database, Discord login and web server come up concurrently (model keeps loading in background)
+        await self.bootstrap()
         
         # Start command handler worker
         self.command_handler.start()
@@ -414,16 +484,7 @@ class AutonomousAgent:
         await self.discord.update_activity(f"Init on {hostname}...")
         
         # Start SSH tunnel automatically (independent of Discord)
-        asyncio.create_task(self.command_handler.start_ssh_tunnel())
-        
-        # Wait for Discord to be ready (max 30s)
-        logger.info("Waiting for Discord connection...")
-        wait_start = time.time()
-        while not self.discord.is_ready:
-            if time.time() - wait_start > 30:
-                logger.warning("Discord connection timed out (30s). Proceeding offline...")
-                break
-            await asyncio.sleep(0.5)
+        self.supervisor.spawn('ssh_tunnel', self.command_handler.start_ssh_tunnel())
         
         # Check for restart flag and notify
         import json
@@ -523,20 +584,84 @@ class AutonomousAgent:
         
         # SSH tunnel already started above
         
+        # Resume learning jobs left over from the previous run
+        if await asyncio.to_thread(self.learning_jobs.has_work):
+            logger.info("Unfinished learning jobs found. Resuming learning session.")
+            self.submit_learning()
+        
+        self.startup.mark_ready()
+        
         try:
-            self.loop_tasks = [
-                asyncio.create_task(self.boredom_loop()),
-                asyncio.create_task(self.observation_loop()),
-                asyncio.create_task(self.action_loop()),
-                asyncio.create_task(self.backup_loop())
-            ]
+            # Message intake is event-driven; periodic checks run as their own scheduled tasks
+            loops = {
+                'boredom_loop': self.boredom_loop,
+                'observation_loop': self.observation_loop,
+                'action_loop': self.action_loop,
+                'backup_loop': self.backup_loop,
+                'resource_loop': self.resource_loop,
+                'subsystem_loop': self.subsystem_loop,
+                'report_loop': self.report_loop,
+                'network_loop': self.network_loop,
+                'state_loop': self.state_store.flush_loop,
+                'lag_loop': self.lag_monitor.run
+            }
+            self.loop_names = list(loops)
+            self.loop_functions = list(loops.values())
+            # Supervised: a crashed loop is restarted with backoff and its exception recorded
+            self.loop_tasks = [self.supervisor.supervise(name, loop) for name, loop in loops.items()]
             
-            await asyncio.gather(*self.loop_tasks)
+            # Loops cancelled by graceful_shutdown must not propagate CancelledError out of start()
+            await asyncio.gather(*self.loop_tasks, return_exceptions=True)
         except Exception as e:
             logger.critical(f"Agent crashed: {e}")
             await self.report_error(e)
             raise
 
+    async def bootstrap(self):
+        """Starts independent subsystems concurrently, each recorded as a startup timeline phase.
+
+        Discord login runs in parallel with the database open, which is followed by the web
+        server start (dashboard handlers read agent.memory); start() continues once both are
+        done. The local model load starts here too but is not waited for - it is recorded as
+        a background phase when it finishes.
+        """
+        self.llm.start_loading()
+        self.supervisor.spawn('startup', self.startup.run('model_load', self.llm.wait_until_ready()))
+        
+        await asyncio.gather(
+            self._open_storage_and_web(),
+            self.startup.run('discord_login', self._start_discord())
+        )
+        
+        # Activities researched before the index existed count as known
+        self.activity_index.import_memories(self.memory.get_memories_by_type('activity_knowledge'))
+
+    async def _open_storage_and_web(self):
+        """Opens the memory database, then starts the web server (never with self.memory still None)."""
+        await self.startup.run('database', self._open_memory())
+        if self.memory is None:
+            # The agent cannot run without its memory - retry once and let a failure abort the start
+            from .memory import VectorStore
+            self.memory = VectorStore()
+        
+        loop = asyncio.get_running_loop()
+        await self.startup.run('web_server', loop.run_in_executor(None, self.web_server.start))
+
+    async def _open_memory(self):
+        """Opens the memory database (integrity check included) off the event loop."""
+        from .memory import VectorStore
+        self.memory = await asyncio.get_running_loop().run_in_executor(None, VectorStore)
+
+    async def _start_discord(self) -> bool:
+        """Logs in to Discord and waits until it is ready. False if it timed out (agent runs offline)."""
+        await self.discord.start()
+        timeout = getattr(config_settings, 'DISCORD_READY_TIMEOUT', 30)
+        logger.info("Waiting for Discord connection...")
+        if await self.discord.wait_until_ready(timeout):
+            return True
+        logger.warning(f"Discord connection timed out ({timeout}s). Proceeding offline...")
+        return False
+
     def _cleanup_old_tests(self):
         """Delete files in tests/ directory older than 2 days."""
         try:
@@ -708,14 +833,15 @@ class AutonomousAgent:
              logger.error(f"Failed to save daily stats: {e}")
 
     async def boredom_loop(self):
-        """Simulates the passage of time and intrinsic decay (boredom)."""
+        """Accrues boredom and starts autonomous work when the scheduler sees headroom."""
         logger.debug("Boredom loop started.")
+        last_tick = time.time()
         while self.is_running:
+            await asyncio.sleep(self.scheduler.tick_interval)
+            now = time.time()
+            elapsed, last_tick = now - last_tick, now
             if self.maintenance_mode:
-                await asyncio.sleep(1)
                 continue
-                
-            await asyncio.sleep(self.BOREDOM_INTERVAL)
             
             # Update status periodically but reduce noise
             # Only update if boredom changed significantly (>5%) or 15 mins passed
@@ -731,34 +857,67 @@ class AutonomousAgent:
                 self._last_boredom_log_score = self.boredom_score
                 self._last_boredom_log_time = time.time()
             
-            # Check hardware health
+            # Hard safety limits (overheating / OOM) - no boredom build-up either
             if not self.hardware.is_safe_to_run():
                 logger.warning("System unsafe. Pausing boredom loop.")
-                await asyncio.sleep(30) # Cool down
                 continue
 
-            # Increase boredom
-            self.boredom_score = min(1.0, self.boredom_score + self.BOREDOM_DECAY_RATE)
+            # Increase boredom (BOREDOM_DECAY_RATE per BOREDOM_INTERVAL, independent of the tick)
+            self.boredom_score = min(1.0, self.boredom_score + self.BOREDOM_DECAY_RATE * elapsed / self.BOREDOM_INTERVAL)
             self._save_agent_state()
             logger.debug(f"Boredom score: {self.boredom_score:.2f} | {self.hardware.get_status()}")
             
-            if self.boredom_score > self.BOREDOM_THRESHOLD_HIGH:
-                logger.debug("Boredom threshold exceeded. Triggering autonomous action.")
-                
-                # Record Boredom Action
-                if hasattr(self, 'daily_stats'):
-                    self.daily_stats.increment_boredom_action()
-                
-                self.led.set_state("BUSY")
-                try:
-                    await self.trigger_autonomous_action()
-                except Exception as e:
-                    logger.error(f"Autonomous action failed: {e}")
-                    self.led.set_state("ERROR")
-                    await asyncio.sleep(2)
-                finally:
-                    if not self.is_learning_mode:
-                        self.led.set_state("IDLE")
+            if await asyncio.to_thread(self.learning_jobs.has_work):
+                self.submit_learning()
+            elif not self.actions.is_active('autonomous') and self.scheduler.evaluate(self.boredom_score):
+                logger.debug("Scheduler admitted background work. Queuing autonomous action.")
+                self.submit_autonomous_action()
+
+    async def _on_task_restart(self, name: str, error: Optional[BaseException]):
+        """Supervisor callback: tells the admin that a loop crashed and is being restarted."""
+        if name not in getattr(self, 'loop_names', []):
+            return
+        reason = f"{type(error).__name__}: {error}" if error else "exited unexpectedly"
+        await self.send_admin_dm(
+            f"⚠️ **Loop Auto-Restart**\n{name} crashed ({reason}) and is being restarted.",
+            category="system"
+        )
+
+    def submit_autonomous_action(self) -> asyncio.Future:
+        """Queues one autonomous (boredom) action; an already queued/running one is reused."""
+        return self.actions.submit('autonomous', self._run_autonomous_action, key='autonomous',
+                                   label='autonomous action')
+
+    def submit_learning(self) -> asyncio.Future:
+        """Queues processing of the persisted learning jobs (one runner at a time)."""
+        self.is_learning_mode = True
+        return self.actions.submit('learning', self.process_learning_queue, key='learning', label="learning jobs")
+
+    def _action_allowed(self, action) -> bool:
+        """Action queue gate: only commands run in maintenance mode; autonomous actions wait for learning."""
+        if action.kind == 'command':
+            return True
+        if action.kind == 'autonomous' and self.is_learning_mode:
+            return False
+        return not self.maintenance_mode
+
+    async def _run_autonomous_action(self):
+        """Runs trigger_autonomous_action with LED / daily stats bookkeeping (action queue entry)."""
+        # Record Boredom Action
+        if hasattr(self, 'daily_stats'):
+            self.daily_stats.increment_boredom_action()
+        
+        self.led.set_state("BUSY")
+        try:
+            async with self.scheduler.track():
+                await self.trigger_autonomous_action()
+        except Exception as e:
+            logger.error(f"Autonomous action failed: {e}")
+            self.led.set_state("ERROR")
+            await asyncio.sleep(2)
+        finally:
+            if not self.is_learning_mode:
+                self.led.set_state("IDLE")
 
 
     async def check_subsystems(self):
@@ -836,140 +995,208 @@ class AutonomousAgent:
         except Exception as e:
             logger.error(f"Error checking SSH tunnel health: {e}")
 
-        # 3. Loop Health Monitor
-        try:
-            if hasattr(self, 'command_handler'):
-                await self.command_handler._check_loop_health()
-        except Exception as e:
-            logger.error(f"Error in Loop Health Monitor: {e}")
 
 
     async def observation_loop(self):
-        """Polls sensors and queues inputs."""
+        """Consumes Discord messages as they arrive and dispatches them without waiting for replies."""
         logger.debug("Observation loop started.")
-        last_resource_check = 0
-        last_subsystem_check = 0
-        last_uptime_check = time.time()
-        
         while self.is_running:
             try:
-                # Check Discord Messages
-                messages = await self.discord.get_messages()
-                if messages:
-                    logger.debug(f"Processing {len(messages)} Discord messages.")
-                    self.reduce_boredom(0.1)
-                    
-                    for msg in messages:
-                        # Track message stats
-                        self.messages_processed += 1
-                        self.daily_stats.increment_message()
-                        self.last_message_time = time.time()
-                        self.last_message_content = msg['content']
-                        if msg.get('is_dm'):
-                            self.dm_count += 1
-                        else:
-                            self.channel_count += 1
-                        if msg.get('mentions_bot'):
-                            self.mention_count += 1
-                        
-                        # Check for commands first - process immediately
-                        if msg['content'].startswith('!'):
-                            # Create task for immediate processing (bypasses queue)
-                            asyncio.create_task(self.handle_command_immediate(msg))
-                        # If directly addressed or DM, reply immediately
-                        elif msg['is_dm'] or msg['mentions_bot']:
-                            logger.info(f"Direct interaction from {msg['author']}. Replying...")
-                            # Generate reply using LLM
-                            response = await self.llm.generate_response(
-                                prompt=f"User {msg['author']} says: {msg['content']}",
-                                system_prompt="You are a helpful AI assistant. Answer in Czech language (čeština) unless asked otherwise. Be concise and accurate."
-                            )
-                            await self.discord.send_message(msg['channel_id'], response)
-                
-                # Resource monitoring (every 10 seconds)
-                current_time = asyncio.get_event_loop().time()
-                if current_time - last_resource_check >= 10:
-                    usage = self.resource_manager.check_resources()
-                    tier = self.resource_manager.get_tier(usage)
-                    
-                    # Check for tier change
-                    if tier != self.resource_manager.current_tier:
-                        logger.info(f"Resource tier changed: {self.resource_manager.current_tier} -> {tier}")
-                        self.resource_manager.current_tier = tier
-                        await self.handle_resource_tier(tier, usage)
-                    
-                    last_resource_check = current_time
-                
-                # Subsystem Health Check (every 30 seconds)
-                if current_time - last_subsystem_check >= 30:
-                    await self.check_subsystems()
-                    last_subsystem_check = current_time
-                
-                # Daily Report Check (every 60 seconds)
-                if not hasattr(self, 'last_report_check'):
-                    self.last_report_check = 0
-                
-                if current_time - self.last_report_check >= 60:
-                    await self.check_daily_report()
-                    self.last_report_check = current_time
-                
-                # Network monitoring (every 60 seconds)
-                if self.network_monitor.last_check is None:
-                     self.network_monitor.last_check = 0
-                
-                if current_time - self.network_monitor.last_check >= self.network_monitor.check_interval:
-                    is_online = await self.network_monitor.check_connectivity()
-                    
-                    # Handle state transitions
-                    if not is_online and self.network_monitor.is_online:
-                        # Went offline
-                        await self.network_monitor.handle_disconnect()
-                        self.network_monitor.is_online = False
-                        
-                        # Record Disconnect
-                        if hasattr(self, 'daily_stats'):
-                            self.daily_stats.increment_internet_disconnect()
-                    elif is_online and not self.network_monitor.is_online:
-                        # Came back online
-                        await self.network_monitor.handle_reconnect()
-                        self.network_monitor.is_online = True
-                        
-                        # Restart SSH tunnel if needed
-                        asyncio.create_task(self.command_handler.start_ssh_tunnel())
-                    
-                    self.network_monitor.last_check = current_time
-            
+                msg = await self.discord.message_queue.get()
+                self._dispatch_message(msg)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in observation_loop: {e}")
-                # Wait a bit before retrying to avoid log spam if error persists
-                await asyncio.sleep(5)
-            
-            # Update uptime stats
-            uptime_now = time.time()
-            if hasattr(self, 'last_uptime_check'):
-                delta = uptime_now - self.last_uptime_check
-                if delta > 0 and hasattr(self, 'daily_stats'):
-                    self.daily_stats.add_uptime(delta)
-            self.last_uptime_check = uptime_now
 
-            await asyncio.sleep(1)
+    def _dispatch_message(self, msg: dict):
+        """Tracks a message and hands it off: commands run as tasks, DMs/mentions go to the channel worker."""
+        self.intake_latency.add((time.time() - msg.get('received_at', time.time())) * 1000)
+        self.reduce_boredom(0.1)
+        
+        # Track message stats
+        self.messages_processed += 1
+        self.daily_stats.increment_message()
+        self.last_message_time = time.time()
+        self.last_message_content = msg['content']
+        if msg.get('is_dm'):
+            self.dm_count += 1
+        else:
+            self.channel_count += 1
+        if msg.get('mentions_bot'):
+            self.mention_count += 1
+        
+        # Interactive requests hold back background work for a while (BackgroundScheduler)
+        if msg['content'].startswith('!') or msg['is_dm'] or msg['mentions_bot']:
+            self.scheduler.mark_interactive()
+        
+        # Check for commands first - process immediately
+        if msg['content'].startswith('!'):
+            if self._is_control_command(msg['content']):
+                # Control commands bypass the queue: they must work even when it is full or action_loop is down
+                self.supervisor.spawn('control_command', self.handle_command_immediate(msg))
+            else:
+                self.actions.submit('command', lambda: self.handle_command_immediate(msg),
+                                    label=msg['content'].split()[0][:30])
+        # If directly addressed or DM, reply via the channel's worker (keeps per-channel order)
+        elif msg['is_dm'] or msg['mentions_bot']:
+            channel_id = msg['channel_id']
+            queue = self.channel_queues.get(channel_id)
+            if queue is None:
+                queue = self.channel_queues[channel_id] = asyncio.Queue(
+                    maxsize=getattr(config_settings, 'MESSAGE_CHANNEL_QUEUE_MAX', 20))
+            try:
+                queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                logger.warning(f"Reply queue for channel {channel_id} full - dropping message from {msg['author']}")
+                return
+            worker = self.channel_workers.get(channel_id)
+            if worker is None or worker.done():
+                worker = self.supervisor.spawn('channel_worker', self._channel_worker(channel_id, queue))
+                if worker is None:
+                    logger.warning(f"No reply worker free for channel {channel_id} - dropping its queued messages")
+                    self.channel_workers.pop(channel_id, None)
+                    self.channel_queues.pop(channel_id, None)
+                    return
+                self.channel_workers[channel_id] = worker
+
+    @staticmethod
+    def _is_control_command(content: str) -> bool:
+        """True for commands that run directly instead of through the action queue (ACTION_QUEUE_DIRECT_COMMANDS)."""
+        command = " ".join(content.lower().split())
+        return any(command == c or command.startswith(c + " ")
+                   for c in getattr(config_settings, 'ACTION_QUEUE_DIRECT_COMMANDS', ["!restart", "!learn stop", "!debug"]))
+
+    async def _channel_worker(self, channel_id: int, queue: asyncio.Queue):
+        """Replies to one channel's DMs/mentions in order; exits after being idle."""
+        idle_timeout = getattr(config_settings, 'MESSAGE_WORKER_IDLE_TIMEOUT', 300)
+        try:
+            while self.is_running:
+                try:
+                    msg = await asyncio.wait_for(queue.get(), timeout=idle_timeout)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+                try:
+                    await self._reply_to_message(msg)
+                except Exception as e:
+                    logger.error(f"Reply failed in channel {channel_id}: {e}")
+        finally:
+            if self.channel_workers.get(channel_id) is asyncio.current_task():
+                del self.channel_workers[channel_id]
+                if queue.empty():
+                    self.channel_queues.pop(channel_id, None)
+
+    async def _reply_to_message(self, msg: dict):
+        """Generates and sends an LLM reply (bounded by MESSAGE_MAX_CONCURRENT_REPLIES across channels)."""
+        self._replies_in_progress += 1
+        try:
+            async with self._reply_semaphore:
+                logger.info(f"Direct interaction from {msg['author']}. Replying...")
+                response = await self.llm.generate_response(
+                    prompt=f"User {msg['author']} says: {msg['content']}",
+                    system_prompt="You are a helpful AI assistant. Answer in Czech language (čeština) unless asked otherwise. Be concise and accurate.",
+                    call_site="dm_reply"
+                )
+            if response:
+                await self.discord.send_message(msg['channel_id'], response)
+        finally:
+            self._replies_in_progress -= 1
+
+    def pending_replies(self) -> int:
+        """DM/mention replies in progress plus those still queued in channel workers (idle workers do not count)."""
+        return self._replies_in_progress + sum(queue.qsize() for queue in self.channel_queues.values())
+
+    async def _run_periodic(self, name: str, interval, check):
+        """Runs `check` every `interval` seconds (callable interval is re-read each round)."""
+        logger.debug(f"{name} started.")
+        while self.is_running:
+            try:
+                await check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in {name}: {e}")
+            await asyncio.sleep(interval() if callable(interval) else interval)
+
+    async def resource_loop(self):
+        """Resource monitoring and tier changes (every 10 seconds), plus uptime accounting."""
+        await self._run_periodic("resource_loop", 10, self._check_resource_tier)
+
+    async def subsystem_loop(self):
+        """Subsystem health check (every 30 seconds)."""
+        await self._run_periodic("subsystem_loop", 30, self.check_subsystems)
+
+    async def report_loop(self):
+        """Daily report check (every 60 seconds)."""
+        await self._run_periodic("report_loop", 60, self.check_daily_report)
+
+    async def network_loop(self):
+        """Connectivity monitoring (NetworkMonitor.check_interval)."""
+        await self._run_periodic("network_loop", lambda: self.network_monitor.check_interval, self._check_network)
+
+    async def _check_resource_tier(self):
+        usage = self.resource_manager.check_resources()
+        tier = self.resource_manager.get_tier(usage)
+        
+        # Check for tier change
+        if tier != self.resource_manager.current_tier:
+            logger.info(f"Resource tier changed: {self.resource_manager.current_tier} -> {tier}")
+            self.resource_manager.current_tier = tier
+            await self.handle_resource_tier(tier, usage)
+        
+        # Update uptime stats
+        uptime_now = time.time()
+        if hasattr(self, 'last_uptime_check'):
+            delta = uptime_now - self.last_uptime_check
+            if delta > 0 and hasattr(self, 'daily_stats'):
+                self.daily_stats.add_uptime(delta)
+        self.last_uptime_check = uptime_now
+
+    async def _check_network(self):
+        is_online = await self.network_monitor.check_connectivity()
+        
+        # Handle state transitions
+        if not is_online and self.network_monitor.is_online:
+            # Went offline
+            await self.network_monitor.handle_disconnect()
+            self.network_monitor.is_online = False
+            
+            # Record Disconnect
+            if hasattr(self, 'daily_stats'):
+                self.daily_stats.increment_internet_disconnect()
+        elif is_online and not self.network_monitor.is_online:
+            # Came back online
+            await self.network_monitor.handle_reconnect()
+            self.network_monitor.is_online = True
+            
+            # Restart SSH tunnel if needed
+            self.supervisor.spawn('ssh_tunnel', self.command_handler.start_ssh_tunnel())
+        
+        self.network_monitor.last_check = asyncio.get_event_loop().time()
+
+    def submit_activity_research(self, activity_data: dict):
+        """Records the sighting and queues research only if the activity is unknown or its knowledge is stale."""
+        name = activity_data.get('name')
+        if not name:
+            return None
+        if not self.activity_index.observe(name, activity_data.get('user_id'), activity_data.get('user_name')):
+            return None
+        # Queued duplicates share one action (key); a running one is claimed in _process_activity
+        return self.actions.submit('activity', lambda: self._process_activity(activity_data),
+                                   key=f"activity:{normalize_activity(name)}", label=f"activity: {name[:30]}")
 
     async def _process_activity(self, activity_data: dict):
         """Research unknown user activities and store in memory."""
         activity_name = activity_data.get('name')
-        user_id = activity_data.get('user_id')
         user_name = activity_data.get('user_name')
         
         if not activity_name:
             return
 
-        # Check if we already know about this activity
-        memories = self.memory.search_memory(f"What is {activity_name}?", limit=1)
-        
-        # If we have a high relevance memory, skip research but maybe update user association?
-        # For now, just skip if we know the activity to avoid spamming research
-        if memories and memories[0].get('metadata', {}).get('type') == 'activity_knowledge':
-            # TODO: Maybe add logic to track which users play what?
+        # Known and fresh (or already being researched) - nothing to do
+        if not self.activity_index.claim(activity_name):
             return
 
         logger.info(f"Detected new user activity: {activity_name} by {user_name}. Researching...")
@@ -982,10 +1209,12 @@ class AutonomousAgent:
                 query = f"What is {activity_name} video game?"
                 search_result = await web_tool._execute_with_logging(action='search', query=query)
                 
-                if "Error" not in search_result:
+                if "Error" in search_result:
+                    self.activity_index.fail(activity_name)
+                else:
                     # Enrich and store
                     logger.info(f"Found info for {activity_name}. Summarizing and storing...")
-                    await self.add_filtered_memory(
+                    memory_id = await self.add_filtered_memory(
                         content=f"{activity_name}: {search_result}",
                         metadata={
                             'type': 'activity_knowledge',
@@ -994,6 +1223,7 @@ class AutonomousAgent:
                             'original_user': user_name
                         }
                     )
+                    self.activity_index.complete(activity_name, memory_id)
 
                     # Record knowledge in daily stats
                     if hasattr(self, 'daily_stats'):
@@ -1003,8 +1233,15 @@ class AutonomousAgent:
                 self.tool_usage_count['web_tool'] = self.tool_usage_count.get('web_tool', 0) + 1
                 self._save_tool_stats()
             
+            except asyncio.CancelledError:
+                # Deadline or shutdown: drop the claim, otherwise the activity stays "in flight" forever
+                self.activity_index.release(activity_name)
+                raise
             except Exception as e:
                 logger.error(f"Failed to research activity {activity_name}: {e}")
+                self.activity_index.fail(activity_name)
+        else:
+            self.activity_index.fail(activity_name)
 
 
 
@@ -1012,6 +1249,7 @@ class AutonomousAgent:
     async def add_filtered_memory(self, content: str, metadata: dict = None):
         """
         Adds a memory after filtering it through the LLM to extract only essential information.
+        Returns the new memory id (None if the memory was rejected).
         """
         if not content:
             return
@@ -1024,7 +1262,7 @@ class AutonomousAgent:
                 f"Keep it concise. If the text is already concise, return it as is.\n\n"
                 f"Text: {content}"
             )
-            filtered_content = await self.llm.generate_response(prompt, system_prompt="You are a strict data filter. Output ONLY the filtered fact.")
+            filtered_content = await self.llm.generate_response(prompt, system_prompt="You are a strict data filter. Output ONLY the filtered fact.", prompt_lookup=True, task="filter", call_site="memory_filter")
             
             # Clean up potential LLM verbosity if it didn't follow instructions perfectly
             filtered_content = filtered_content.strip('"').strip("'").strip()
@@ -1046,7 +1284,7 @@ class AutonomousAgent:
             metadata['type'] = 'general_knowledge'
 
         logger.info(f"Storing filtered memory: {filtered_content} (Meta: {metadata})")
-        self.memory.add_memory(filtered_content, metadata)
+        return self.memory.add_memory(filtered_content, metadata)
                             
 
                 
@@ -1105,14 +1343,7 @@ class AutonomousAgent:
         
         while self.is_running:
             try:
-                # 1. Failsafe Loop Check (Run every 30 mins)
-                try:
-                    if hasattr(self, 'command_handler'):
-                        await self.command_handler._check_loop_health()
-                except:
-                    pass
-
-                # 2. Database Backup Logic
+                # Database Backup Logic (crashed loops are restarted by the task supervisor)
                 backup_dir = "backup"
                 backups = sorted(glob.glob(os.path.join(backup_dir, "agent_memory_*.db")))
                 
@@ -1142,109 +1373,162 @@ class AutonomousAgent:
             await asyncio.sleep(30 * 60)
     
     async def action_loop(self):
-        """Executes queued actions (placeholder)."""
+        """Dispatches queued actions by priority (see ActionQueue); non-command work waits in maintenance mode."""
         logger.info("Action loop started.")
-        while self.is_running:
-            if self.maintenance_mode:
-                await asyncio.sleep(1)
-                continue
-                
-            # Placeholder for action queue processing
-            await asyncio.sleep(1)
+        await self.actions.run(lambda: self.is_running)
 
     async def process_learning_queue(self):
-        """Processes the entire learning queue in a batch."""
-        if not self.learning_queue:
+        """Runs the persisted learning jobs until none are left.
+
+        Independent tool trials run concurrently while the CPU budget allows it;
+        under load (resource tier / CPU average) no new trial starts and the loop
+        backs off instead of polling.
+        """
+        # The job store is SQLite - every call goes to a worker thread, off the event loop
+        jobs = self.learning_jobs
+        if not await asyncio.to_thread(jobs.has_work):
+            self.is_learning_mode = False
             return
 
-        logger.info(f"Starting batch learning for {len(self.learning_queue)} tools...")
+        self.is_learning_mode = True
+        pending = len(await asyncio.to_thread(jobs.active_jobs))
+        logger.info(f"Starting batch learning for {pending} tools...")
         self.led.set_state("BUSY")
         
         # Notify start
-        await self.discord.update_activity(f"Learning {len(self.learning_queue)} tools...")
+        await self.discord.update_activity(f"Learning {pending} tools...")
         
-        while self.learning_queue:
-            tool_name = self.learning_queue[0] # Peek first
-            logger.info(f"LEARNING BATCH: Processing {tool_name}")
-            
-            try:
-                # 1. Context for learning
-                context = (f"I am in LEARNING MODE. My goal is to learn how to use the '{tool_name}' tool. "
-                          f"I MUST use the '{tool_name}' tool now to test its functionality and learn what it does. "
-                          f"I should try a simple, safe operation with it.")
-                
-                # 2. Retrieve relevant memories (RAG)
-                past_memories = self.memory.get_recent_memories(limit=3)
-                
-                # 3. Decide action
-                tool_desc = self.tools.get_descriptions()
-                response = await self.llm.decide_action(context, past_memories, tool_desc)
-                
-                success = False
-                if response:
-                    # 4. Execute
-                    tool_call = self.llm.parse_tool_call(response)
-                    if tool_call:
-                        target_tool_name = tool_call['tool']
-                        args = tool_call['args']
-                        
-                        tool = self.tools.get_tool(target_tool_name)
-                        if tool:
-                            result = await tool._execute_with_logging(**args)
-                            
-                            # Track usage
-                            self.tool_usage_count[target_tool_name] = self.tool_usage_count.get(target_tool_name, 0) + 1
-                            self._save_tool_stats()
-                            self.daily_stats.record_tool_usage(target_tool_name)
-                            
-                            # Store result
-                            self.memory.add_memory(
-                                content=f"Learning Session: Tool {target_tool_name} executed. Result: {result[:200]}...",
-                                metadata={"type": "learning", "tool": target_tool_name, "importance": "high"}
-                            )
-                            
-                            await self.report_learning(f"I successfully used the tool `{target_tool_name}` with arguments `{args}`.\nResult: {result[:200]}...")
-                            self.successful_learnings += 1
-                            self.tools.increment_usage(target_tool_name)
-                            success = True
-                
-                if success:
-                    # Remove from queue only on success? Or always?
-                    # If we fail, we might want to skip it to avoid infinite loop.
-                    if self.learning_queue and self.learning_queue[0] == tool_name:
-                         self.learning_queue.pop(0)
-                else:
-                    logger.warning(f"Failed to learn {tool_name}, skipping...")
-                    if self.learning_queue:
-                        self.learning_queue.pop(0)
-                
-                # Wait a bit between tools
-                await asyncio.sleep(5)
+        base_backoff = getattr(config_settings, 'LEARNING_BACKOFF_BASE', 5)
+        max_backoff = getattr(config_settings, 'LEARNING_BACKOFF_MAX', 120)
+        backoff = base_backoff
+        running = {}  # asyncio.Task -> job row
+        learned = failed = 0
+        try:
+            while running or await asyncio.to_thread(jobs.has_work):
+                slots = self._learning_slots()
+                if slots > len(running):
+                    for job in await asyncio.to_thread(jobs.claim, slots - len(running)):
+                        logger.info(f"LEARNING BATCH: Processing {job['tool']} (attempt {job['attempts']})")
+                        running[asyncio.create_task(self._run_learning_trial(job['tool']))] = job
                 
-                # Dynamic cooldown if load is high
-                while True:
-                    cpu = psutil.cpu_percent(interval=1)
-                    if cpu < 80.0:
-                        break
-                    logger.warning(f"Learning paused due to high load ({cpu}%), cooling down...")
-                    await self.discord.update_activity(f"Cooling down ({cpu}%)...")
-                    self.led.set_state("IDLE")
-                    await asyncio.sleep(10)
-                    self.led.set_state("BUSY")
-                            
-            except Exception as e:
-                logger.error(f"Error learning {tool_name}: {e}")
-                self.led.set_state("ERROR")
-                await asyncio.sleep(1)
-                self.led.set_state("BUSY")
-                if self.learning_queue:
-                    self.learning_queue.pop(0)
+                if not running:
+                    # Nothing may start now: wait for the load to drop or the next retry to become due
+                    if slots == 0:
+                        logger.warning(f"Learning paused due to high load, retrying in {backoff:.0f}s")
+                        await self.discord.update_activity("Cooling down...")
+                        self.led.set_state("IDLE")
+                        await asyncio.sleep(backoff)
+                        self.led.set_state("BUSY")
+                        backoff = min(backoff * 2, max_backoff)
+                    else:
+                        due_in = await asyncio.to_thread(jobs.next_due_in)
+                        await asyncio.sleep(min(due_in if due_in is not None else base_backoff, max_backoff))
+                    continue
+                backoff = base_backoff
                 
-        self.is_learning_mode = False
-        self.led.set_state("IDLE")
-        logger.info("Batch learning complete.")
+                # Re-check the budget periodically even if no trial finished
+                done, _ = await asyncio.wait(running, timeout=base_backoff, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = None
+                        error = str(e)
+                        logger.error(f"Error learning {job['tool']}: {e}")
+                        self.led.set_state("ERROR")
+                    else:
+                        error = f"No successful {job['tool']} call (none in the LLM response, another tool, or a tool error)"
+                    
+                    if result is not None:
+                        await asyncio.to_thread(jobs.complete, job['id'], result[:500])
+                        learned += 1
+                    else:
+                        retry_in = min(base_backoff * 2 ** job['attempts'], max_backoff)
+                        if await asyncio.to_thread(jobs.fail, job['id'], error, retry_in):
+                            logger.warning(f"Failed to learn {job['tool']}, retrying in {retry_in:.0f}s...")
+                        else:
+                            logger.warning(f"Failed to learn {job['tool']}, giving up after {job['attempts']} attempt(s)")
+                            failed += 1
+                        self.led.set_state("BUSY")
+        finally:
+            # Cancelled (!learn stop / shutdown): stop trials; jobs stay in the DB (cancelled or resumed on start)
+            for task in running:
+                task.cancel()
+            self.is_learning_mode = False
+            self.led.set_state("IDLE")
+        
+        logger.info(f"Batch learning complete ({learned} learned, {failed} failed).")
         await self.discord.update_activity("Learning complete.")
 
+    def _learning_slots(self) -> int:
+        """How many learning trials may run now (0 = back off), from the shared resource state."""
+        if self.resource_manager.current_tier >= getattr(config_settings, 'LEARNING_PAUSE_TIER', 1):
+            return 0
+        cpu = self.metrics.cpu_average(10)
+        budget = getattr(config_settings, 'LEARNING_CPU_BUDGET', 70.0)
+        if cpu >= budget:
+            return 0
+        max_parallel = getattr(config_settings, 'LEARNING_MAX_PARALLEL', 2)
+        # Full parallelism only with plenty of headroom
+        return max_parallel if cpu < budget / 2 else 1
+
+    async def _run_learning_trial(self, tool_name: str) -> Optional[str]:
+        """One learning trial: the LLM picks a safe call of `tool_name`, which is executed.
+
+        Returns the tool result, or None if the trial failed (no usable call of `tool_name`,
+        or the tool returned an error) so the job is retried with backoff.
+        """
+        # 1. Context for learning
+        context = (f"I am in LEARNING MODE. My goal is to learn how to use the '{tool_name}' tool. "
+                  f"I MUST use the '{tool_name}' tool now to test its functionality and learn what it does. "
+                  f"I should try a simple, safe operation with it.")
+        
+        # 2. Working memory (cached summary)
+        working_memory = self.working_memory.get_context()
+        
+        # 3. Decide action
+        tool_desc = self.tools.get_descriptions()
+        response = await self.llm.decide_action(context, tools_desc=tool_desc, tool_names=self.tools.get_names(), max_calls=1,
+                                                working_memory=working_memory)
+        if not response:
+            return None
+        
+        # 4. Execute
+        tool_call = self.llm.parse_tool_call(response)
+        if not tool_call:
+            return None
+        target_tool_name = tool_call['tool']
+        args = tool_call['args']
+        if target_tool_name != tool_name:
+            logger.warning(f"Learning {tool_name}: LLM called {target_tool_name} instead")
+            return None
+        
+        tool = self.tools.get_tool(target_tool_name)
+        if not tool:
+            return None
+        result = await tool._execute_with_logging(**args)
+        
+        # Track usage
+        self.tool_usage_count[target_tool_name] = self.tool_usage_count.get(target_tool_name, 0) + 1
+        self._save_tool_stats()
+        self.daily_stats.record_tool_usage(target_tool_name)
+        
+        if result.startswith("Error"):
+            logger.warning(f"Learning {tool_name}: tool returned an error: {result[:200]}")
+            return None
+        
+        # Store result
+        self.memory.add_memory(
+            content=f"Learning Session: Tool {target_tool_name} executed. Result: {result[:200]}...",
+            metadata={"type": "learning", "tool": target_tool_name, "importance": "high"}
+        )
+        
+        await self.report_learning(f"I successfully used the tool `{target_tool_name}` with arguments `{args}`.\nResult: {result[:200]}...")
+        self.successful_learnings += 1
+        self.tools.increment_usage(target_tool_name)
+        return result
+
 
     async def trigger_autonomous_action(self):
         """The 'Free Will' mechanism."""
@@ -1252,7 +1536,7 @@ class AutonomousAgent:
         # SAFETY FUSE: Check system load before running LLM
         # If CPU is too high (e.g. > 90%), skip LLM to prevent crash/OOM
         try:
-            cpu_usage = psutil.cpu_percent(interval=0.1)
+            cpu_usage = self.metrics.latest().cpu_percent
             if cpu_usage > 90.0:
                 logger.warning(f"SAFETY FUSE: CPU load too high ({cpu_usage}%), skipping LLM autonomous action.")
                 await self.discord.update_activity(f"Cooling down (CPU {cpu_usage:.0f}%)")
@@ -1277,49 +1561,23 @@ class AutonomousAgent:
         logger.debug("Agent is bored. Deciding what to do...")
         await self.discord.update_activity("Thinking...")
         
-        import random
-        
-        
-        # Handle Learning Mode
-        if self.is_learning_mode and self.learning_queue:
-            await self.process_learning_queue()
-            self.is_processing = False
-            return
-        
         # Force tool usage if too many actions without tools
-        
-        # Force tool usage if too many actions without tools
-        elif self.actions_without_tools >= 2:
+        if self.actions_without_tools >= 2:
             logger.info("Forcing tool usage after repeated non-tool actions")
             context = f"Boredom: {self.boredom_score:.2f}. I MUST use the web_tool to search for something new and learn."
             self.actions_without_tools = 0
         else:
-            # Load topics from JSON file
-            import config_settings
-            thoughts = []
+            # Topics come from the shared, mtime-cached store (defaults if the file is empty or missing)
+            thought = get_topic_store().sample(defaults=[
+                "I wonder what the latest AI news is.",
+                "I should search for Raspberry Pi projects.",
+                "I want to learn something new about Python programming.",
+                "Are there any interesting tech news today?",
+                "I should research machine learning topics.",
+                "I wonder what my friends are doing on Discord."
+            ])
             
-            try:
-                topics_file = config_settings.TOPICS_FILE
-                if os.path.exists(topics_file):
-                    with open(topics_file, 'r', encoding='utf-8') as f:
-                        thoughts = json.load(f)
-                    logger.debug(f"Loaded {len(thoughts)} topics from {topics_file}")
-            except Exception as e:
-                logger.error(f"Failed to load topics from JSON: {e}")
-            
-            # Fallback to default topics if JSON is empty or failed to load
-            if not thoughts:
-                thoughts = [
-                    "I wonder what the latest AI news is.",
-                    "I should search for Raspberry Pi projects.",
-                    "I want to learn something new about Python programming.",
-                    "Are there any interesting tech news today?",
-                    "I should research machine learning topics.",
-                    "I wonder what my friends are doing on Discord."
-                ]
-                logger.debug("Using default topics (JSON empty or missing)")
-            
-            context = f"Boredom: {self.boredom_score:.2f}. {random.choice(thoughts)}"
+            context = f"Boredom: {self.boredom_score:.2f}. {thought}"
         
         # Special handling for "checking friends" thought
         if "friends are doing" in context:
@@ -1329,7 +1587,7 @@ class AutonomousAgent:
                 activities = await self.discord.get_online_activities()
                 if activities:
                     for activity in activities:
-                        await self._process_activity(activity)
+                        self.submit_activity_research(activity)
                     self.reduce_boredom(0.5)
                     self.is_processing = False
                     return # Skip LLM action if we did this
@@ -1337,14 +1595,14 @@ class AutonomousAgent:
                     logger.info("No active users found.")
                     # Fall through to normal LLM action if no one is doing anything
         
-        # 1. Retrieve relevant memories (RAG)
-        past_memories = self.memory.get_recent_memories(limit=3)
-        if past_memories:
-            logger.debug(f"Retrieved {len(past_memories)} past memories for context.")
+        # 1. Working memory (cached summary; refreshed in the background when enough new memories arrived)
+        self.working_memory.maybe_refresh()
+        working_memory = self.working_memory.get_context()
 
         # 2. Decide action with Tools
         tool_desc = self.tools.get_descriptions()
-        response = await self.llm.decide_action(context, past_memories, tool_desc)
+        response = await self.llm.decide_action(context, tools_desc=tool_desc, tool_names=self.tools.get_names(),
+                                                working_memory=working_memory)
         
         # Check for LLM failure
         if response is None:
@@ -1352,7 +1610,11 @@ class AutonomousAgent:
             self.is_processing = False
             return
 
-        if response == "LLM not available.":
+        if response == "LLM not available." and self.llm.gemini_enabled and not self.llm.gemini_breaker.available:
+            # Gemini known to be down (circuit open) - don't wait for another timeout or DM again
+            logger.warning("LLM not available and Gemini circuit is open. Using default action.")
+            response = "TOOL: web_tool | ARGS: {'action': 'search', 'query': 'latest raspberry pi news'}"
+        elif response == "LLM not available.":
             logger.warning("LLM not available during autonomous action. Attempting Gemini fallback...")
             
             try:
@@ -1365,10 +1627,11 @@ class AutonomousAgent:
                     f"IMPORTANT: You must respond in the EXACT format:\n"
                     f"TOOL: <tool_name> | ARGS: <python_dict_args>\n"
                     f"Example: TOOL: web_tool | ARGS: {{'action': 'search', 'query': 'news'}}\n"
+                    f"You may list up to {getattr(config_settings, 'TOOL_PLAN_MAX_CALLS', 3)} independent tool calls, one per line.\n"
                     f"Or if no tool needed, just a text response."
                 )
                 
-                response = await self.llm.ask_gemini(gemini_prompt, model_type="fast")
+                response = await self.llm.ask_gemini(gemini_prompt, model_type="fast", call_site="decide_action")
                 
                 # Check if Gemini failed too
                 if "Gemini Error" in response or "Error" in response:
@@ -1394,81 +1657,11 @@ class AutonomousAgent:
         if len(self.decision_history) > 5:
             self.decision_history.pop(0)
         
-        # Check for tool call
-        tool_call = self.llm.parse_tool_call(response)
+        # Check for tool call(s) - one decision may plan several independent tools
+        tool_calls = self.llm.parse_tool_plan(response)
         
-        if tool_call:
-            tool_name = tool_call['tool']
-            args = tool_call['args']
-            logger.info(f"Agent wants to use tool: {tool_name} with args {args}")
-            
-            # Track for daily stats
-            if hasattr(self, 'daily_stats'):
-                self.daily_stats.record_tool_usage(tool_name)
-            
-            tool = self.tools.get_tool(tool_name)
-            if tool:
-                # Map tool to descriptive English activity
-                activity_map = {
-                    "file_tool": "Managing files",
-                    "system_tool": "Checking system",
-                    "web_tool": "Surfing the web",
-                    "time_tool": "Checking time",
-                    "math_tool": "Learning with numbers",
-                    "weather_tool": "Watching weather",
-                    "code_tool": "Learning to code",
-                    "note_tool": "Taking notes",
-                    "git_tool": "Managing version control",
-                    "database_tool": "Organizing data",
-                    "rss_tool": "Reading news feeds",
-                    "translate_tool": "Translating languages",
-                    "wikipedia_tool": "Learning from Wikipedia"
-                }
-                activity_desc = activity_map.get(tool_name, f"Using tool: {tool_name}")
-                await self.discord.update_activity(activity_desc)
-                
-                result = await tool._execute_with_logging(**args)
-                
-                # Track usage
-                self.tool_usage_count[tool_name] = self.tool_usage_count.get(tool_name, 0) + 1
-                self._save_tool_stats()
-                
-                self.actions_without_tools = 0  # Reset counter
-                self.last_tool_used = tool_name
-                self.last_tool_time = time.time()
-                logger.info(f"Tool output: {result}")
-                
-                # Store result in memory
-                self.memory.add_memory(
-                    content=f"Tool {tool_name} executed. Result: {result[:100]}...",
-                    metadata={"type": "tool_execution", "tool": tool_name}
-                )
-                
-                # Report learning
-                await self.report_learning(f"I successfully used the tool `{tool_name}` with arguments `{args}`.\nResult: {result[:200]}...")
-                
-                # Track usage in registry
-                self.tools.increment_usage(tool_name)
-                
-                # Track timestamp
-                self.tool_last_used[tool_name] = time.time()
-                self._save_tool_timestamps()
-                
-                # Track timestamp
-                self.tool_last_used[tool_name] = time.time()
-                self._save_tool_timestamps()
-                
-                self.successful_learnings += 1
-                
-                # Add to action history
-                self._add_to_history(f"Tool: {tool_name} {args}")
-
-                # Reduce boredom significantly for successful tool use
-
-                # Reduce boredom significantly for successful tool use
-                self.reduce_boredom(0.8)
-            else:
-                logger.error(f"Tool {tool_name} not found.")
+        if tool_calls:
+            await self._execute_tool_plan(tool_calls)
         else:
             # Normal action execution
             simplified = self._simplify_action(response)
@@ -1497,6 +1690,110 @@ class AutonomousAgent:
         
         self.is_processing = False
 
+    async def _execute_tool_plan(self, tool_calls: list):
+        """Runs the planned tool calls concurrently (per-tool limits) and stores one merged memory/report."""
+        # Map tool to descriptive English activity
+        activity_map = {
+            "file_tool": "Managing files",
+            "system_tool": "Checking system",
+            "web_tool": "Surfing the web",
+            "time_tool": "Checking time",
+            "math_tool": "Learning with numbers",
+            "weather_tool": "Watching weather",
+            "code_tool": "Learning to code",
+            "note_tool": "Taking notes",
+            "git_tool": "Managing version control",
+            "database_tool": "Organizing data",
+            "rss_tool": "Reading news feeds",
+            "translate_tool": "Translating languages",
+            "wikipedia_tool": "Learning from Wikipedia"
+        }
+        
+        planned = []
+        for call in tool_calls:
+            tool = self.tools.get_tool(call['tool'])
+            if tool:
+                planned.append((call['tool'], call['args'], tool))
+            else:
+                logger.error(f"Tool {call['tool']} not found.")
+        if not planned:
+            return
+        
+        logger.info(f"Agent wants to use {len(planned)} tool(s): " + "; ".join(f"{name} {args}" for name, args, _ in planned))
+        if len(planned) == 1:
+            await self.discord.update_activity(activity_map.get(planned[0][0], f"Using tool: {planned[0][0]}"))
+        else:
+            await self.discord.update_activity(f"Using {len(planned)} tools at once")
+        
+        async def run_tool(name: str, args: dict, tool) -> str:
+            async with self._tool_semaphore(name):
+                try:
+                    return await tool._execute_with_logging(**args)
+                except Exception as e:
+                    logger.error(f"Tool {name} failed in plan: {e}")
+                    return f"Error: {e}"
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_tool(name, args, tool) for name, args, tool in planned))
+        logger.info(f"Tool plan of {len(planned)} call(s) finished in {(time.perf_counter() - start) * 1000:.0f}ms")
+        
+        now = time.time()
+        succeeded = []
+        for (name, args, _), result in zip(planned, results):
+            # Tools report failures as "Error: ..." strings (run_tool does the same for exceptions)
+            if result.startswith("Error"):
+                logger.warning(f"Tool {name} failed: {result}")
+                self._add_to_history(f"Tool failed: {name} {args}")
+            else:
+                logger.info(f"Tool output ({name}): {result}")
+                self._add_to_history(f"Tool: {name} {args}")
+                self.successful_learnings += 1
+                succeeded.append((name, args, result))
+            
+            # Track for daily stats
+            if hasattr(self, 'daily_stats'):
+                self.daily_stats.record_tool_usage(name)
+            
+            # Track usage
+            self.tool_usage_count[name] = self.tool_usage_count.get(name, 0) + 1
+            self.tools.increment_usage(name)
+            self.tool_last_used[name] = now
+        self._save_tool_stats()
+        self._save_tool_timestamps()
+        
+        self.actions_without_tools = 0  # Reset counter
+        self.last_tool_used = planned[-1][0]
+        self.last_tool_time = now
+        
+        if not succeeded:
+            logger.warning(f"Tool plan: all {len(planned)} call(s) failed - nothing stored")
+            return
+        
+        # Store one merged memory for the successful calls of the plan
+        self.memory.add_memory(
+            content="; ".join(f"Tool {name} executed. Result: {result[:100]}..." for name, _, result in succeeded),
+            metadata={"type": "tool_execution", "tool": ",".join(name for name, _, _ in succeeded)}
+        )
+        
+        # Report learning (one message per plan)
+        report = "\n\n".join(
+            f"I successfully used the tool `{name}` with arguments `{args}`.\nResult: {result[:200]}..."
+            for name, args, result in succeeded
+        )
+        await self.report_learning(report)
+
+        # Reduce boredom significantly for successful tool use
+        self.reduce_boredom(0.8)
+
+    def _tool_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        """Per-tool concurrency limit for multi-tool plans (TOOL_PLAN_TOOL_LIMITS)."""
+        semaphore = self._tool_semaphores.get(tool_name)
+        if semaphore is None:
+            limits = getattr(config_settings, 'TOOL_PLAN_TOOL_LIMITS', {})
+            limit = limits.get(tool_name, getattr(config_settings, 'TOOL_PLAN_DEFAULT_TOOL_LIMIT', 1))
+            semaphore = self._tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+        return semaphore
+
     async def report_learning(self, message: str):
         """Reports new skills/learnings to the specific Discord channel."""
         LEARNING_CHANNEL_ID = 1442261590404497580
@@ -1586,7 +1883,8 @@ class AutonomousAgent:
                 'decay_rate': f"{self.BOREDOM_DECAY_RATE * 100:.1f}% per {self.BOREDOM_INTERVAL}s",
                 'time_since_activity': f"{time_since_activity:.0f}s",
                 'actions_without_tools': self.actions_without_tools,
-                'next_trigger_in': f"{next_trigger:.0f}s" if self.boredom_score < self.BOREDOM_THRESHOLD_HIGH else "NOW"
+                'next_trigger_in': f"{next_trigger:.0f}s" if self.boredom_score < self.BOREDOM_THRESHOLD_HIGH else "NOW",
+                'scheduler': self.scheduler.get_stats()
             }
         
         # 2. Tool Usage
@@ -1606,7 +1904,11 @@ class AutonomousAgent:
                 'last_tool': self.last_tool_used or "None",
                 'last_tool_time': f"{time.time() - self.last_tool_time:.0f}s ago" if self.last_tool_time else "Never",
                 'learning_mode': "Active" if self.is_learning_mode else "Inactive",
-                'learning_queue': len(self.learning_queue)
+                'learning_jobs': ", ".join(f"{k}={v}" for k, v in sorted(self.learning_jobs.counts().items())) or "-",
+                'state_store': self.state_store.get_stats(),
+                'topic_store': get_topic_store().get_stats(),
+                'activity_index': self.activity_index.get_stats(),
+                'search_cache': self.tools.get_tool('web_tool').search_cache.get_stats()
             }
         
         # 3. Discord Message Handling
@@ -1618,7 +1920,10 @@ class AutonomousAgent:
                 'mention_count': self.mention_count,
                 'last_message': self.last_message_content[:50] + "..." if self.last_message_content and len(self.last_message_content) > 50 else self.last_message_content or "None",
                 'last_message_time': f"{time.time() - self.last_message_time:.0f}s ago" if self.last_message_time else "Never",
-                'queue_size': self.discord.message_queue.qsize() if hasattr(self.discord, 'message_queue') else 0
+                'queue_size': self.discord.message_queue.qsize() if hasattr(self.discord, 'message_queue') else 0,
+                'channel_workers': len(self.channel_workers),
+                'pending_replies': sum(q.qsize() for q in self.channel_queues.values()),
+                'intake_latency_p95': f"{self.intake_latency.percentile(95):.1f}ms" if self.intake_latency.samples else "N/A"
             }
         
         # 4. Resource Management
@@ -1632,7 +1937,9 @@ class AutonomousAgent:
                 'memory_usage': f"{usage.ram_percent:.1f}%",
                 'disk_usage': f"{usage.disk_percent:.1f}%",
                 'llm_context': getattr(self.llm, 'current_n_ctx', 'Unknown'),
-                'llm_max_tokens': getattr(self.llm, 'current_max_tokens', 'Unknown')
+                'llm_max_tokens': getattr(self.llm, 'current_max_tokens', 'Unknown'),
+                'cpu_avg_60s': f"{self.metrics.cpu_average(60):.1f}%",
+                'metrics_sampler': self.metrics.get_stats()
             }
             
             # Add RPI-specific health checks if on Linux
@@ -1659,11 +1966,21 @@ class AutonomousAgent:
                 'last_prompt': self.last_decision_prompt[:100] + "..." if self.last_decision_prompt and len(self.last_decision_prompt) > 100 else self.last_decision_prompt or "None",
                 'last_response': self.last_decision_response[:100] + "..." if self.last_decision_response and len(self.last_decision_response) > 100 else self.last_decision_response or "None",
                 'decision_history_size': len(self.decision_history),
-                'model_path': getattr(self.llm, 'model_filename', 'Unknown') if hasattr(self, 'llm') else 'Not loaded'
+                'model_path': getattr(self.llm, 'model_filename', 'Unknown') if hasattr(self, 'llm') else 'Not loaded',
+                'model_state': "Loading" if self.llm.is_loading else ("Loaded" if self.llm.llm else "Not loaded"),
+                'model_load_time': f"{self.llm.model_load_duration:.1f}s" if self.llm.model_load_duration is not None else "N/A",
+                'model_pool': self._format_model_pool(),
+                'working_memory': self.working_memory.get_stats()
             }
         
         return debug_info
     
+    def _format_model_pool(self) -> str:
+        """One-line summary of resident pool models and the RAM budget."""
+        stats = self.llm.model_pool.get_stats()
+        resident = ", ".join(stats['resident']) or "none"
+        return f"{resident} ({stats['used_mb']}/{stats['budget_mb']} MB, loads {stats['loads']}, evictions {stats['evictions']})"
+
     def _check_rpi_health(self) -> dict:
         """Check Raspberry Pi hardware health using vcgencmd (Linux only)."""
         if not self.is_linux:
@@ -1746,29 +2063,12 @@ class AutonomousAgent:
         return health_info
 
     def _load_agent_state(self) -> dict:
-        """Load agent state (boredom, last admin DM) from file."""
-        state_file = "workspace/agent_state.json"
-        try:
-            if os.path.exists(state_file):
-                with open(state_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load agent state: {e}")
-        return {}
+        """Load agent state (boredom, admin DMs, tool stats) from the state store."""
+        return self.state_store.load()
 
     def _save_agent_state(self):
-        """Save agent state to file."""
-        state_file = "workspace/agent_state.json"
-        try:
-            os.makedirs("workspace", exist_ok=True)
-            state = {
-                "boredom_score": self.boredom_score,
-                "admin_dms": self.admin_dms
-            }
-            with open(state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save agent state: {e}")
+        """Mark agent state dirty; the state store writes it on the next coalesced flush."""
+        self.state_store.mark_dirty("agent_state")
 
     async def send_admin_dm(self, message: str, category: str = "default", embed: discord.Embed = None):
         """
@@ -1857,52 +2157,33 @@ class AutonomousAgent:
         except Exception as e:
             logger.error(f"Failed to send admin DM: {e}")
 
-    def _load_tool_stats(self) -> dict:
-        """Load tool usage stats from file."""
-        import json
-        import os
-        stats_file = "workspace/tool_stats.json"
-        if os.path.exists(stats_file):
+    def _load_legacy_state_file(self, section: str, legacy_file: str) -> dict:
+        """Section of the state store, migrating the pre-store JSON file on first start."""
+        if section in self.state_store.data:
+            return dict(self.state_store.data[section])
+        if os.path.exists(legacy_file):
             try:
-                with open(stats_file, 'r') as f:
-                    return json.load(f)
+                with open(legacy_file, 'r') as f:
+                    data = json.load(f)
+                logger.info(f"Migrated {legacy_file} into {self.state_store.path}")
+                self.state_store.mark_dirty(section)
+                return data
             except Exception as e:
-                logger.error(f"Failed to load tool stats: {e}")
+                logger.error(f"Failed to load {legacy_file}: {e}")
         return {}
 
+    def _load_tool_stats(self) -> dict:
+        """Load tool usage stats from the state store."""
+        return self._load_legacy_state_file("tool_stats", "workspace/tool_stats.json")
+
     def _save_tool_stats(self):
-        """Save tool usage stats to file."""
-        import json
-        import os
-        stats_file = "workspace/tool_stats.json"
-        try:
-            os.makedirs("workspace", exist_ok=True)
-            with open(stats_file, 'w') as f:
-                json.dump(self.tool_usage_count, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save tool stats: {e}")
+        """Mark tool usage stats dirty (coalesced write, see StateStore)."""
+        self.state_store.mark_dirty("tool_stats")
 
     def _load_tool_timestamps(self) -> dict:
-        """Load tool timestamp stats from file."""
-        import json
-        import os
-        stats_file = "workspace/tool_timestamps.json"
-        if os.path.exists(stats_file):
-            try:
-                with open(stats_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load tool timestamps: {e}")
-        return {}
+        """Load tool timestamp stats from the state store."""
+        return self._load_legacy_state_file("tool_timestamps", "workspace/tool_timestamps.json")
 
     def _save_tool_timestamps(self):
-        """Save tool timestamp stats to file."""
-        import json
-        import os
-        stats_file = "workspace/tool_timestamps.json"
-        try:
-            os.makedirs("workspace", exist_ok=True)
-            with open(stats_file, 'w') as f:
-                json.dump(self.tool_last_used, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save tool timestamps: {e}")
+        """Mark tool timestamps dirty (coalesced write, see StateStore)."""
+        self.state_store.mark_dirty("tool_timestamps")
@@ -11,6 +11,7 @@ except ImportError:
 
 # Import sanitizer for IP masking
 from .sanitizer import sanitize_output
+from .supervisor import get_supervisor
 import config_settings
 
 logger = logging.getLogger(__name__)
@@ -35,6 +36,7 @@ class DiscordClient:
         self.token = token or os.getenv("DISCORD_TOKEN")
         self.client = None
         self.is_ready = False
+        self._ready_event = asyncio.Event()  # Set on the first on_ready (startup waits for it)
         
         if discord:
             intents = discord.Intents.default()
@@ -54,6 +56,7 @@ class DiscordClient:
         if not self.token:
             logger.warning("No Discord token provided. Running in mock mode.")
             self.is_ready = True
+            self._ready_event.set()
             return
 
         if not self.client:
@@ -64,6 +67,7 @@ class DiscordClient:
         async def on_ready():
             logger.info(f"Logged in as {self.client.user}")
             self.is_ready = True
+            self._ready_event.set()
 
         @self.client.event
         async def on_message(message):
@@ -79,7 +83,8 @@ class DiscordClient:
                 "channel_id": message.channel.id,
                 "id": message.id,  # ADDED: Message ID
                 "is_dm": isinstance(message.channel, discord.DMChannel),
-                "mentions_bot": self.client.user in message.mentions
+                "mentions_bot": self.client.user in message.mentions,
+                "received_at": time.time()  # Intake latency (agent dispatch - receive)
             })
             logger.info(f"Received message from {message.author.name}: {message.content}")
 
@@ -141,7 +146,17 @@ class DiscordClient:
                     logger.info("Discord client stopped. Restarting...")
                     await asyncio.sleep(5)
 
-        asyncio.create_task(run_client())
+        get_supervisor().supervise('discord_client', run_client)
+
+    async def wait_until_ready(self, timeout: float) -> bool:
+        """Waits for the first on_ready. Returns False on timeout (or if discord.py is missing)."""
+        if not self.client and not self.is_ready:
+            return False
+        try:
+            await asyncio.wait_for(self._ready_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
 
     def clear_message_history(self):
         """Clears the history of messages sent during the current command."""
@@ -1,10 +1,10 @@
 import logging
-import psutil
-import subprocess
 import sys
 import platform
 import os
 
+from .system_metrics import get_metrics_sampler
+
 logger = logging.getLogger(__name__)
 
 class HardwareMonitor:
@@ -26,26 +26,17 @@ class HardwareMonitor:
             pass
             
     def get_cpu_temp(self) -> float:
-        """Gets CPU temperature."""
-        if self.is_rpi:
-            try:
-                # Try vcgencmd first
-                output = subprocess.check_output(['vcgencmd', 'measure_temp']).decode('utf-8')
-                return float(output.replace('temp=', '').replace('\'C\n', ''))
-            except Exception:
-                # Fallback to sysfs
-                try:
-                    with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                        return float(f.read()) / 1000.0
-                except Exception:
-                    pass
+        """Gets CPU temperature (latest sample of the metrics sampler)."""
+        temp = get_metrics_sampler().latest().temperature
+        if temp is not None:
+            return temp
         
-        # Mock for Windows/Non-RPi
+        # Mock for Windows/hosts without a thermal sensor
         return 45.0
 
     def get_ram_usage(self) -> float:
         """Gets RAM usage percentage."""
-        return psutil.virtual_memory().percent
+        return get_metrics_sampler().latest().ram_percent
 
     def is_safe_to_run(self) -> bool:
         """Checks if system is within safe operating limits."""
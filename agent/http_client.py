@@ -0,0 +1,146 @@
+"""
+HTTP Client Module
+
+One agent-wide aiohttp ClientSession instead of a new session per request.
+WebTool read, WeatherTool, !ask attachment downloads and the ngrok API check
+used to open (and close) their own session every call, paying TCP, TLS and
+DNS setup again each time.
+
+The shared session keeps connections alive (HTTP_KEEPALIVE_TIMEOUT), limits
+connections in total and per host (HTTP_MAX_CONNECTIONS / HTTP_MAX_PER_HOST),
+caches DNS lookups for HTTP_DNS_TTL seconds and applies default timeouts
+(HTTP_TIMEOUT_*; a request can still pass its own). It is created lazily on
+the event loop, recreated if it was closed and closed in graceful_shutdown.
+
+Tools get it as `self.http` (injected by ToolRegistry.register); other code
+uses `agent.http` or get_http_client(). A TraceConfig counts new vs reused
+connections and DNS cache hits, shown in !debug network and on the dashboard.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+import aiohttp
+
+import config_settings
+from .telemetry import RollingStats
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Lazily created shared ClientSession with connection-reuse telemetry."""
+
+    def __init__(self):
+        self.max_connections = getattr(config_settings, 'HTTP_MAX_CONNECTIONS', 20)
+        self.max_per_host = getattr(config_settings, 'HTTP_MAX_PER_HOST', 4)
+        self.keepalive_timeout = getattr(config_settings, 'HTTP_KEEPALIVE_TIMEOUT', 30)
+        self.dns_ttl = getattr(config_settings, 'HTTP_DNS_TTL', 300)
+        self.timeout = aiohttp.ClientTimeout(
+            total=getattr(config_settings, 'HTTP_TIMEOUT_TOTAL', 20),
+            connect=getattr(config_settings, 'HTTP_TIMEOUT_CONNECT', 5)
+        )
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.sessions_created = 0
+        self.counters = {
+            'requests': 0,
+            'errors': 0,
+            'new_connections': 0,
+            'reused_connections': 0,
+            'dns_hits': 0,
+            'dns_misses': 0
+        }
+        self.latency_ms = RollingStats()  # Request start -> response headers
+
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session (created on first use, or again after close). Call from the event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                trace_configs=[self._trace_config()]
+            )
+            self.sessions_created += 1
+            logger.debug("Shared HTTP session created")
+        return self._session
+
+    async def close(self):
+        """Closes the session and its pooled connections (graceful_shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Let the transports finish closing before the loop stops
+            await asyncio.sleep(0.25)
+            logger.info("Shared HTTP session closed")
+        self._session = None
+
+    # --- Telemetry ---
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        def counter(key):
+            async def handler(session, ctx, params):
+                self.counters[key] += 1
+            return handler
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+
+        async def on_request_end(session, ctx, params):
+            self.counters['requests'] += 1
+            self.latency_ms.add((time.perf_counter() - ctx.start) * 1000)
+
+        async def on_request_exception(session, ctx, params):
+            self.counters['requests'] += 1
+            self.counters['errors'] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_create_end.append(counter('new_connections'))
+        trace.on_connection_reuseconn.append(counter('reused_connections'))
+        trace.on_dns_cache_hit.append(counter('dns_hits'))
+        trace.on_dns_cache_miss.append(counter('dns_misses'))
+        return trace
+
+    def get_stats(self) -> dict:
+        c = self.counters
+        connections = c['new_connections'] + c['reused_connections']
+        lookups = c['dns_hits'] + c['dns_misses']
+        return {
+            'session': "open" if self._session is not None and not self._session.closed else "closed",
+            'sessions_created': self.sessions_created,
+            'requests': c['requests'],
+            'errors': c['errors'],
+            'connections_new': c['new_connections'],
+            'connections_reused': c['reused_connections'],
+            'reuse_ratio': f"{c['reused_connections'] / connections * 100:.0f}%" if connections else "-",
+            'dns_cache_hit_ratio': f"{c['dns_hits'] / lookups * 100:.0f}%" if lookups else "-",
+            'latency_p50_ms': round(self.latency_ms.percentile(50)) if self.latency_ms.samples else None,
+            'latency_p95_ms': round(self.latency_ms.percentile(95)) if self.latency_ms.samples else None,
+            'limits': f"{self.max_connections} total / {self.max_per_host} per host"
+        }
+
+
+# Global instance (shared by tools, commands and the agent)
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Get the agent-wide HTTP client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
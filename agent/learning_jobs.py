@@ -0,0 +1,178 @@
+"""
+Learning Jobs Module
+
+Persistent queue of tool-learning jobs (`!learn all`, `!learn <tool>`) in a
+small SQLite database, so a restart does not lose an unfinished session.
+
+Each job is one tool trial with a status:
+
+    pending -> running -> done
+                       -> pending (retry after a backoff) -> ... -> failed
+    pending/running -> cancelled (!learn stop)
+
+Jobs left "running" by a crash or restart are put back to pending on start.
+AutonomousAgent.process_learning_queue claims jobs and runs several trials
+concurrently within the CPU budget (LEARNING_*).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class LearningJobStore:
+    """SQLite-backed learning job queue (status, attempts, results)."""
+
+    def __init__(self, db_path: str = None, max_attempts: int = None):
+        self.db_path = db_path or getattr(config_settings, 'LEARNING_JOBS_DB', 'workspace/learning_jobs.db')
+        self.max_attempts = max_attempts or getattr(config_settings, 'LEARNING_MAX_ATTEMPTS', 2)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS learning_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tool TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_learning_jobs_status ON learning_jobs (status, next_attempt_at)")
+        self.conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+            self.conn.commit()
+            return rows
+
+    def _update(self, sql: str, params: tuple = ()) -> int:
+        """Runs an UPDATE and returns the number of changed rows."""
+        with self._lock:
+            changed = self.conn.execute(sql, params).rowcount
+            self.conn.commit()
+            return changed
+
+    # --- Queue operations ---
+
+    def enqueue(self, tools: List[str]) -> int:
+        """Adds a pending job per tool (tools already pending/running are skipped). Returns jobs added."""
+        now = time.time()
+        active = {row['tool'] for row in self._execute(
+            "SELECT tool FROM learning_jobs WHERE status IN (?, ?)", (PENDING, RUNNING))}
+        new_tools = [t for t in dict.fromkeys(tools) if t not in active]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO learning_jobs (tool, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                [(tool, PENDING, now, now) for tool in new_tools]
+            )
+            self.conn.commit()
+        return len(new_tools)
+
+    def recover_interrupted(self) -> int:
+        """Puts jobs left running by a crash/restart back to pending (call once on start)."""
+        changed = self._update(
+            "UPDATE learning_jobs SET status = ?, updated_at = ? WHERE status = ?",
+            (PENDING, time.time(), RUNNING)
+        )
+        if changed:
+            logger.info(f"Resuming {changed} interrupted learning job(s)")
+        return changed
+
+    def claim(self, limit: int) -> List[sqlite3.Row]:
+        """Marks up to `limit` due pending jobs as running (attempts + 1) and returns them, oldest first."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            ids = [row['id'] for row in self.conn.execute(
+                "SELECT id FROM learning_jobs WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (PENDING, now, limit))]
+            if not ids:
+                return []
+            marks = ",".join("?" * len(ids))
+            self.conn.execute(
+                f"UPDATE learning_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id IN ({marks})",
+                (RUNNING, now, *ids))
+            self.conn.commit()
+            return self.conn.execute(f"SELECT * FROM learning_jobs WHERE id IN ({marks}) ORDER BY id", ids).fetchall()
+
+    def complete(self, job_id: int, result: str):
+        self._update(
+            "UPDATE learning_jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ? AND status = ?",
+            (DONE, result, time.time(), job_id, RUNNING)
+        )
+
+    def fail(self, job_id: int, error: str, retry_in: float) -> bool:
+        """Records a failed trial. Retries after `retry_in` seconds until max_attempts; True if it will retry."""
+        now = time.time()
+        rows = self._execute("SELECT attempts FROM learning_jobs WHERE id = ?", (job_id,))
+        retry = bool(rows) and rows[0]['attempts'] < self.max_attempts
+        self._update(
+            "UPDATE learning_jobs SET status = ?, error = ?, updated_at = ?, next_attempt_at = ? WHERE id = ? AND status = ?",
+            (PENDING if retry else FAILED, error, now, now + retry_in if retry else 0, job_id, RUNNING)
+        )
+        return retry
+
+    def cancel_all(self) -> int:
+        """Cancels every pending and running job (!learn stop)."""
+        return self._update(
+            "UPDATE learning_jobs SET status = ?, updated_at = ? WHERE status IN (?, ?)",
+            (CANCELLED, time.time(), PENDING, RUNNING)
+        )
+
+    # --- Introspection ---
+
+    def has_work(self) -> bool:
+        """True while any job is pending (due or waiting for a retry) or running."""
+        return bool(self._execute(
+            "SELECT 1 FROM learning_jobs WHERE status IN (?, ?) LIMIT 1", (PENDING, RUNNING)))
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next pending job may be claimed (None if nothing is pending)."""
+        rows = self._execute("SELECT MIN(next_attempt_at) AS due FROM learning_jobs WHERE status = ?", (PENDING,))
+        if not rows or rows[0]['due'] is None:
+            return None
+        return max(0.0, rows[0]['due'] - time.time())
+
+    def active_jobs(self) -> List[sqlite3.Row]:
+        """Pending and running jobs, in queue order."""
+        return self._execute(
+            "SELECT * FROM learning_jobs WHERE status IN (?, ?) ORDER BY id", (PENDING, RUNNING))
+
+    def recent_jobs(self, limit: int = 5) -> List[sqlite3.Row]:
+        """Most recently finished jobs (done/failed)."""
+        return self._execute(
+            "SELECT * FROM learning_jobs WHERE status IN (?, ?) ORDER BY updated_at DESC LIMIT ?",
+            (DONE, FAILED, limit))
+
+    def counts(self) -> Dict[str, int]:
+        return {row['status']: row['n'] for row in self._execute(
+            "SELECT status, COUNT(*) AS n FROM learning_jobs GROUP BY status")}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -1,10 +1,22 @@
 import asyncio
+import ast
 import logging
 import os
+import re
 import psutil
-from typing import Optional, Dict, Any
+import threading
+import time
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable
 from pathlib import Path
 import config_settings
+from .telemetry import get_llm_telemetry
+from .circuit_breaker import get_breaker
+from .llm_tuner import load_profile, tier_contexts
+from .llm_server import InferenceServerClient, ServerUnavailableError, server_mode_supported
+from .llm_batch import BatchedInferenceEngine
 
 try:
     from llama_cpp import Llama
@@ -13,6 +25,21 @@ except ImportError:
     Llama = None
     hf_hub_download = None
 
+try:
+    from llama_cpp import LlamaGrammar
+except ImportError:
+    LlamaGrammar = None
+
+try:
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+except ImportError:
+    LlamaPromptLookupDecoding = None
+
+try:
+    import llama_cpp as llama_cpp_lib
+except ImportError:
+    llama_cpp_lib = None
+
 try:
     import google.generativeai as genai
 except ImportError as e:
@@ -23,8 +50,102 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Tool call parsing: key='value' / key="value" / key=value (quoted values may contain commas)
+TOOL_NAME_PATTERN = re.compile(r"TOOL:\s*([\w\-]+)")
+ARG_PAIR_PATTERN = re.compile(r"(\w+)\s*=\s*(?:'([^']*)'|\"([^\"]*)\"|([^,]+))")
+
+MAIN_MODEL = "main"
+GEMINI_ROUTE = "gemini"
+
+
+class ModelPool:
+    """LRU pool of local GGUF models sharing one RAM budget.
+
+    Not thread-safe on its own - LLMClient only touches it while holding
+    _inference_lock, so a model is never evicted in the middle of a generation.
+    The main model is pinned and never evicted.
+    """
+
+    def __init__(self, specs: Dict[str, dict], budget_mb: int, pinned: str = MAIN_MODEL):
+        self.specs = specs
+        self.budget_mb = budget_mb
+        self.budget_factor = 1.0  # Scaled down by resource tier
+        self.pinned = pinned
+        self.models: "OrderedDict[str, Any]" = OrderedDict()  # name -> Llama, oldest first
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def effective_budget_mb(self) -> int:
+        return int(self.budget_mb * self.budget_factor)
+
+    def ram_of(self, name: str) -> int:
+        return self.specs.get(name, {}).get('ram_mb', 0)
+
+    def used_mb(self) -> int:
+        return sum(self.ram_of(name) for name in self.models)
+
+    def fits(self, name: str) -> bool:
+        """Whether `name` can be resident next to the pinned model within the current budget."""
+        needed = self.ram_of(name)
+        if name != self.pinned:
+            needed += self.ram_of(self.pinned)
+        return needed <= self.effective_budget_mb
+
+    def get(self, name: str):
+        """Returns a resident model and marks it as most recently used."""
+        model = self.models.get(name)
+        if model is not None:
+            self.models.move_to_end(name)
+        return model
+
+    def add(self, name: str, model):
+        self.models[name] = model
+        self.models.move_to_end(name)
+        self.loads += 1
+
+    def make_room(self, name: str):
+        """Evicts least recently used models until `name` fits in the budget."""
+        while self.used_mb() + self.ram_of(name) > self.effective_budget_mb:
+            victim = next((n for n in self.models if n != self.pinned and n != name), None)
+            if victim is None:
+                break
+            self.evict(victim)
+
+    def enforce_budget(self):
+        """Evicts LRU models after the budget shrank (e.g. higher resource tier)."""
+        while self.used_mb() > self.effective_budget_mb:
+            victim = next((n for n in self.models if n != self.pinned), None)
+            if victim is None:
+                break
+            self.evict(victim)
+
+    def evict(self, name: str):
+        model = self.models.pop(name, None)
+        if model is None:
+            return
+        self.evictions += 1
+        try:
+            close = getattr(model, 'close', None)
+            if close:
+                close()
+        except Exception as e:
+            logger.warning(f"Error closing model '{name}': {e}")
+        logger.info(f"Model pool: evicted '{name}' ({self.used_mb()}/{self.effective_budget_mb} MB used)")
+
+    def get_stats(self) -> dict:
+        return {
+            'resident': list(self.models.keys()),
+            'used_mb': self.used_mb(),
+            'budget_mb': self.effective_budget_mb,
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
+
+
 class LLMClient:
-    def __init__(self, daily_stats=None, model_repo: str = "Qwen/Qwen2.5-0.5B-Instruct-GGUF", model_filename: str = "qwen2.5-0.5b-instruct-q4_k_m.gguf"):
+    def __init__(self, daily_stats=None, model_repo: str = "Qwen/Qwen2.5-0.5B-Instruct-GGUF", model_filename: str = "qwen2.5-0.5b-instruct-q4_k_m.gguf",
+                 use_server: Optional[bool] = None):
         self.daily_stats = daily_stats
         self.model_repo = model_repo
         self.model_filename = model_filename
@@ -34,13 +155,64 @@ class LLMClient:
         self.current_n_ctx = getattr(config_settings, 'LLM_CONTEXT_NORMAL', 1024)
         self.current_n_threads = getattr(config_settings, 'LLM_THREADS_NORMAL', 4)
         self.current_max_tokens = 128
+        self.current_n_batch = getattr(config_settings, 'LLM_BATCH_SIZE', 512)
         self.resource_tier = 0
         
-        # Verify model is downloaded
-        self._verify_model_cache()
-        self._load_model()
+        # Model is loaded lazily in a background thread (see start_loading)
+        self.use_mlock = getattr(config_settings, 'LLM_USE_MLOCK', False)
+        self.use_mmap = getattr(config_settings, 'LLM_USE_MMAP', True)
+        self.model_path = None
+        self.model_load_duration = None  # Seconds spent in the last model load
+        self._load_thread = None
+        self._ready_future = concurrent.futures.Future()
+        
+        # Out-of-process inference (LLM_SERVER_MODE): the server process owns the model
+        if use_server is None:
+            use_server = getattr(config_settings, 'LLM_SERVER_MODE', False)
+        if use_server and not server_mode_supported():
+            logger.warning("LLM_SERVER_MODE needs Unix sockets - falling back to in-process inference.")
+            use_server = False
+        self.server_client = InferenceServerClient() if use_server else None
+        
+        # Host-specific profile written by the autotuner (python -m agent.llm_tuner / !debug llm-tune)
+        self.tuned_profile = load_profile()
+        if self.tuned_profile:
+            self._apply_tuned_profile()
+        
+        # Compiled GBNF grammars, keyed by grammar source
+        self._grammars: Dict[str, Any] = {}
+        
+        # Prompt-lookup decoding (draft-free speculation), enabled per call site
+        self._prompt_lookup = None
+        if getattr(config_settings, 'LLM_PROMPT_LOOKUP_ENABLED', False) and LlamaPromptLookupDecoding is not None:
+            self._prompt_lookup = LlamaPromptLookupDecoding(
+                num_pred_tokens=getattr(config_settings, 'LLM_PROMPT_LOOKUP_TOKENS', 2)
+            )
+        # Llama instances are not thread-safe; draft_model is swapped per call under this lock
+        self._inference_lock = threading.Lock()
+        self.telemetry = get_llm_telemetry()
+        
+        # Concurrent plain completions on the main model share one multi-sequence decode loop
+        self.parallel_sequences = getattr(config_settings, 'LLM_PARALLEL_SEQUENCES', 4)
+        self._batch_engine: Optional[BatchedInferenceEngine] = None
+        self._batch_engine_lock = threading.Lock()
+        
+        # Multi-model routing: task type -> pool model name (or "gemini")
+        self.resource_manager = None  # Set by the agent; tier drives the pool budget
+        self.task_routes = getattr(config_settings, 'LLM_TASK_ROUTES', {})
+        self.hard_difficulty = getattr(config_settings, 'LLM_HARD_DIFFICULTY', 1)
+        pool_specs = {name: dict(spec) for name, spec in getattr(config_settings, 'LLM_MODEL_POOL', {}).items()}
+        main_spec = pool_specs.setdefault(MAIN_MODEL, {})
+        main_spec.setdefault('repo', self.model_repo)
+        main_spec.setdefault('filename', self.model_filename)
+        self.model_pool = ModelPool(pool_specs, getattr(config_settings, 'LLM_POOL_RAM_BUDGET_MB', 1200))
+        self._failed_models = set()  # Pool models that failed to load (not retried)
 
         # Initialize Gemini
+        self.gemini_enabled = False
+        self._gemini_models: Dict[str, Any] = {}  # model_name -> GenerativeModel
+        self._gemini_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini")
+        self.gemini_breaker = get_breaker("gemini")  # Skips Gemini instantly while it is known to be down
         self._init_gemini()
 
     def _init_gemini(self):
@@ -50,6 +222,7 @@ class LLMClient:
             if hasattr(config_secrets, 'GEMINI_API_KEY') and config_secrets.GEMINI_API_KEY:
                 if genai:
                     genai.configure(api_key=config_secrets.GEMINI_API_KEY)
+                    self.gemini_enabled = True
                     logger.info("Gemini API initialized successfully.")
                 else:
                     logger.warning("google-generativeai library not installed.")
@@ -58,7 +231,8 @@ class LLMClient:
         except Exception as e:
             logger.error(f"Failed to initialize Gemini: {e}")
 
-    async def ask_gemini(self, prompt: str, image_data: bytes = None, model_type: str = "fast") -> str:
+    async def ask_gemini(self, prompt: str, image_data: bytes = None, model_type: str = "fast",
+                         call_site: str = "ask") -> str:
         """
         Ask Gemini model.
         
@@ -66,6 +240,7 @@ class LLMClient:
             prompt: Text prompt
             image_data: Optional image bytes
             model_type: 'fast' or 'high' (determines model from config)
+            call_site: Caller name for telemetry
         """
         if not genai:
              return "❌ Error: Google Generative AI library not installed."
@@ -74,6 +249,7 @@ class LLMClient:
         if not hasattr(config_secrets, 'GEMINI_API_KEY') or not config_secrets.GEMINI_API_KEY:
              return "❌ Error: Gemini API Key not configured."
 
+        request_sent = answered = False
         try:
             # Select model based on type using EFFECTIVE constants (mapped to real models)
             if model_type == "high":
@@ -82,39 +258,46 @@ class LLMClient:
                 model_name = getattr(config_settings, 'GEMINI_MODEL_FAST_EFFECTIVE', "gemini-1.5-flash")
 
             logger.info(f"Asking Gemini Model: {model_name}")
-            model = genai.GenerativeModel(model_name)
+            model = self._get_gemini_model(model_name)
+            loop = asyncio.get_running_loop()
+            
+            call_start = time.perf_counter()
             
-            # Prepare content
+            # Prepare content (image decoding is CPU-bound, keep it off the event loop)
             content = [prompt]
             if image_data:
-                from PIL import Image
-                import io
-                image = Image.open(io.BytesIO(image_data))
+                image = await loop.run_in_executor(self._gemini_executor, self._decode_image, image_data)
                 content.append(image)
             
-            # Run inference in executor to avoid blocking loop
-            loop = asyncio.get_running_loop()
+            if not self.gemini_breaker.allow():
+                logger.info(f"Gemini skipped: circuit open (next probe in {self.gemini_breaker.retry_in():.0f}s)")
+                return f"❌ Gemini Error: unavailable (circuit open, retry in {self.gemini_breaker.retry_in():.0f}s)"
             
-            def _run_gemini():
-                response = model.generate_content(content)
-                return response.text
+            # Single request: text and usage come from the same response object
+            request_start = time.perf_counter()
+            request_sent = True
+            if hasattr(model, 'generate_content_async'):
+                response = await model.generate_content_async(content)
+            else:
+                response = await loop.run_in_executor(self._gemini_executor, model.generate_content, content)
+            network_ms = (time.perf_counter() - request_start) * 1000
+            # Backend answered - content problems (e.g. safety blocks) below are not outages
+            self.gemini_breaker.record_success()
+            answered = True
 
-            response_text = await loop.run_in_executor(None, _run_gemini)
-            
-            # Record stats if available
-            # Note: We can't easily get usage from _run_gemini return without refactoring slightly.
-            # But the response object has it. We returned text only.
-            # Let's refactor _run_gemini to return object or handle stats there?
-            # Actually, let's just do it in the executor function for simplicity, 
-            # OR better: change _run_gemini to return (text, usage)
+            response_text = response.text
+            usage_data = getattr(response, 'usage_metadata', None)
             
-            # Correct approach:
-            def _run_gemini_full():
-                response = model.generate_content(content)
-                usage = response.usage_metadata
-                return response.text, usage
-
-            response_text, usage_data = await loop.run_in_executor(None, _run_gemini_full)
+            # Non-streaming: first token arrives with the whole response
+            output_tokens = getattr(usage_data, 'candidates_token_count', 0) if usage_data else 0
+            self.telemetry.record(
+                call_site, f"gemini/{model_name}",
+                queue_wait_ms=(request_start - call_start) * 1000,
+                network_ms=network_ms,
+                ttft_ms=(time.perf_counter() - call_start) * 1000,
+                total_ms=(time.perf_counter() - call_start) * 1000,
+                gen_tps=output_tokens / (network_ms / 1000) if output_tokens and network_ms > 0 else None
+            )
 
             if self.daily_stats:
                 self.daily_stats.record_llm_generation("gemini")
@@ -124,38 +307,143 @@ class LLMClient:
 
             return response_text.strip()
 
+        except asyncio.CancelledError:
+            if request_sent and not answered:
+                self.gemini_breaker.release_probe()
+            raise
         except Exception as e:
+            if request_sent and not answered:
+                self.gemini_breaker.record_failure(e)
             logger.error(f"Gemini API Error: {e}")
             return f"❌ Gemini Error: {str(e)}"
 
+    def _get_gemini_model(self, model_name: str):
+        """Returns a cached GenerativeModel instance for the given model name."""
+        model = self._gemini_models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            self._gemini_models[model_name] = model
+            logger.debug(f"Gemini model instance created: {model_name}")
+        return model
+
+    @staticmethod
+    def _decode_image(image_data: bytes):
+        """Decodes image bytes with PIL (runs in executor)."""
+        from PIL import Image
+        import io
+        image = Image.open(io.BytesIO(image_data))
+        image.load()  # Force full decode here instead of lazily inside the SDK call
+        return image
+
     @property
     def provider_type(self) -> str:
         """Returns the type of LLM provider (Local/Cloud)."""
+        if self.server_client and self.server_client.model_ready:
+            return "Local (LlamaCPP server)"
         if self.llm:
             return "Local (LlamaCPP)"
+        if self.is_loading:
+            return "Local (Loading...)"
         return "None"
 
-    def _verify_model_cache(self):
-        """Verify model is downloaded locally."""
+    @property
+    def gemini_available(self) -> bool:
+        """True if Gemini is configured and not known to be down (circuit breaker)."""
+        return self.gemini_enabled and self.gemini_breaker.available
+
+    @property
+    def is_loading(self) -> bool:
+        """True while the background model load is still running."""
+        return self._load_thread is not None and not self._ready_future.done()
+
+    @property
+    def has_local_model(self) -> bool:
+        """True if a local model can serve requests right now (in-process or via the server)."""
+        if self.server_client:
+            return self.server_client.model_ready
+        return self.llm is not None
+
+    @property
+    def is_available(self) -> bool:
+        """True if the local model is loaded or will be once loading finishes."""
+        return self.has_local_model or self.is_loading
+
+    def start_loading(self):
+        """Starts loading the local model in a background thread (idempotent)."""
+        if self._load_thread is not None:
+            return
+        self._load_thread = threading.Thread(target=self._background_load, name="llm-loader", daemon=True)
+        self._load_thread.start()
+        logger.info("LLM model loading started in background.")
+
+    def _background_load(self):
+        """Thread target: load the model (or attach to the inference server) and resolve the readiness future."""
+        start = time.time()
         try:
-            if hf_hub_download is None:
-                logger.warning("huggingface-hub not installed, cannot verify model cache")
-                return
-            
-            # Ensure cache directory exists
-            cache_dir = getattr(config_settings, 'MODEL_CACHE_DIR', "./models/")
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            # Check if model exists in cache/local dir
+            if self.server_client:
+                self.server_client.ensure_server_blocking(timeout=getattr(config_settings, 'LLM_READY_TIMEOUT', 120))
+            else:
+                self._load_model()
+                # The batched engine allocates its own llama context - build it here, not on the event loop
+                self._get_batch_engine()
+        finally:
+            self.model_load_duration = time.time() - start
+            logger.info(f"LLM model load finished in {self.model_load_duration:.2f}s (loaded: {self.has_local_model})")
+            self._ready_future.set_result(self.has_local_model)
+
+    def _restart_loading(self):
+        """Re-arms readiness and re-attaches to (or respawns) the inference server."""
+        if self._load_thread is not None and self._load_thread.is_alive():
+            return
+        self._ready_future = concurrent.futures.Future()
+        self._load_thread = None
+        self.start_loading()
+
+    async def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the background model load. Returns True if a local model is usable."""
+        if self.has_local_model:
+            return True
+        if self._load_thread is None:
+            return False
+        if timeout is None:
+            timeout = getattr(config_settings, 'LLM_READY_TIMEOUT', 120)
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._ready_future)), timeout=timeout)
+            # The current state, not the value at load time (the server connection may have changed since)
+            return self.has_local_model
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM still loading after {timeout}s wait.")
+            return False
+
+    def _resolve_model_path(self, repo: Optional[str] = None, filename: Optional[str] = None) -> Optional[str]:
+        """Returns the local model path, downloading the model only if it is not cached."""
+        repo = repo or self.model_repo
+        filename = filename or self.model_filename
+        if hf_hub_download is None:
+            logger.warning("huggingface-hub not installed, cannot resolve model path")
+            return None
+
+        # Ensure cache directory exists
+        cache_dir = getattr(config_settings, 'MODEL_CACHE_DIR', "./models/")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        try:
+            # Check cache first (no network)
             model_path = hf_hub_download(
-                repo_id=self.model_repo,
-                filename=self.model_filename,
+                repo_id=repo,
+                filename=filename,
                 cache_dir=cache_dir,
-                local_files_only=True  # Don't download, just check cache
+                local_files_only=True
             )
             logger.info(f"Model found in local storage: {model_path}")
         except Exception as e:
-            logger.warning(f"Model not found locally, will download to {getattr(config_settings, 'MODEL_CACHE_DIR', './models/')} on first load: {e}")
+            logger.warning(f"Model not found locally, downloading to {cache_dir}: {e}")
+            model_path = hf_hub_download(
+                repo_id=repo,
+                filename=filename,
+                cache_dir=cache_dir
+            )
+        return model_path
     
     def _load_model(self, n_ctx: Optional[int] = None, n_threads: Optional[int] = None):
         """Loads the LLM model with dynamic parameters."""
@@ -178,38 +466,123 @@ class LLMClient:
                  n_threads = max(2, psutil.cpu_count(logical=False) // 2)
 
         try:
-            logger.info(f"Loading model {self.model_repo}/{self.model_filename} (ctx={n_ctx}, threads={n_threads})...")
+            logger.info(f"Loading model {self.model_repo}/{self.model_filename} (ctx={n_ctx}, threads={n_threads}, batch={self.current_n_batch}, mmap={self.use_mmap}, mlock={self.use_mlock})...")
             
-            # Ensure cache directory exists
-            cache_dir = getattr(config_settings, 'MODEL_CACHE_DIR', "./models/")
-            os.makedirs(cache_dir, exist_ok=True)
-
-            # Download/Load model
-            model_path = hf_hub_download(
-                repo_id=self.model_repo,
-                filename=self.model_filename,
-                cache_dir=cache_dir
-            )
+            if self.model_path is None:
+                self.model_path = self._resolve_model_path()
+            if self.model_path is None:
+                return
 
             self.llm = Llama(
-                model_path=model_path,
+                model_path=self.model_path,
                 verbose=False,
                 n_ctx=n_ctx,
-                n_threads=n_threads
+                n_threads=n_threads,
+                n_batch=self.current_n_batch,
+                use_mmap=self.use_mmap,
+                use_mlock=self.use_mlock,
+                # Speculative verification needs logits for every position (n_ctx x vocab floats)
+                logits_all=self._prompt_lookup is not None
             )
             self.current_n_ctx = n_ctx
+            self.model_pool.add(MAIN_MODEL, self.llm)
             logger.info(f"Model loaded successfully with context window: {n_ctx}")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
     
-    def update_parameters(self, resource_tier: int):
-        """Update LLM parameters based on resource tier."""
-        context_map = {
-            0: getattr(config_settings, 'LLM_CONTEXT_NORMAL', 1024),
-            1: getattr(config_settings, 'LLM_CONTEXT_TIER1', 768),
-            2: getattr(config_settings, 'LLM_CONTEXT_TIER2', 512),
-            3: getattr(config_settings, 'LLM_CONTEXT_TIER3', 256)
-        }
+    @property
+    def current_tier(self) -> int:
+        """Resource tier from ResourceManager (falls back to the last tier pushed via update_parameters)."""
+        if self.resource_manager is not None:
+            return getattr(self.resource_manager, 'current_tier', self.resource_tier)
+        return self.resource_tier
+
+    def select_model(self, task: str, difficulty: int = 0, has_image: bool = False, allow_remote: bool = True) -> str:
+        """Routes a task to a pool model name or to "gemini".
+
+        Gemini handles images, hard questions and tasks routed to it explicitly, and
+        serves as a fallback when no local model is usable. Secondary local models are
+        only used while they fit next to the main model in the tier-scaled RAM budget.
+        """
+        factors = getattr(config_settings, 'LLM_POOL_TIER_BUDGET_FACTORS', {})
+        self.model_pool.budget_factor = factors.get(self.current_tier, 1.0)
+        
+        remote_ok = allow_remote and self.gemini_available
+        route = self.task_routes.get(task, MAIN_MODEL)
+        
+        if remote_ok and (has_image or route == GEMINI_ROUTE or difficulty >= self.hard_difficulty):
+            return GEMINI_ROUTE
+        if route == GEMINI_ROUTE or route not in self.model_pool.specs:
+            route = MAIN_MODEL
+        if route != MAIN_MODEL and (route in self._failed_models or Llama is None or not self.model_pool.fits(route)):
+            # No headroom for a second model at this tier - share the main one
+            route = MAIN_MODEL
+        if route == MAIN_MODEL and remote_ok and not self.is_available:
+            return GEMINI_ROUTE
+        return route
+
+    def _acquire_model(self, name: str):
+        """Returns a loaded model for `name`, loading (and evicting LRU) on demand.
+
+        Must be called with _inference_lock held. Falls back to the main model.
+        """
+        if name == MAIN_MODEL:
+            return self.llm
+        model = self.model_pool.get(name)
+        if model is not None:
+            return model
+        
+        spec = self.model_pool.specs.get(name, {})
+        self.model_pool.make_room(name)
+        try:
+            start = time.time()
+            model_path = self._resolve_model_path(spec.get('repo'), spec.get('filename'))
+            if model_path is None:
+                raise RuntimeError("model path could not be resolved")
+            model = Llama(
+                model_path=model_path,
+                verbose=False,
+                n_ctx=min(spec.get('n_ctx', self.current_n_ctx), self.current_n_ctx),
+                n_threads=spec.get('n_threads', self.current_n_threads),
+                n_batch=self.current_n_batch,
+                use_mmap=self.use_mmap,
+                use_mlock=self.use_mlock,
+                logits_all=False  # Prompt lookup runs on the main model only
+            )
+            self.model_pool.add(name, model)
+            logger.info(f"Model pool: loaded '{name}' in {time.time() - start:.1f}s ({self.model_pool.used_mb()}/{self.model_pool.effective_budget_mb} MB used)")
+            return model
+        except Exception as e:
+            logger.error(f"Model pool: failed to load '{name}', using main model: {e}")
+            self._failed_models.add(name)
+            return self.llm
+
+    def _apply_tuned_profile(self):
+        """Applies the tier 0 tuned profile (model quantisation, threads, batch, context)."""
+        tier0 = self.tuned_profile['tiers'].get('0')
+        if not tier0:
+            return
+        if os.path.exists(tier0['model_path']):
+            self.model_path = tier0['model_path']
+            self.model_filename = tier0['model_filename']
+        self.current_n_ctx = tier0['n_ctx']
+        self.current_n_threads = tier0['n_threads']
+        self.current_n_batch = tier0['n_batch']
+        logger.info(f"Using tuned LLM profile: {self.model_filename}, threads={self.current_n_threads}, "
+                    f"batch={self.current_n_batch}, ctx={self.current_n_ctx} ({tier0['gen_tps']} tok/s)")
+
+    def reload_tuned_profile(self) -> bool:
+        """Re-reads the profile file (e.g. after !debug llm-tune). Applies fully on next model load."""
+        self.tuned_profile = load_profile()
+        if self.tuned_profile:
+            self.update_parameters(self.resource_tier, force=True)
+        return self.tuned_profile is not None
+
+    def _tier_params(self, resource_tier: int) -> tuple:
+        """(n_ctx, n_threads, n_batch) for a tier - tuned profile first, config otherwise."""
+        tuned = (self.tuned_profile or {}).get('tiers', {}).get(str(resource_tier))
+        if tuned:
+            return tuned['n_ctx'], tuned['n_threads'], tuned['n_batch']
         
         thread_map = {
             0: getattr(config_settings, 'LLM_THREADS_NORMAL', 4),
@@ -217,48 +590,76 @@ class LLMClient:
             2: getattr(config_settings, 'LLM_THREADS_TIER2', 3),
             3: getattr(config_settings, 'LLM_THREADS_TIER3', 3)
         }
-        
-        new_ctx = context_map.get(resource_tier, 1024)
-        new_threads = thread_map.get(resource_tier, 3)
+        return (tier_contexts().get(resource_tier, 1024), thread_map.get(resource_tier, 3),
+                getattr(config_settings, 'LLM_BATCH_SIZE', 512))
+
+    def update_parameters(self, resource_tier: int, force: bool = False):
+        """Update LLM parameters based on resource tier."""
+        new_ctx, new_threads, new_batch = self._tier_params(resource_tier)
         new_max_tokens = new_ctx // 8  # Proportional to context
+        self.resource_tier = resource_tier
+        self.current_n_batch = new_batch
         
-        if new_ctx != self.current_n_ctx or new_threads != self.current_n_threads:
+        if force or new_ctx != self.current_n_ctx or new_threads != self.current_n_threads:
             logger.warning(f"Resource tier {resource_tier}: Context {self.current_n_ctx} -> {new_ctx}, Threads {self.current_n_threads} -> {new_threads}")
             self.current_n_ctx = new_ctx
             self.current_n_threads = new_threads
             self.current_max_tokens = new_max_tokens
-            self.resource_tier = resource_tier
             # Note: Actual context change requires model reload
             # For now just track it for monitoring
 
-    async def generate_response(self, prompt: str, system_prompt: str = "You are an autonomous AI agent.") -> str:
-        """Generates a response asynchronously."""
-        if not self.llm:
+    async def generate_response(self, prompt: str, system_prompt: str = "You are an autonomous AI agent.",
+                                grammar: Optional[str] = None, stop: Optional[List[str]] = None,
+                                prompt_lookup: bool = False, task: str = "chat",
+                                call_site: Optional[str] = None,
+                                on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generates a response asynchronously on the local model routed for `task`.
+
+        Args:
+            grammar: Optional GBNF grammar source constraining the output
+            stop: Extra stop sequences (in addition to the chat end token)
+            prompt_lookup: Speculate tokens from the prompt. Only worth it for extractive
+                tasks (summaries, memory filter) where the output copies the input.
+            task: Task type used for model routing (see LLM_TASK_ROUTES)
+            call_site: Caller name for telemetry (defaults to the task)
+            on_token: Called on the event loop with each new piece of text. Streams per
+                token on the batched path; otherwise called once with the whole text.
+        """
+        model_name = self.select_model(task, allow_remote=False)
+        if not self.has_local_model and not await self.wait_until_ready():
             return "LLM not available."
 
-        loop = asyncio.get_running_loop()
-        
         formatted_prompt = f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{prompt}<|im_end|>\n<|im_start|>assistant\n"
+        request = {
+            'model': model_name,
+            'prompt': formatted_prompt,
+            'max_tokens': self.current_max_tokens,  # Now dynamic
+            'stop': ["<|im_end|>"] + (stop or []),
+            'grammar': grammar,
+            'prompt_lookup': prompt_lookup
+        }
+        logger.debug(f"Starting inference on '{model_name}' ({task}) with prompt length: {len(formatted_prompt)}, max_tokens: {self.current_max_tokens}")
         
         try:
-            # Define inference function for executor
-            def run_inference():
-                logger.debug(f"Starting inference with prompt length: {len(formatted_prompt)}, max_tokens: {self.current_max_tokens}")
-                try:
-                    res = self.llm(
-                        formatted_prompt, 
-                        max_tokens=self.current_max_tokens,  # Now dynamic
-                        stop=["<|im_end|>"], 
-                        echo=False
-                    )
-                    logger.debug("Inference completed successfully.")
-                    return res
-                except Exception as e:
-                    logger.error(f"Inference error inside thread: {e}")
-                    raise e
-
-            # Run blocking inference in executor
-            output = await loop.run_in_executor(None, run_inference)
+            submitted = time.perf_counter()
+            streamed = on_token is not None
+            if self.server_client:
+                # Out-of-process: the inference server owns the model
+                output, timings = await self._infer_via_server(request, on_token)
+            elif self.batch_eligible(request):
+                # Shares the decode loop with other in-flight requests
+                timings = {}
+                output = await self.infer_batched(request, timings, on_token)
+            else:
+                # Run blocking inference in executor
+                timings = {}
+                loop = asyncio.get_running_loop()
+                output = await loop.run_in_executor(None, self.infer_blocking, request, timings)
+                streamed = False
+            logger.debug("Inference completed successfully.")
+            if on_token is not None and not streamed:
+                on_token(output['choices'][0]['text'])
+            self._record_local_timings(call_site or task, model_name, submitted, timings, output.get("usage", {}))
             
             # Record usage
             if self.daily_stats:
@@ -270,9 +671,229 @@ class LLMClient:
 
             return output['choices'][0]['text'].strip()
         except Exception as e:
-            logger.error(f"Inference failed: {e}")
-    async def decide_action(self, context: str, past_memories: list = None, tools_desc: str = None) -> str:
-        """Decides on an action based on context, memories, and available tools."""
+            logger.error(f"Inference failed: {type(e).__name__}: {e}")
+            return None
+
+    def infer_blocking(self, request: dict, timings: dict, cancel_event: Optional[threading.Event] = None) -> dict:
+        """Runs one completion on a local model (blocking; executor or inference server thread).
+
+        Args:
+            request: model, prompt (formatted), max_tokens, stop, grammar (GBNF source), prompt_lookup
+            timings: Filled with perf_counter timestamps and llama.cpp counters
+            cancel_event: If given, tokens are streamed and generation stops once it is set
+        """
+        try:
+            with self._inference_lock:
+                timings['start'] = time.perf_counter()
+                self.model_pool.enforce_budget()
+                model = self._acquire_model(request['model'])
+                # Only the main model is loaded with logits_all, which speculation needs
+                use_lookup = request.get('prompt_lookup') and request['model'] == MAIN_MODEL
+                model.draft_model = self._prompt_lookup if use_lookup else None
+                grammar = self._compile_grammar(request['grammar']) if request.get('grammar') else None
+                self._reset_llama_timings(model)
+                timings['eval_start'] = time.perf_counter()
+                if cancel_event is None:
+                    res = model(
+                        request['prompt'],
+                        max_tokens=request['max_tokens'],
+                        stop=request['stop'],
+                        grammar=grammar,
+                        echo=False
+                    )
+                else:
+                    res = self._generate_cancellable(model, request, grammar, cancel_event)
+                timings['end'] = time.perf_counter()
+                timings.update(self._read_llama_timings(model))
+            return res
+        except Exception as e:
+            logger.error(f"Inference error inside thread: {e}")
+            raise e
+
+    @staticmethod
+    def _generate_cancellable(model, request: dict, grammar, cancel_event: threading.Event) -> dict:
+        """Streams tokens so a cancelled request stops at the next token."""
+        text_parts = []
+        completion_tokens = 0
+        finish_reason = None
+        stream = model(
+            request['prompt'],
+            max_tokens=request['max_tokens'],
+            stop=request['stop'],
+            grammar=grammar,
+            echo=False,
+            stream=True
+        )
+        for chunk in stream:
+            choice = chunk['choices'][0]
+            text_parts.append(choice.get('text', ''))
+            completion_tokens += 1
+            finish_reason = choice.get('finish_reason') or finish_reason
+            if cancel_event.is_set():
+                finish_reason = "cancelled"
+                break
+        prompt_tokens = len(model.tokenize(request['prompt'].encode('utf-8'), special=True))
+        return {
+            'choices': [{'text': ''.join(text_parts), 'finish_reason': finish_reason}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+    def _get_batch_engine(self) -> Optional[BatchedInferenceEngine]:
+        """Returns the batched engine for the current main model, (re)creating it. Blocking - load thread only."""
+        if self.parallel_sequences < 2 or self.llm is None or llama_cpp_lib is None:
+            return None
+        with self._batch_engine_lock:
+            engine = self._batch_engine
+            if engine is not None and engine.model is not self.llm:
+                # Main model was reloaded - the old context points at freed weights
+                engine.close()
+                engine = self._batch_engine = None
+            if engine is None:
+                try:
+                    engine = self._batch_engine = BatchedInferenceEngine(
+                        self.llm,
+                        n_parallel=self.parallel_sequences,
+                        n_ctx=self.current_n_ctx,
+                        n_batch=self.current_n_batch,
+                        n_threads=self.current_n_threads or max(2, psutil.cpu_count(logical=False) // 2),
+                        lock=self._inference_lock
+                    )
+                except Exception as e:
+                    logger.error(f"Batched inference unavailable, using serial inference: {e}")
+                    self.parallel_sequences = 1
+            return engine
+
+    def batch_eligible(self, request: dict) -> bool:
+        """Plain completions on the main model can join the multi-sequence decode loop."""
+        if request['model'] != MAIN_MODEL or request.get('grammar') or request.get('prompt_lookup'):
+            return False
+        # Only an engine built by the load thread for the current model; never created here
+        engine = self._batch_engine
+        return engine is not None and engine.model is self.llm
+
+    async def infer_batched(self, request: dict, timings: dict,
+                            on_token: Optional[Callable[[str], None]] = None,
+                            cancel_event: Optional[threading.Event] = None) -> dict:
+        """Runs one completion in the batched decode loop (see batch_eligible).
+
+        Text pieces are handed to on_token on the calling event loop. Cancelling the
+        awaiting task frees the sequence slot at the next decode step.
+        """
+        loop = asyncio.get_running_loop()
+        callback = None
+        if on_token is not None:
+            callback = lambda piece: loop.call_soon_threadsafe(on_token, piece)
+        future = self._batch_engine.submit(request, timings, on_token=callback, cancel_event=cancel_event)
+        return await asyncio.wrap_future(future)
+
+    def close_batch_engine(self):
+        """Stops the batched decode loop and frees its context. Blocking (joins the decode thread)."""
+        with self._batch_engine_lock:
+            if self._batch_engine is not None:
+                self._batch_engine.close()
+                self._batch_engine = None
+
+    def get_batch_stats(self) -> Optional[dict]:
+        return self._batch_engine.get_stats() if self._batch_engine is not None else None
+
+    async def _infer_via_server(self, request: dict, on_token: Optional[Callable[[str], None]] = None) -> tuple:
+        """Sends a request to the inference server; restarts it if the connection is lost."""
+        try:
+            return await self.server_client.infer(request, on_token=on_token)
+        except ServerUnavailableError:
+            logger.warning("Inference server lost - reconnecting in background.")
+            self._restart_loading()
+            raise
+
+    @staticmethod
+    def _reset_llama_timings(model):
+        """Resets llama.cpp perf counters so the next read covers one call only."""
+        if llama_cpp_lib is None:
+            return
+        try:
+            ctx = model._ctx.ctx
+            if hasattr(llama_cpp_lib, 'llama_perf_context_reset'):
+                llama_cpp_lib.llama_perf_context_reset(ctx)
+            elif hasattr(llama_cpp_lib, 'llama_reset_timings'):
+                llama_cpp_lib.llama_reset_timings(ctx)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _read_llama_timings(model) -> dict:
+        """Prompt-eval / generation timings of the last call from llama.cpp (empty if unsupported)."""
+        if llama_cpp_lib is None:
+            return {}
+        try:
+            ctx = model._ctx.ctx
+            if hasattr(llama_cpp_lib, 'llama_perf_context'):
+                data = llama_cpp_lib.llama_perf_context(ctx)
+            else:
+                data = llama_cpp_lib.llama_get_timings(ctx)
+            return {
+                'prompt_eval_ms': data.t_p_eval_ms,
+                'eval_ms': data.t_eval_ms,
+                'n_eval': data.n_eval
+            }
+        except Exception:
+            return {}
+
+    def _record_local_timings(self, call_site: str, model_name: str, submitted: float, timings: dict, usage: dict):
+        """Turns raw timestamps + llama.cpp counters into a telemetry sample."""
+        if 'start' not in timings or 'end' not in timings:
+            return
+        queue_wait_ms = (timings['start'] - submitted) * 1000
+        total_ms = (timings['end'] - submitted) * 1000
+        completion_tokens = usage.get('completion_tokens', 0)
+        
+        prompt_eval_ms = timings.get('prompt_eval_ms')
+        eval_ms = timings.get('eval_ms')
+        n_eval = timings.get('n_eval') or completion_tokens
+        if prompt_eval_ms is not None and eval_ms:
+            # TTFT = queueing + model load/acquire + prompt eval + first generated token
+            setup_ms = (timings['eval_start'] - timings['start']) * 1000
+            ttft_ms = queue_wait_ms + setup_ms + prompt_eval_ms + (eval_ms / n_eval if n_eval else 0)
+            gen_tps = n_eval / (eval_ms / 1000) if n_eval else None
+        else:
+            # Timings unavailable in this llama-cpp-python build - whole call only
+            ttft_ms = None
+            elapsed = timings['end'] - timings['eval_start']
+            gen_tps = completion_tokens / elapsed if completion_tokens and elapsed > 0 else None
+        
+        self.telemetry.record(
+            call_site, f"local/{model_name}",
+            queue_wait_ms=queue_wait_ms,
+            prompt_eval_ms=prompt_eval_ms,
+            ttft_ms=ttft_ms,
+            total_ms=total_ms,
+            gen_tps=gen_tps
+        )
+
+    async def decide_action(self, context: str, past_memories: list = None, tools_desc: str = None,
+                            tool_names: Optional[List[str]] = None, working_memory: Optional[str] = None,
+                            max_calls: Optional[int] = None) -> str:
+        """Decides on an action based on context, memories, and available tools.
+
+        When tool_names is given, output is constrained by a GBNF grammar to a plan of
+        1..max_calls registered tool calls (one per line) or a one-line free-text action.
+        working_memory (the agent's bounded rolling summary) replaces the raw past_memories list.
+        """
+        if max_calls is None:
+            max_calls = getattr(config_settings, 'TOOL_PLAN_MAX_CALLS', 3)
+        max_calls = max(1, max_calls)
+        
+        plan_hint = ""
+        if max_calls > 1:
+            plan_hint = (
+                f"Můžeš zadat až {max_calls} NEZÁVISLÉ nástroje najednou, každý na vlastním řádku "
+                "(poběží souběžně, jeden nesmí potřebovat výsledek druhého):\n"
+                "TOOL: web_tool | ARGS: action='search', query='Raspberry Pi 5 projects'\n"
+                "TOOL: wikipedia_tool | ARGS: query='Raspberry Pi'\n\n"
+            )
         
         system_prompt = (
             "Jsi autonomní AI agent se svobodnou vůlí. Běžíš na Raspberry Pi.\n"
@@ -287,12 +908,15 @@ class LLMClient:
             "TOOL: web_tool | ARGS: action='search', query='latest AI developments'\n"
             "TOOL: web_tool | ARGS: action='search', query='Raspberry Pi 5 projects'\n"
             "TOOL: system_tool | ARGS: action='info'\n\n"
+            f"{plan_hint}"
             "DŮLEŽITÉ: MUSÍŠ používat přesně tento formát! Nepiš jen text, ALE VOLEJ NÁSTROJE!"
         )
 
         # Augment prompt with memories (RAG)
         memory_context = ""
-        if past_memories:
+        if working_memory:
+            memory_context = f"\nWorking memory:\n{working_memory}"
+        elif past_memories:
             memory_context = "\nPast relevant actions:\n" + "\n".join([f"- {m['content']}" for m in past_memories])
             
         full_prompt = f"Context: {context}\n{memory_context}\n\nDecide next action:"
@@ -307,7 +931,7 @@ class LLMClient:
             logger.warning(f"Prompt too long ({len(full_prompt) + len(system_prompt)} chars). Truncating...")
             
             # 1. Try removing memories first
-            if past_memories:
+            if memory_context:
                 logger.info("Dropping memories to fit context.")
                 memory_context = ""
                 full_prompt = f"Context: {context}\n\nDecide next action:"
@@ -327,24 +951,88 @@ class LLMClient:
                 else:
                     logger.error("System prompt alone exceeds limit! This shouldn't happen.")
         
-        return await self.generate_response(full_prompt, system_prompt=system_prompt)
+        grammar = self.build_tool_grammar(tool_names, max_calls) if tool_names else None
+        # Stop right after the (last) ARGS line - anything after it is wasted tokens
+        stop = ["\n\n"] if max_calls > 1 else ["\n"]
+        return await self.generate_response(full_prompt, system_prompt=system_prompt, grammar=grammar, stop=stop, task="decision", call_site="decide_action")
+
+    @staticmethod
+    def build_tool_grammar(tool_names: List[str], max_calls: int = 1) -> str:
+        """Builds GBNF source allowing 1..max_calls registered tool calls (one per line) or a short free-text action."""
+        names = " | ".join(f'"{name}"' for name in sorted(tool_names))
+        # tool-call ("\n" tool-call ("\n" tool-call)?)? - nested optionals, no {m,n} needed
+        plan = "tool-call"
+        for _ in range(max(1, max_calls) - 1):
+            plan = f'tool-call ("\\n" {plan})?'
+        return "\n".join([
+            'root ::= plan | free-text',
+            f'plan ::= {plan}',
+            'tool-call ::= "TOOL: " tool-name " | ARGS: " args',
+            f'tool-name ::= {names}',
+            'args ::= arg (", " arg)*',
+            'arg ::= [a-z_] [a-z0-9_]* "=\'" [^\'\\n]* "\'"',
+            # Free text may not start with "T" so a "TOOL:" prefix is forced through tool-call
+            'free-text ::= [^T\\n] [^\\n]*',
+        ]) + "\n"
+
+    def _compile_grammar(self, source: str):
+        """Returns a compiled (cached) LlamaGrammar for GBNF source, or None."""
+        if LlamaGrammar is None:
+            return None
+        if source not in self._grammars:
+            try:
+                self._grammars[source] = LlamaGrammar.from_string(source, verbose=False)
+                logger.debug(f"Compiled GBNF grammar ({len(source)} chars)")
+            except Exception as e:
+                logger.error(f"Failed to compile grammar: {e}")
+                self._grammars[source] = None
+        return self._grammars[source]
 
     def parse_tool_call(self, response: str) -> dict:
         """Parses a tool call from the LLM response."""
         if "TOOL:" in response and "ARGS:" in response:
             try:
-                parts = response.split("|")
-                tool_name = parts[0].split("TOOL:")[1].strip()
-                args_str = parts[1].split("ARGS:")[1].strip()
+                match = TOOL_NAME_PATTERN.search(response)
+                if not match:
+                    return None
+                tool_name = match.group(1)
+                args_str = response.split("ARGS:", 1)[1].split("\n", 1)[0].strip()
                 
-                # Simple parsing of key='value' pairs
+                # Gemini fallback answers with a dict: ARGS: {'action': 'search', ...}
+                if args_str.startswith("{"):
+                    try:
+                        parsed = ast.literal_eval(args_str)
+                        if isinstance(parsed, dict):
+                            return {"tool": tool_name, "args": {str(k): str(v) for k, v in parsed.items()}}
+                    except (ValueError, SyntaxError):
+                        pass
+                
+                # key='value' pairs - quoted values may contain commas
                 args = {}
-                for pair in args_str.split(","):
-                    if "=" in pair:
-                        k, v = pair.split("=", 1)
-                        args[k.strip()] = v.strip().strip("'").strip('"')
+                for key, single, double, bare in ARG_PAIR_PATTERN.findall(args_str):
+                    value = single or double or bare
+                    args[key] = value.strip().strip("'").strip('"')
                 
                 return {"tool": tool_name, "args": args}
             except Exception as e:
                 logger.error(f"Failed to parse tool call: {e}")
         return None
+
+    def parse_tool_plan(self, response: str, max_calls: Optional[int] = None) -> List[dict]:
+        """Parses every TOOL line of a response (a multi-tool plan); identical calls are dropped."""
+        if max_calls is None:
+            max_calls = getattr(config_settings, 'TOOL_PLAN_MAX_CALLS', 3)
+        calls = []
+        seen = set()
+        for line in response.splitlines():
+            call = self.parse_tool_call(line)
+            if not call:
+                continue
+            signature = (call['tool'], tuple(sorted(call['args'].items())))
+            if signature in seen:
+                continue
+            seen.add(signature)
+            calls.append(call)
+            if len(calls) >= max_calls:
+                break
+        return calls
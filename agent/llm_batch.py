@@ -0,0 +1,377 @@
+"""
+Batched LLM Inference
+
+Serves several concurrent completions on the main model in one llama.cpp decode
+loop. Each request gets its own sequence (KV slot) in a shared context; every
+step packs one generated token per running sequence plus prompt chunks of newly
+admitted requests into a single llama_batch, which gives much higher total
+tokens/s than decoding the requests one after another.
+
+Only plain completions are batched (no grammar, no prompt lookup) - those still
+go through LLMClient.infer_blocking. Up to LLM_PARALLEL_SEQUENCES requests run
+at once, further ones wait for a free slot.
+"""
+
+import codecs
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Optional
+
+try:
+    import numpy as np
+    import llama_cpp as llama_cpp_lib
+except ImportError:
+    np = None
+    llama_cpp_lib = None
+
+logger = logging.getLogger(__name__)
+
+# Same defaults and order as Llama.create_completion (top-k, top-p, min-p, then temperature),
+# so batched output matches the serial path
+TEMPERATURE = 0.8
+TOP_K = 40
+TOP_P = 0.95
+MIN_P = 0.05
+
+
+class _Sequence:
+    """State of one request inside the decode loop."""
+
+    def __init__(self, request: dict, timings: dict, future: Future,
+                 on_token: Optional[Callable[[str], None]], cancel_event: Optional[threading.Event]):
+        self.request = request
+        self.timings = timings
+        self.future = future
+        self.on_token = on_token
+        self.cancel_event = cancel_event
+        self.slot = -1
+        self.pending: List[int] = []  # Prompt tokens not yet decoded
+        self.n_prompt = 0
+        self.n_past = 0  # Next KV position of this sequence
+        self.max_tokens = 0
+        self.generated: List[int] = []
+        self.next_token: Optional[int] = None  # Sampled, not yet decoded
+        self.logits_index = -1  # Position in the current batch whose logits belong to us
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.text = ""
+        self.emitted = 0  # Characters already streamed to on_token
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancelled() or (self.cancel_event is not None and self.cancel_event.is_set())
+
+
+class BatchedInferenceEngine:
+    """Multi-sequence decode loop over a second llama.cpp context on the main model's weights."""
+
+    def __init__(self, model, n_parallel: int, n_ctx: int, n_batch: int, n_threads: int,
+                 lock: Optional[threading.Lock] = None):
+        """
+        Args:
+            model: Loaded llama_cpp.Llama (weights are shared, not copied)
+            n_parallel: Max concurrent sequences (KV slots)
+            n_ctx: Context per sequence; the shared context holds n_ctx * n_parallel
+            n_batch: Max tokens per decode step
+            n_threads: CPU threads for decoding
+            lock: Held around each decode step (the serial path's inference lock)
+        """
+        if llama_cpp_lib is None or np is None:
+            raise RuntimeError("llama-cpp-python not installed")
+        self.model = model
+        self.n_parallel = n_parallel
+        self.n_ctx_seq = n_ctx
+        self.n_batch = max(n_batch, n_parallel)
+        self.lock = lock or threading.Lock()
+        self.n_vocab = model.n_vocab()
+        self._model_ptr = model._model.model
+
+        params = llama_cpp_lib.llama_context_default_params()
+        params.n_ctx = n_ctx * n_parallel
+        params.n_batch = self.n_batch
+        if hasattr(params, 'n_ubatch'):
+            params.n_ubatch = self.n_batch
+        params.n_threads = n_threads
+        params.n_threads_batch = n_threads
+        if hasattr(params, 'n_seq_max'):
+            params.n_seq_max = n_parallel
+        self._ctx = llama_cpp_lib.llama_new_context_with_model(self._model_ptr, params)
+        if not self._ctx:
+            raise RuntimeError("failed to create batched llama context")
+        self._batch = llama_cpp_lib.llama_batch_init(self.n_batch, 0, n_parallel)
+
+        self._queue = deque()
+        self._active: List[_Sequence] = []
+        self._free_slots = list(range(n_parallel))
+        self._cond = threading.Condition()
+        self._closed = False
+        self._rng = np.random.default_rng()
+
+        # Stats
+        self.completed = 0
+        self.failed = 0
+        self.steps = 0
+        self.tokens_decoded = 0
+        self.peak_active = 0
+
+        self._thread = threading.Thread(target=self._run, name="llm-batch", daemon=True)
+        self._thread.start()
+        logger.info(f"Batched inference ready: {n_parallel} sequences x {n_ctx} ctx, batch {self.n_batch}")
+
+    def submit(self, request: dict, timings: dict,
+               on_token: Optional[Callable[[str], None]] = None,
+               cancel_event: Optional[threading.Event] = None) -> Future:
+        """Queues a completion. The future resolves to a llama-style output dict.
+
+        on_token is called from the decode thread with each new piece of text.
+        Cancelling the future (or setting cancel_event) stops the sequence at the next step.
+        """
+        future = Future()
+        seq = _Sequence(request, timings, future, on_token, cancel_event)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("batched inference engine closed")
+            self._queue.append(seq)
+            self._cond.notify()
+        return future
+
+    def close(self):
+        """Stops the decode loop, fails waiting requests and frees the context."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            logger.warning("Batched inference thread did not stop - leaking its context")
+            return
+        if self._batch is not None:
+            llama_cpp_lib.llama_batch_free(self._batch)
+            self._batch = None
+        if self._ctx:
+            llama_cpp_lib.llama_free(self._ctx)
+            self._ctx = None
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+            active = len(self._active)
+        return {
+            'slots': self.n_parallel,
+            'active': active,
+            'queued': queued,
+            'peak_active': self.peak_active,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_batch_tokens': round(self.tokens_decoded / self.steps, 1) if self.steps else 0
+        }
+
+    # --- Decode loop (engine thread) ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._queue and not self._active:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                self._admit()
+            try:
+                self._step()
+            except Exception as e:
+                logger.error(f"Batched decode failed: {type(e).__name__}: {e}")
+                for seq in list(self._active):
+                    self._finish(seq, error=e)
+
+        for seq in list(self._active):
+            self._finish(seq, error=RuntimeError("batched inference engine closed"))
+        while self._queue:
+            self._resolve(self._queue.popleft().future, error=RuntimeError("batched inference engine closed"))
+
+    def _admit(self):
+        """Moves queued requests into free KV slots (called with _cond held)."""
+        while self._queue and self._free_slots:
+            seq = self._queue.popleft()
+            if seq.cancelled:
+                continue
+            try:
+                tokens = self.model.tokenize(seq.request['prompt'].encode('utf-8'), add_bos=True, special=True)
+                if len(tokens) >= self.n_ctx_seq:
+                    raise ValueError(f"Requested tokens ({len(tokens)}) exceed context window of {self.n_ctx_seq}")
+            except Exception as e:
+                self.failed += 1
+                self._resolve(seq.future, error=e)
+                continue
+            seq.slot = self._free_slots.pop(0)
+            seq.pending = list(tokens)
+            seq.n_prompt = len(tokens)
+            seq.max_tokens = min(seq.request['max_tokens'], self.n_ctx_seq - len(tokens))
+            llama_cpp_lib.llama_kv_cache_seq_rm(self._ctx, seq.slot, -1, -1)
+            seq.timings['start'] = seq.timings['eval_start'] = time.perf_counter()
+            self._active.append(seq)
+        self.peak_active = max(self.peak_active, len(self._active))
+
+    def _step(self):
+        """One llama_decode over all active sequences, then sampling for each."""
+        for seq in [s for s in self._active if s.cancelled]:
+            self._finish(seq, reason="cancelled")
+        if not self._active:
+            return
+
+        batch = self._batch
+        batch.n_tokens = 0
+
+        def add(seq: _Sequence, token: int, logits: bool):
+            i = batch.n_tokens
+            batch.token[i] = token
+            batch.pos[i] = seq.n_past
+            batch.n_seq_id[i] = 1
+            batch.seq_id[i][0] = seq.slot
+            batch.logits[i] = logits
+            if logits:
+                seq.logits_index = i
+            seq.n_past += 1
+            batch.n_tokens += 1
+
+        # Generated tokens first (one each, keeps running requests streaming),
+        # then prompt chunks of newly admitted requests in the remaining space
+        for seq in self._active:
+            seq.logits_index = -1
+            if seq.next_token is not None:
+                add(seq, seq.next_token, True)
+                seq.next_token = None
+        for seq in self._active:
+            room = self.n_batch - batch.n_tokens
+            if not seq.pending or room <= 0:
+                continue
+            chunk, seq.pending = seq.pending[:room], seq.pending[room:]
+            for index, token in enumerate(chunk):
+                add(seq, token, not seq.pending and index == len(chunk) - 1)
+
+        if batch.n_tokens == 0:
+            return
+        with self.lock:
+            result = llama_cpp_lib.llama_decode(self._ctx, batch)
+        if result != 0:
+            raise RuntimeError(f"llama_decode returned {result}")
+        self.steps += 1
+        self.tokens_decoded += batch.n_tokens
+
+        now = time.perf_counter()
+        for seq in list(self._active):
+            if seq.logits_index < 0:
+                continue  # Prompt not fully decoded yet
+            if seq.first_token_at is None:
+                seq.first_token_at = now
+            token = self._sample(seq.logits_index)
+            if self._is_eog(token):
+                self._finish(seq, reason="stop")
+                continue
+            seq.generated.append(token)
+            if self._append_text(seq, token):
+                self._finish(seq, reason="stop")
+            elif len(seq.generated) >= seq.max_tokens:
+                self._finish(seq, reason="length")
+            else:
+                seq.next_token = token
+
+    def _sample(self, index: int) -> int:
+        """Top-k / top-p / min-p / temperature sampling from the logits at batch position `index`."""
+        ptr = llama_cpp_lib.llama_get_logits_ith(self._ctx, index)
+        logits = np.ctypeslib.as_array(ptr, shape=(self.n_vocab,)).astype(np.float64)
+        top = np.argpartition(logits, -TOP_K)[-TOP_K:]
+        top = top[np.argsort(logits[top])[::-1]]
+        logits = logits[top] - logits[top[0]]
+        # The cut-offs work on the untempered distribution, like llama.cpp's sampler chain
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        keep = int(np.searchsorted(np.cumsum(probs), TOP_P)) + 1
+        keep = min(keep, int(np.count_nonzero(probs >= MIN_P * probs[0])))
+        probs = np.exp(logits[:keep] / TEMPERATURE)
+        probs /= probs.sum()
+        return int(top[self._rng.choice(keep, p=probs)])
+
+    def _is_eog(self, token: int) -> bool:
+        if hasattr(llama_cpp_lib, 'llama_token_is_eog'):
+            return bool(llama_cpp_lib.llama_token_is_eog(self._model_ptr, token))
+        return token == self.model.token_eos()
+
+    def _append_text(self, seq: _Sequence, token: int) -> bool:
+        """Adds a token's text, streams what is safe to emit. Returns True if a stop sequence was hit."""
+        seq.text += seq.decoder.decode(self.model.detokenize([token]))
+        stops = [s for s in seq.request.get('stop') or [] if s]
+        hits = [seq.text.find(s) for s in stops if s in seq.text]
+        if hits:
+            seq.text = seq.text[:min(hits)]
+            self._emit(seq, len(seq.text))
+            return True
+        # Hold back a tail that could still turn into a stop sequence
+        holdback = 0
+        for stop in stops:
+            for length in range(min(len(stop) - 1, len(seq.text)), 0, -1):
+                if seq.text.endswith(stop[:length]):
+                    holdback = max(holdback, length)
+                    break
+        self._emit(seq, len(seq.text) - holdback)
+        return False
+
+    @staticmethod
+    def _emit(seq: _Sequence, upto: int):
+        if seq.on_token is None or upto <= seq.emitted:
+            return
+        piece = seq.text[seq.emitted:upto]
+        seq.emitted = upto
+        try:
+            seq.on_token(piece)
+        except Exception as e:
+            logger.debug(f"on_token callback failed: {e}")
+
+    def _finish(self, seq: _Sequence, reason: str = None, error: Exception = None):
+        """Releases the slot and resolves the caller's future."""
+        if seq in self._active:
+            self._active.remove(seq)
+        if seq.slot >= 0:
+            llama_cpp_lib.llama_kv_cache_seq_rm(self._ctx, seq.slot, -1, -1)
+            with self._cond:
+                self._free_slots.append(seq.slot)
+            seq.slot = -1
+        if seq.future.done():
+            return
+        if error is not None:
+            self.failed += 1
+            self._resolve(seq.future, error=error)
+            return
+
+        if reason != "cancelled":
+            self._emit(seq, len(seq.text))
+        end = time.perf_counter()
+        first = seq.first_token_at or end
+        seq.timings.update({
+            'end': end,
+            'prompt_eval_ms': (first - seq.timings['eval_start']) * 1000,
+            'eval_ms': (end - first) * 1000,
+            'n_eval': len(seq.generated)
+        })
+        self.completed += 1
+        completion_tokens = len(seq.generated)
+        self._resolve(seq.future, result={
+            'choices': [{'text': seq.text, 'finish_reason': reason}],
+            'usage': {
+                'prompt_tokens': seq.n_prompt,
+                'completion_tokens': completion_tokens,
+                'total_tokens': seq.n_prompt + completion_tokens
+            }
+        })
+
+    @staticmethod
+    def _resolve(future: Future, result: dict = None, error: Exception = None):
+        """Sets the outcome unless the caller cancelled the future meanwhile."""
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
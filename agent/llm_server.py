@@ -0,0 +1,445 @@
+"""
+LLM Inference Server
+
+Out-of-process inference (LLM_SERVER_MODE). A long-lived worker process owns the
+GGUF model(s) and serves completion requests over a Unix socket, so agent restarts
+do not reload the model and a hung generation can be cancelled or killed without
+pinning a thread inside the agent.
+
+Protocol: one JSON object per line.
+    -> {"op": "infer", "id": 1, "request": {...}}   <- {"id": 1, "output": {...}, "timings": {...}}
+       ("stream": true adds                            <- {"id": 1, "token": "..."} per text piece)
+    -> {"op": "cancel", "id": 1}                      (the infer reply arrives with partial output)
+    -> {"op": "status", "id": 2}                      <- {"id": 2, "status": {...}}
+
+Server (started automatically by LLMClient, or manually):
+    python -m agent.llm_server [--socket /tmp/rpi_ai_llm.sock]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STREAM_LIMIT = 16 * 1024 * 1024  # Max JSON line size (long prompts)
+
+
+class ServerUnavailableError(ConnectionError):
+    """The inference server is not reachable or was killed."""
+
+
+def server_mode_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+
+def socket_path() -> str:
+    return getattr(config_settings, 'LLM_SERVER_SOCKET', '/tmp/rpi_ai_llm.sock')
+
+
+def pid_path(path: str) -> str:
+    return f"{path}.pid"
+
+
+class InferenceServer:
+    """Owns an in-process LLMClient and serves its local models over a Unix socket."""
+
+    def __init__(self, path: str):
+        from .llm import LLMClient
+        self.path = path
+        self.client = LLMClient(use_server=False)
+        # One generation at a time - the model context is shared (see LLMClient._inference_lock)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-server")
+        self.start_time = time.time()
+        self.requests_served = 0
+        self.active: Dict[tuple, threading.Event] = {}  # (connection id, request id) -> cancel event
+        self._connection_ids = itertools.count(1)
+
+    async def run(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Stale socket from a previous (killed) server
+        with open(pid_path(self.path), 'w') as f:
+            f.write(str(os.getpid()))
+
+        self.client.start_loading()
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.path, limit=STREAM_LIMIT)
+        logger.info(f"LLM inference server listening on {self.path} (pid {os.getpid()})")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        async with server:
+            await stop.wait()
+
+        logger.info("LLM inference server stopping.")
+        for event in self.active.values():
+            event.set()
+        for path in (self.path, pid_path(self.path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def get_status(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'model_ready': self.client.llm is not None,
+            'loading': self.client.is_loading,
+            'model': self.client.model_filename,
+            'load_time': self.client.model_load_duration,
+            'uptime': time.time() - self.start_time,
+            'requests_served': self.requests_served,
+            'active': len(self.active),
+            'batch': self.client.get_batch_stats()
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn_id = next(self._connection_ids)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(message: dict):
+            async with write_lock:
+                writer.write((json.dumps(message) + "\n").encode('utf-8'))
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                op = message.get('op')
+                if op == 'infer':
+                    task = asyncio.create_task(self._serve_infer(conn_id, message, send))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif op == 'cancel':
+                    event = self.active.get((conn_id, message.get('id')))
+                    if event:
+                        event.set()
+                elif op == 'status':
+                    await send({'id': message.get('id'), 'status': self.get_status()})
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"Connection {conn_id} error: {e}")
+        finally:
+            # Caller went away (e.g. agent restart) - abandon its generations
+            for (cid, _), event in list(self.active.items()):
+                if cid == conn_id:
+                    event.set()
+            writer.close()
+
+    async def _serve_infer(self, conn_id: int, message: dict, send):
+        req_id = message.get('id')
+        received = time.perf_counter()
+        cancel_event = threading.Event()
+        self.active[(conn_id, req_id)] = cancel_event
+        try:
+            if not await self.client.wait_until_ready():
+                await send({'id': req_id, 'error': "model not available"})
+                return
+            timings = {}
+            request = message['request']
+            if self.client.batch_eligible(request):
+                # Concurrent requests (from any connection) share one decode loop
+                on_token = None
+                if message.get('stream'):
+                    on_token = lambda piece: asyncio.ensure_future(self._send_token(send, req_id, piece))
+                output = await self.client.infer_batched(request, timings, on_token, cancel_event)
+            else:
+                loop = asyncio.get_running_loop()
+                output = await loop.run_in_executor(
+                    self.executor, self.client.infer_blocking, request, timings, cancel_event
+                )
+            self.requests_served += 1
+            # perf_counter is per process - send offsets relative to receipt
+            relative = {k: (v - received if k in ('start', 'eval_start', 'end') else v) for k, v in timings.items()}
+            await send({'id': req_id, 'output': output, 'timings': relative})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"Request {req_id} failed: {e}")
+            try:
+                await send({'id': req_id, 'error': str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            self.active.pop((conn_id, req_id), None)
+
+
+    @staticmethod
+    async def _send_token(send, req_id: int, piece: str):
+        try:
+            await send({'id': req_id, 'token': piece})
+        except ConnectionError:
+            pass
+
+
+class InferenceServerClient:
+    """Thin async client for InferenceServer with timeouts, cancellation and reconnect."""
+
+    def __init__(self, path: str = None):
+        self.path = path or socket_path()
+        self.autostart = getattr(config_settings, 'LLM_SERVER_AUTOSTART', True)
+        self.request_timeout = getattr(config_settings, 'LLM_SERVER_REQUEST_TIMEOUT', 180)
+        self.cancel_grace = getattr(config_settings, 'LLM_SERVER_CANCEL_GRACE', 10)
+        self.model_ready = False
+        self.server_pid: Optional[int] = None
+        self.kills = 0
+        self.reconnects = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._token_callbacks: Dict[int, Callable[[str], None]] = {}
+        self._ids = itertools.count(1)
+
+    # --- Blocking helpers (used from the LLMClient loader thread) ---
+
+    def _status_blocking(self, timeout: float = 2.0) -> Optional[dict]:
+        """One-shot status request over a plain socket. None if the server is unreachable."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(self.path)
+                sock.sendall(b'{"op": "status", "id": 0}\n')
+                data = b""
+                while not data.endswith(b"\n"):
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+            return json.loads(data).get('status')
+        except (OSError, ValueError):
+            return None
+
+    def _spawn_server(self):
+        log_file = open(getattr(config_settings, 'LLM_SERVER_LOG_FILE', 'llm_server.log'), 'a', encoding='utf-8')
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "agent.llm_server", "--socket", self.path],
+            cwd=PROJECT_ROOT,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True  # Survives agent restarts
+        )
+        log_file.close()
+        logger.info(f"Spawned LLM inference server (pid {proc.pid})")
+
+    def ensure_server_blocking(self, timeout: float) -> bool:
+        """Attaches to a running server (spawning one if needed) and waits for its model."""
+        status = self._status_blocking()
+        if status is None:
+            if not self.autostart:
+                logger.error(f"LLM inference server not running at {self.path} (LLM_SERVER_AUTOSTART is off)")
+                return False
+            self._spawn_server()
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status = self._status_blocking()
+            if status:
+                self.server_pid = status.get('pid')
+                if status.get('model_ready'):
+                    self.model_ready = True
+                    logger.info(f"Attached to LLM inference server (pid {self.server_pid}, model {status.get('model')})")
+                    return True
+                if not status.get('loading'):
+                    logger.error("LLM inference server has no model loaded.")
+                    return False
+            time.sleep(0.5)
+        logger.warning(f"LLM inference server not ready after {timeout}s")
+        return False
+
+    def kill_server(self):
+        """Kills a hung server; the next request respawns it."""
+        pid = self.server_pid
+        if pid is None and os.path.exists(pid_path(self.path)):
+            try:
+                with open(pid_path(self.path)) as f:
+                    pid = int(f.read().strip())
+            except (OSError, ValueError):
+                pid = None
+        if pid:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                self.kills += 1
+                logger.error(f"Killed hung LLM inference server (pid {pid})")
+            except ProcessLookupError:
+                pass
+        self.model_ready = False
+        self.server_pid = None
+
+    # --- Async request path ---
+
+    async def _ensure_connected(self):
+        if self._writer is not None and not self._writer.is_closing():
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.path, limit=STREAM_LIMIT),
+                    timeout=getattr(config_settings, 'LLM_SERVER_CONNECT_TIMEOUT', 5)
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                self.model_ready = False
+                raise ServerUnavailableError(f"cannot connect to {self.path}: {e}")
+            self.reconnects += 1
+            self._reader_task = asyncio.create_task(self._read_loop())
+            await self._refresh_status()
+
+    async def _refresh_status(self):
+        """Reads model readiness over the (new) connection - a dropped connection says nothing about the model."""
+        req_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        try:
+            await self._send({'op': 'status', 'id': req_id})
+            reply = await asyncio.wait_for(future, getattr(config_settings, 'LLM_SERVER_CONNECT_TIMEOUT', 5))
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = None
+            self.model_ready = False
+            raise ServerUnavailableError(f"no status from inference server: {e}")
+        finally:
+            self._pending.pop(req_id, None)
+        status = reply.get('status') or {}
+        self.server_pid = status.get('pid', self.server_pid)
+        self.model_ready = bool(status.get('model_ready'))
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if 'token' in message:
+                    callback = self._token_callbacks.get(message.get('id'))
+                    if callback:
+                        callback(message['token'])
+                    continue
+                future = self._pending.pop(message.get('id'), None)
+                if future and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"LLM server connection error: {e}")
+        finally:
+            # Connection lost - fail everything in flight, reconnect on next request.
+            # model_ready is left alone: the next connect re-reads it from the server status
+            # (and a failed connect clears it).
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ServerUnavailableError("connection to inference server lost"))
+            self._pending.clear()
+
+    async def _send(self, message: dict):
+        self._writer.write((json.dumps(message) + "\n").encode('utf-8'))
+        await self._writer.drain()
+
+    async def infer(self, request: dict, timeout: Optional[float] = None,
+                    on_token: Optional[Callable[[str], None]] = None) -> tuple:
+        """Runs a completion on the server. Returns (output, timings) like the in-process path.
+
+        on_token receives streamed text pieces when the server batches the request;
+        otherwise it is called once with the whole text.
+
+        On timeout the generation is cancelled; if the server does not answer within
+        LLM_SERVER_CANCEL_GRACE it is considered hung and killed. Task cancellation is
+        forwarded to the server as well.
+        """
+        await self._ensure_connected()
+        req_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        streamed = []
+        if on_token is not None:
+            def forward(piece: str):
+                streamed.append(piece)
+                on_token(piece)
+            self._token_callbacks[req_id] = forward
+        sent = time.perf_counter()
+        await self._send({'op': 'infer', 'id': req_id, 'request': request, 'stream': on_token is not None})
+
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(future), timeout or self.request_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM request {req_id} timed out - cancelling on server")
+            await self._cancel(req_id)
+            try:
+                await asyncio.wait_for(future, self.cancel_grace)
+            except asyncio.TimeoutError:
+                self.kill_server()
+                raise ServerUnavailableError("inference server hung and was killed")
+            raise
+        except asyncio.CancelledError:
+            await self._cancel(req_id)
+            raise
+        finally:
+            self._pending.pop(req_id, None)
+            self._token_callbacks.pop(req_id, None)
+
+        if 'error' in reply:
+            raise RuntimeError(f"inference server: {reply['error']}")
+        self.model_ready = True  # The server just ran a completion
+        timings = {k: (sent + v if k in ('start', 'eval_start', 'end') else v) for k, v in reply.get('timings', {}).items()}
+        if on_token is not None and not streamed:
+            on_token(reply['output']['choices'][0]['text'])
+        return reply['output'], timings
+
+    async def _cancel(self, req_id: int):
+        try:
+            if self._writer is not None and not self._writer.is_closing():
+                await self._send({'op': 'cancel', 'id': req_id})
+        except ConnectionError:
+            pass
+
+    async def close(self):
+        """Closes the connection (the server keeps running for the next agent start)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task:
+            self._reader_task.cancel()
+
+    def get_stats(self) -> dict:
+        return {
+            'socket': self.path,
+            'server_pid': self.server_pid,
+            'model_ready': self.model_ready,
+            'in_flight': len(self._pending),
+            'connections': self.reconnects,
+            'kills': self.kills
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM inference server")
+    parser.add_argument("--socket", default=socket_path(), help="Unix socket path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - llm_server - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(InferenceServer(args.socket).run())
+
+
+if __name__ == "__main__":
+    main()
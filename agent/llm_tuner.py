@@ -0,0 +1,294 @@
+"""
+LLM Autotuner
+
+Benchmarks llama.cpp settings (n_threads, n_batch, n_ctx and the cached GGUF
+quantisations) on this host and writes the Pareto-best profile per resource
+tier to JSON. LLMClient loads that profile at startup (see load_profile).
+
+Every trial runs in its own subprocess so peak RSS is measured per configuration.
+
+CLI (from project root):
+    python -m agent.llm_tuner           # quick grid
+    python -m agent.llm_tuner --full    # full grid
+Used by !debug llm-tune.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+RESULT_PREFIX = "RESULT "
+PROGRESS_PREFIX = "PROGRESS "
+
+# Fixed prompt set mirroring real call sites (memory filter, decision, chat)
+TUNE_PROMPTS = [
+    ("You are a strict data filter. Output ONLY the filtered fact.",
+     "You are a memory optimizer. Extract the core, factual information from the following text.\n\n"
+     "Text: The Raspberry Pi 5 uses a Broadcom BCM2712 quad-core Arm Cortex-A76 processor running at "
+     "2.4 GHz and is available with 4 GB or 8 GB of LPDDR4X RAM."),
+    ("Jsi autonomní AI agent. Formát: TOOL: web_tool | ARGS: action='search', query='...'",
+     "Context: Boredom 85%, no recent actions.\n\nDecide next action:"),
+    ("You are a helpful AI assistant. Be concise and accurate.",
+     "Explain in three sentences why small language models are useful on edge devices."),
+]
+TUNE_MAX_TOKENS = 64
+
+
+def tier_contexts() -> Dict[int, int]:
+    """Context size per resource tier from config."""
+    return {
+        0: getattr(config_settings, 'LLM_CONTEXT_NORMAL', 1024),
+        1: getattr(config_settings, 'LLM_CONTEXT_TIER1', 768),
+        2: getattr(config_settings, 'LLM_CONTEXT_TIER2', 512),
+        3: getattr(config_settings, 'LLM_CONTEXT_TIER3', 256)
+    }
+
+
+def profile_path() -> str:
+    return getattr(config_settings, 'LLM_TUNED_PROFILE_FILE', 'llm_profile.json')
+
+
+def find_models(cache_dir: str = None) -> List[str]:
+    """Returns paths of all cached GGUF files (one per filename)."""
+    cache_dir = cache_dir or getattr(config_settings, 'MODEL_CACHE_DIR', "./models/")
+    models = {}
+    for path in sorted(glob.glob(os.path.join(cache_dir, "**", "*.gguf"), recursive=True)):
+        models.setdefault(os.path.basename(path), path)
+    return list(models.values())
+
+
+def build_grid(models: List[str], full: bool = False) -> List[dict]:
+    """Builds the trial grid: model x n_threads x n_batch x n_ctx."""
+    cores = os.cpu_count() or 1
+    if full:
+        threads = list(range(1, cores + 1))
+        batches = [32, 128, 512]
+    else:
+        threads = sorted({max(1, cores // 2), cores})
+        batches = [64, 512]
+    contexts = sorted(set(tier_contexts().values()))
+    return [
+        {'model_path': model, 'n_threads': t, 'n_batch': b, 'n_ctx': c}
+        for model, t, b, c in itertools.product(models, threads, batches, contexts)
+    ]
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    try:
+        import resource
+        # ru_maxrss is KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+
+def run_trial(config: dict) -> dict:
+    """Loads one configuration and runs the prompt set (called in a child process)."""
+    from llama_cpp import Llama
+    from .llm import LLMClient
+
+    result = dict(config)
+    start = time.perf_counter()
+    model = Llama(
+        model_path=config['model_path'],
+        verbose=False,
+        n_ctx=config['n_ctx'],
+        n_threads=config['n_threads'],
+        n_batch=config['n_batch'],
+        use_mmap=getattr(config_settings, 'LLM_USE_MMAP', True)
+    )
+    result['load_s'] = round(time.perf_counter() - start, 2)
+
+    # Warm-up (first call pays for page faults of the mmapped weights)
+    model("<|im_start|>user\nHi<|im_end|>\n<|im_start|>assistant\n", max_tokens=2, echo=False)
+
+    prompt_ms = eval_ms = 0.0
+    prompt_tokens = eval_tokens = 0
+    wall_s = 0.0
+    for system_prompt, prompt in TUNE_PROMPTS:
+        formatted = f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{prompt}<|im_end|>\n<|im_start|>assistant\n"
+        model.reset()  # No prompt cache between prompts - measure full prompt eval
+        LLMClient._reset_llama_timings(model)
+        call_start = time.perf_counter()
+        output = model(formatted, max_tokens=TUNE_MAX_TOKENS, temperature=0.0, stop=["<|im_end|>"], echo=False)
+        wall_s += time.perf_counter() - call_start
+        timings = LLMClient._read_llama_timings(model)
+        usage = output.get('usage', {})
+        if timings:
+            prompt_ms += timings['prompt_eval_ms']
+            eval_ms += timings['eval_ms']
+            eval_tokens += timings['n_eval']
+        else:
+            eval_tokens += usage.get('completion_tokens', 0)
+        prompt_tokens += usage.get('prompt_tokens', 0)
+
+    result['prompt_tps'] = round(prompt_tokens / (prompt_ms / 1000), 2) if prompt_ms else 0.0
+    result['gen_tps'] = round(eval_tokens / (eval_ms / 1000 if eval_ms else wall_s), 2) if eval_tokens else 0.0
+    result['peak_rss_mb'] = round(_peak_rss_mb(), 1)
+    return result
+
+
+def _run_trial_subprocess(config: dict, timeout: int) -> dict:
+    """Runs run_trial in a fresh interpreter so peak RSS is per configuration."""
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", "agent.llm_tuner", "--trial", json.dumps(config)],
+            capture_output=True, text=True, timeout=timeout
+        )
+        for line in proc.stdout.splitlines():
+            if line.startswith(RESULT_PREFIX):
+                return json.loads(line[len(RESULT_PREFIX):])
+        return dict(config, error=(proc.stderr.strip().splitlines() or ["no result"])[-1][:200])
+    except subprocess.TimeoutExpired:
+        return dict(config, error=f"timeout after {timeout}s")
+
+
+def pareto_front(trials: List[dict]) -> List[dict]:
+    """Trials not dominated on (gen_tps max, prompt_tps max, peak_rss_mb min)."""
+    def dominates(a, b):
+        no_worse = (a['gen_tps'] >= b['gen_tps'] and a['prompt_tps'] >= b['prompt_tps']
+                    and a['peak_rss_mb'] <= b['peak_rss_mb'])
+        better = (a['gen_tps'] > b['gen_tps'] or a['prompt_tps'] > b['prompt_tps']
+                  or a['peak_rss_mb'] < b['peak_rss_mb'])
+        return no_worse and better
+    return [t for t in trials if not any(dominates(other, t) for other in trials if other is not t)]
+
+
+def select_profiles(trials: List[dict]) -> Dict[str, dict]:
+    """Picks one Pareto-optimal configuration per resource tier.
+
+    Tier N may use at most (cores - N) threads. Tiers 0-1 take the fastest
+    generation; tiers 2-3 (memory pressure) take the smallest RSS that keeps
+    at least 80% of the best generation speed.
+    """
+    cores = os.cpu_count() or 1
+    ok = [t for t in trials if 'error' not in t and t.get('gen_tps')]
+    profiles = {}
+    for tier, n_ctx in tier_contexts().items():
+        thread_cap = max(1, cores - tier)
+        candidates = [t for t in ok if t['n_ctx'] == n_ctx and t['n_threads'] <= thread_cap]
+        if not candidates:
+            continue
+        front = pareto_front(candidates)
+        if tier <= 1:
+            best = max(front, key=lambda t: (t['gen_tps'], -t['peak_rss_mb']))
+        else:
+            floor = 0.8 * max(t['gen_tps'] for t in front)
+            best = min((t for t in front if t['gen_tps'] >= floor), key=lambda t: (t['peak_rss_mb'], -t['gen_tps']))
+        profiles[str(tier)] = {
+            'model_path': best['model_path'],
+            'model_filename': os.path.basename(best['model_path']),
+            'n_threads': best['n_threads'],
+            'n_batch': best['n_batch'],
+            'n_ctx': best['n_ctx'],
+            'gen_tps': best['gen_tps'],
+            'prompt_tps': best['prompt_tps'],
+            'peak_rss_mb': best['peak_rss_mb']
+        }
+    return profiles
+
+
+def host_signature() -> dict:
+    return {'machine': platform.machine(), 'cpu_count': os.cpu_count()}
+
+
+def save_profile(trials: List[dict], path: str = None) -> dict:
+    """Writes tier profiles + raw trials to JSON (temp file + rename)."""
+    path = path or profile_path()
+    profile = {
+        'version': PROFILE_VERSION,
+        'generated_at': time.time(),
+        'host': host_signature(),
+        'tiers': select_profiles(trials),
+        'trials': trials
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp_path, path)
+    return profile
+
+
+def load_profile(path: str = None) -> Optional[dict]:
+    """Loads the tuned profile if it exists and was generated on matching hardware."""
+    path = path or profile_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        if profile.get('version') != PROFILE_VERSION:
+            logger.warning(f"Ignoring LLM profile {path}: unsupported version")
+            return None
+        if profile.get('host') != host_signature():
+            logger.warning(f"Ignoring LLM profile {path}: generated on different hardware ({profile.get('host')})")
+            return None
+        if not profile.get('tiers'):
+            return None
+        return profile
+    except Exception as e:
+        logger.warning(f"Failed to load LLM profile {path}: {e}")
+        return None
+
+
+def run_tuning(full: bool = False, timeout: int = 600) -> Optional[dict]:
+    """Runs the whole grid, printing progress lines, and saves the profile."""
+    models = find_models()
+    if not models:
+        print("❌ No cached GGUF models found - start the agent once to download the model.")
+        return None
+
+    grid = build_grid(models, full=full)
+    print(f"🔧 Tuning {len(grid)} configurations over {len(models)} model file(s)...", flush=True)
+    trials = []
+    for index, config in enumerate(grid, 1):
+        result = _run_trial_subprocess(config, timeout)
+        trials.append(result)
+        label = f"{os.path.basename(config['model_path'])} t={config['n_threads']} b={config['n_batch']} ctx={config['n_ctx']}"
+        if 'error' in result:
+            print(f"{PROGRESS_PREFIX}{index}/{len(grid)} {label}: ✖️ {result['error']}", flush=True)
+        else:
+            print(f"{PROGRESS_PREFIX}{index}/{len(grid)} {label}: gen {result['gen_tps']} tok/s, "
+                  f"prompt {result['prompt_tps']} tok/s, RSS {result['peak_rss_mb']} MB", flush=True)
+
+    profile = save_profile(trials)
+    print(f"✅ Profile written to {profile_path()}")
+    for tier, best in sorted(profile['tiers'].items()):
+        print(f"  Tier {tier}: {best['model_filename']} threads={best['n_threads']} batch={best['n_batch']} "
+              f"ctx={best['n_ctx']} ({best['gen_tps']} tok/s, {best['peak_rss_mb']} MB)")
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark llama.cpp settings and write the LLM profile")
+    parser.add_argument("--full", action="store_true", help="Full grid (all thread counts, 3 batch sizes)")
+    parser.add_argument("--timeout", type=int, default=600, help="Timeout per trial in seconds")
+    parser.add_argument("--trial", help=argparse.SUPPRESS)  # Internal: run one trial (JSON config)
+    args = parser.parse_args()
+
+    if args.trial:
+        result = run_trial(json.loads(args.trial))
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return
+
+    run_tuning(full=args.full, timeout=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
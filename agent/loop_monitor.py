@@ -0,0 +1,164 @@
+"""
+Loop Monitor Module
+
+Measures asyncio scheduling lag continuously and finds out what blocked the
+event loop.
+
+- lag_loop (on the event loop) sleeps LOOP_LAG_INTERVAL and records how late
+  it wakes up; the overshoot is the scheduling lag every other coroutine saw.
+- A watchdog thread checks the loop's heartbeat. Once the loop has been stuck
+  longer than LOOP_LAG_THRESHOLD_MS, it captures the loop thread's stack via
+  sys._current_frames() - while the blocking call is still running.
+- Captures are aggregated per function (innermost frame of our own code,
+  e.g. "agent/tools.py:execute"), with the blocked time attributed once the
+  loop wakes up again.
+
+Shown in !debug lag and on the dashboard.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+import config_settings
+from .telemetry import RollingStats
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopLagMonitor:
+    """Event-loop lag histogram plus stack capture of blocking calls."""
+
+    def __init__(self, interval: float = None, threshold_ms: float = None):
+        self.interval = interval or getattr(config_settings, 'LOOP_LAG_INTERVAL', 0.25)
+        self.threshold_ms = threshold_ms or getattr(config_settings, 'LOOP_LAG_THRESHOLD_MS', 100)
+        self.lag_ms = RollingStats(maxlen=getattr(config_settings, 'LOOP_LAG_WINDOW', 1200))
+        self.max_lag_ms = 0.0
+        self.stalls = 0  # Heartbeats later than the threshold
+
+        self._loop_thread_id: Optional[int] = None
+        self._beat = time.monotonic()  # Set by the loop before each sleep
+        self._beat_seq = 0
+        self._captured_seq = -1  # Heartbeat whose stall was already captured
+        self._pending_key: Optional[str] = None  # Offender waiting for its measured lag
+        self._offenders: Dict[str, dict] = {}
+        self._recent = deque(maxlen=20)  # (timestamp, lag_ms, key)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # --- Event loop side ---
+
+    async def run(self):
+        """Heartbeat loop (runs as an agent loop); starts the watchdog thread."""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._start_watchdog()
+        try:
+            while True:
+                start = loop.time()
+                self._beat = time.monotonic()
+                self._beat_seq += 1
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, (loop.time() - start - self.interval) * 1000)
+                self._record(lag)
+        finally:
+            self.stop()
+
+    def _record(self, lag: float):
+        self.lag_ms.add(lag)
+        self.max_lag_ms = max(self.max_lag_ms, lag)
+        if lag < self.threshold_ms:
+            return
+        self.stalls += 1
+        with self._lock:
+            key = self._pending_key or "(not captured)"
+            self._pending_key = None
+            stats = self._offenders.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': []})
+            stats['count'] += 1
+            stats['total_ms'] += lag
+            stats['max_ms'] = max(stats['max_ms'], lag)
+            self._recent.append((time.time(), lag, key))
+        if lag >= self.threshold_ms * 5:
+            logger.warning(f"Event loop blocked for {lag:.0f}ms in {key}")
+
+    # --- Watchdog thread ---
+
+    def _start_watchdog(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _watch(self):
+        check_every = min(self.interval, self.threshold_ms / 1000) / 2
+        while not self._stop_event.wait(check_every):
+            seq = self._beat_seq
+            overdue_ms = (time.monotonic() - self._beat - self.interval) * 1000
+            if overdue_ms >= self.threshold_ms and seq != self._captured_seq:
+                self._captured_seq = seq
+                self._capture()
+
+    def _capture(self):
+        """Grabs the loop thread's current stack and remembers the offending function."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        del frame
+        key = self._offender_key(stack)
+        with self._lock:
+            self._pending_key = key
+            stats = self._offenders.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': []})
+            stats['stack'] = [f"{self._short_path(f.filename)}:{f.lineno} {f.name}" for f in stack[-6:]]
+
+    @classmethod
+    def _offender_key(cls, stack: traceback.StackSummary) -> str:
+        """Innermost frame of project code (library frames are where it blocks, not who called it)."""
+        for frame in reversed(stack):
+            path = os.path.abspath(frame.filename)
+            if path.startswith(_PROJECT_ROOT) and 'site-packages' not in path and path != os.path.abspath(__file__):
+                return f"{cls._short_path(path)}:{frame.name}"
+        innermost = stack[-1]
+        return f"{cls._short_path(innermost.filename)}:{innermost.name}"
+
+    @staticmethod
+    def _short_path(path: str) -> str:
+        path = os.path.abspath(path)
+        if path.startswith(_PROJECT_ROOT):
+            return os.path.relpath(path, _PROJECT_ROOT).replace(os.sep, '/')
+        return os.path.basename(path)
+
+    # --- Introspection ---
+
+    def top_offenders(self, limit: int = 5) -> List[dict]:
+        """Functions that blocked the loop, by total blocked time."""
+        with self._lock:
+            items = [dict(stats, function=key) for key, stats in self._offenders.items() if stats['count']]
+        return sorted(items, key=lambda s: s['total_ms'], reverse=True)[:limit]
+
+    def get_stats(self) -> dict:
+        lag = self.lag_ms
+        return {
+            'watchdog': self._thread is not None and self._thread.is_alive(),
+            'interval_ms': round(self.interval * 1000),
+            'threshold_ms': self.threshold_ms,
+            'lag_p50_ms': round(lag.percentile(50), 1) if lag.samples else None,
+            'lag_p95_ms': round(lag.percentile(95), 1) if lag.samples else None,
+            'lag_p99_ms': round(lag.percentile(99), 1) if lag.samples else None,
+            'lag_max_ms': round(self.max_lag_ms),
+            'stalls': self.stalls,
+            'last_stall': time.strftime('%H:%M:%S', time.localtime(self._recent[-1][0])) if self._recent else "never"
+        }
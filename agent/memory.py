@@ -15,7 +15,7 @@ class VectorStore:
     def _initialize_db(self):
         """Initializes the SQLite database and extensions."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)  # Opened in a startup worker thread
             self.conn.row_factory = sqlite3.Row
             cursor = self.conn.cursor()
             
@@ -41,7 +41,7 @@ class VectorStore:
             if self.restore_from_backup():
                 logger.info("Successfully restored from backup. Retrying connection...")
                 try:
-                    self.conn = sqlite3.connect(self.db_path)
+                    self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
                     self.conn.row_factory = sqlite3.Row
                     cursor = self.conn.cursor()
                     cursor.execute("PRAGMA journal_mode=WAL;")
@@ -77,7 +77,7 @@ class VectorStore:
             logger.info(f"Moved corrupted database to {backup_path}. Starting fresh.")
         
         # Create new DB
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
         cursor = self.conn.cursor()
         cursor.execute("PRAGMA journal_mode=WAL;")
@@ -477,6 +477,17 @@ class VectorStore:
             logger.error(f"Failed to retrieve recent memories: {e}")
             return []
     
+    def get_memories_since(self, memory_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """Retrieves memories newer than memory_id (at most the newest `limit`), oldest first."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT * FROM memories WHERE id > ? ORDER BY id DESC LIMIT ?", (memory_id, limit))
+            rows = cursor.fetchall()
+            return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            logger.error(f"Failed to retrieve new memories: {e}")
+            return []
+    
     def count_memories_by_type(self, memory_type: str) -> int:
         """Count memories by their metadata type."""
         try:
@@ -491,6 +502,27 @@ class VectorStore:
             logger.error(f"Failed to count memories by type: {e}")
             return 0
 
+    def get_memories_by_type(self, memory_type: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Retrieves memories of one metadata type (metadata parsed to a dict), newest first."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT * FROM memories WHERE json_extract(metadata, '$.type') = ? ORDER BY id DESC LIMIT ?",
+                (memory_type, limit)
+            )
+            memories = []
+            for row in cursor.fetchall():
+                memory = dict(row)
+                try:
+                    memory['metadata'] = json.loads(memory.get('metadata') or "{}")
+                except (TypeError, ValueError):
+                    memory['metadata'] = {}
+                memories.append(memory)
+            return memories
+        except Exception as e:
+            logger.error(f"Failed to retrieve memories by type: {e}")
+            return []
+
     def delete_boredom_memories(self) -> int:
         """Deletes memories related to boredom."""
         try:
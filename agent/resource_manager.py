@@ -7,6 +7,8 @@ import os
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import config_settings
+from .system_metrics import get_metrics_sampler
+from .supervisor import get_supervisor
 
 logger = logging.getLogger(__name__)
 
@@ -60,23 +62,15 @@ class ResourceManager:
             logger.info(f"Protected process unregistered: {name} (PID: {pid})")
     
     def check_resources(self) -> ResourceUsage:
-        """Get current resource usage."""
-        cpu = psutil.cpu_percent(interval=1.0)
-        ram = psutil.virtual_memory().percent
-        disk = psutil.disk_usage('/').percent
-        
-        # Get swap usage if available
-        try:
-            swap = psutil.swap_memory().percent
-        except:
-            swap = 0.0
+        """Get current resource usage (from the shared metrics sampler, never blocks)."""
+        sample = get_metrics_sampler().latest()
         
         usage = ResourceUsage(
-            cpu_percent=cpu,
-            ram_percent=ram,
-            disk_percent=disk,
-            swap_percent=swap,
-            timestamp=asyncio.get_event_loop().time()
+            cpu_percent=sample.cpu_percent,
+            ram_percent=sample.ram_percent,
+            disk_percent=sample.disk_percent,
+            swap_percent=sample.swap_percent,
+            timestamp=sample.timestamp
         )
         
         self.last_check = usage
@@ -573,7 +567,7 @@ class NetworkMonitor:
                             logger.warning("ngrok tunnel stopped - attempting active restart...")
                             # Active Recovery
                             handler.ngrok_process = None # Clear old process ref
-                            asyncio.create_task(handler.start_ssh_tunnel())
+                            get_supervisor().spawn('ssh_tunnel', handler.start_ssh_tunnel())
                             failed_recoveries.append("ngrok (restarting...)")
                         else:
                             logger.info("✅ ngrok still running")
@@ -0,0 +1,135 @@
+"""
+Background Scheduler Module
+
+Decides when autonomous (boredom) work may start. Instead of waking up every
+BOREDOM_INTERVAL and firing regardless of what the host is doing, boredom_loop
+asks the scheduler every SCHEDULER_TICK seconds:
+
+- due:           boredom above the high threshold
+- opportunistic: boredom above the low threshold and the CPU is idle
+                 (SCHEDULER_IDLE_CPU) - uses idle windows early
+
+Work is admitted only with headroom: no interactive request (command, DM,
+mention) within SCHEDULER_INTERACTIVE_QUIET seconds, CPU / RAM / temperature
+below their limits, resource tier 0 and less than SCHEDULER_HOURLY_BUDGET
+seconds of background work in the last hour. Otherwise the run is deferred
+and the reason counted. Stats are shown in !debug boredom and the dashboard.
+"""
+
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Tuple
+
+import config_settings
+from .system_metrics import get_metrics_sampler
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+class BackgroundScheduler:
+    """Load-, thermal- and budget-aware admission of autonomous background work."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.tick_interval = getattr(config_settings, 'SCHEDULER_TICK', 30)
+        self.cpu_max = getattr(config_settings, 'SCHEDULER_CPU_MAX', 60.0)
+        self.idle_cpu = getattr(config_settings, 'SCHEDULER_IDLE_CPU', 20.0)
+        self.ram_max = getattr(config_settings, 'SCHEDULER_RAM_MAX', 80.0)
+        self.temp_max = getattr(config_settings, 'SCHEDULER_TEMP_MAX', 70.0)
+        self.interactive_quiet = getattr(config_settings, 'SCHEDULER_INTERACTIVE_QUIET', 120)
+        self.hourly_budget = getattr(config_settings, 'SCHEDULER_HOURLY_BUDGET', 900)
+
+        self.last_interactive = 0.0
+        self._work = deque()  # (start, end) of finished background work
+        self._running_since = None
+        self.started = {'due': 0, 'opportunistic': 0}
+        self.deferred = {}  # reason -> count
+        self.last_decision = "-"
+
+    def mark_interactive(self):
+        """Called for every command / DM / mention."""
+        self.last_interactive = time.time()
+
+    # --- Admission ---
+
+    def evaluate(self, boredom: float) -> bool:
+        """True if autonomous work should start now (counts started / deferred runs)."""
+        due = boredom > self.agent.BOREDOM_THRESHOLD_HIGH
+        cpu = get_metrics_sampler().cpu_average(30)
+        opportunistic = not due and boredom > self.agent.BOREDOM_THRESHOLD_LOW and cpu < self.idle_cpu
+        if not due and not opportunistic:
+            return False
+
+        ok, reason = self._admit(cpu)
+        if not ok:
+            # Idle-window runs are optional - only due work counts as deferred
+            if due:
+                self.deferred[reason] = self.deferred.get(reason, 0) + 1
+                self.last_decision = f"deferred ({reason})"
+                logger.debug(f"Background work deferred: {reason}")
+            return False
+
+        kind = 'due' if due else 'opportunistic'
+        self.started[kind] += 1
+        self.last_decision = f"started ({kind})"
+        return True
+
+    def _admit(self, cpu: float) -> Tuple[bool, str]:
+        now = time.time()
+        if now - self.last_interactive < self.interactive_quiet:
+            return False, "interactive"
+        # Replies actually in progress - an idle channel worker lingers for MESSAGE_WORKER_IDLE_TIMEOUT
+        if self.agent.pending_replies() or self.agent.actions.running_count('command'):
+            return False, "interactive"
+        if cpu >= self.cpu_max:
+            return False, "cpu"
+        sample = get_metrics_sampler().latest()
+        if sample.ram_percent >= self.ram_max:
+            return False, "ram"
+        if sample.temperature is not None and sample.temperature >= self.temp_max:
+            return False, "thermal"
+        if self.agent.resource_manager.current_tier > 0:
+            return False, "resource_tier"
+        if self.used_seconds() >= self.hourly_budget:
+            return False, "budget"
+        return True, ""
+
+    # --- Budget accounting ---
+
+    @asynccontextmanager
+    async def track(self):
+        """Wraps one run of background work so its duration counts against the hourly budget."""
+        start = time.time()
+        self._running_since = start
+        try:
+            yield
+        finally:
+            self._running_since = None
+            self._work.append((start, time.time()))
+
+    def used_seconds(self) -> float:
+        """Background work seconds within the last hour (including a run in progress)."""
+        now = time.time()
+        cutoff = now - HOUR
+        while self._work and self._work[0][1] < cutoff:
+            self._work.popleft()
+        used = sum(end - max(start, cutoff) for start, end in self._work)
+        if self._running_since is not None:
+            used += now - max(self._running_since, cutoff)
+        return used
+
+    def get_stats(self) -> dict:
+        quiet_left = self.interactive_quiet - (time.time() - self.last_interactive)
+        return {
+            'last_decision': self.last_decision,
+            'started_due': self.started['due'],
+            'started_opportunistic': self.started['opportunistic'],
+            'deferred': ", ".join(f"{k}={v}" for k, v in sorted(self.deferred.items())) or "-",
+            'deferred_total': sum(self.deferred.values()),
+            'budget_used': f"{self.used_seconds():.0f}/{self.hourly_budget}s per hour",
+            'interactive_quiet_in': f"{quiet_left:.0f}s" if quiet_left > 0 else "quiet"
+        }
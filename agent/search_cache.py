@@ -0,0 +1,135 @@
+"""
+Search Cache Module
+
+LRU + TTL cache for web search results, keyed by the normalised query
+(case and whitespace insensitive). Boredom topics and activity research
+repeat the same queries, so a cached result skips the DuckDuckGo round trip
+entirely.
+
+Concurrent identical queries share one in-flight request: the first caller
+runs the fetch, the others await its result. If the fetching caller is
+cancelled (action deadline, shutdown), a waiter takes the fetch over instead
+of being cancelled with it. The caller decides which
+results are worth caching (WebTool skips empty ones - they may be a
+transient rate limit); None and failures are never cached. Sizes come from
+WEB_SEARCH_CACHE_SIZE / WEB_SEARCH_CACHE_TTL. Stats are shown in !debug tools.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key: case- and whitespace-insensitive query."""
+    return " ".join(query.split()).casefold()
+
+
+class SearchCache:
+    """LRU + TTL result cache with in-flight request sharing (event loop only)."""
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or getattr(config_settings, 'WEB_SEARCH_CACHE_SIZE', 128)
+        self.ttl = ttl or getattr(config_settings, 'WEB_SEARCH_CACHE_TTL', 3600)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # Callers that joined an in-flight request
+        self.taken_over = 0  # Waiters that re-ran a fetch whose caller was cancelled
+        self.expired = 0
+        self.evicted = 0
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def get_or_fetch(self, query: str, fetch: Callable[[], Awaitable],
+                           cache_if: Callable[[Any], bool] = None) -> Any:
+        """Cached value for the query, or the result of fetch() (shared with concurrent callers).
+
+        Args:
+            query: Search query (normalised for the key)
+            fetch: Coroutine function doing the actual search
+            cache_if: Predicate for results worth caching (default: any non-None result)
+        """
+        key = normalize_query(query)
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        orphaned = False
+        while True:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This caller was cancelled
+                # The caller running the fetch was cancelled - run it here (or join whoever took it over)
+                orphaned = True
+
+        if orphaned:
+            self.taken_over += 1
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved - nobody may be waiting
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        if value is not None and (cache_if is None or cache_if(value)):
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses + self.shared
+        return {
+            'entries': f"{len(self._entries)}/{self.max_entries}",
+            'ttl_s': self.ttl,
+            'hit_ratio': f"{(self.hits + self.shared) / lookups * 100:.0f}%" if lookups else "-",
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_in_flight': self.shared,
+            'in_flight': len(self._in_flight),
+            'taken_over': self.taken_over,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
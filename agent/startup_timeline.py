@@ -0,0 +1,135 @@
+"""
+Startup Timeline Module
+
+Records how long each phase of agent startup took, so a slow boot can be
+traced to the subsystem that caused it.
+
+- phase(name): times a synchronous step of AutonomousAgent.__init__
+  (state, LLM client, Discord client, web app, tools, ...).
+- run(name, coro): times one concurrent bootstrap phase in start()
+  (database open, Discord login, web server, model load). A failed phase is
+  logged and recorded, the others keep going.
+- mark_ready(): the agent loops are about to start.
+
+Phases that are still running at that point (the local model load) keep
+being recorded as background phases. Every boot is appended to
+STARTUP_TIMELINE_FILE (last STARTUP_TIMELINE_HISTORY boots), so !debug
+startup can compare the current start with the previous ones.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimeline:
+    """Per-phase startup durations (sync init steps + concurrent bootstrap phases)."""
+
+    def __init__(self, path: str = None, history: int = None):
+        self.path = path or getattr(config_settings, 'STARTUP_TIMELINE_FILE', 'workspace/startup_timeline.json')
+        self.history = history or getattr(config_settings, 'STARTUP_TIMELINE_HISTORY', 5)
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.phases: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _record(self, name: str, group: str, start: float, end: float, status: str, error: str = None):
+        with self._lock:
+            self.phases.append({
+                'name': name,
+                'group': group,
+                'start_s': round(start - self.started_at, 3),
+                'duration_s': round(end - start, 3),
+                'status': status,
+                'error': error
+            })
+        logger.info(f"Startup phase {name}: {end - start:.2f}s ({status})")
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times a synchronous init step (exceptions are recorded and re-raised)."""
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            self._record(name, 'init', start, time.time(), 'failed', f"{type(e).__name__}: {e}")
+            raise
+        self._record(name, 'init', start, time.time(), 'ok')
+
+    async def run(self, name: str, coro: Awaitable):
+        """Awaits one bootstrap phase and records it. Returns its result (None if it failed)."""
+        start = time.time()
+        result, status, error = None, 'ok', None
+        try:
+            result = await coro
+            if result is False:
+                status = 'degraded'  # e.g. Discord not ready in time, model not loaded
+        except Exception as e:
+            logger.error(f"Startup phase {name} failed: {e}")
+            status, error = 'failed', f"{type(e).__name__}: {e}"
+        # A phase that outlived the boot (model load) ran in the background
+        group = 'background' if self.ready_at is not None else 'bootstrap'
+        self._record(name, group, start, time.time(), status, error)
+        if self.ready_at is not None:
+            self.save()
+        return result
+
+    def mark_ready(self):
+        """Loops are about to start - the boot counts as finished; later phases are background."""
+        self.ready_at = time.time()
+        logger.info(f"Agent ready after {self.ready_at - self.started_at:.2f}s")
+        self.save()
+
+    def save(self):
+        """Appends this boot to the timeline file (replacing its own earlier entry)."""
+        try:
+            boots = [b for b in self.load_history() if b.get('started_at') != self.started_at]
+            boots.append(self.to_dict())
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(boots[-self.history:], f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save startup timeline: {e}")
+
+    def load_history(self) -> List[dict]:
+        """Saved boots, oldest first (including this one once saved)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            'started_at': self.started_at,
+            'ready_s': round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            'phases': phases
+        }
+
+
+# Global instance (one timeline per process)
+_timeline: Optional[StartupTimeline] = None
+_timeline_lock = threading.Lock()
+
+def get_startup_timeline() -> StartupTimeline:
+    """Get the startup timeline of this process."""
+    global _timeline
+    with _timeline_lock:
+        if _timeline is None:
+            _timeline = StartupTimeline()
+        return _timeline
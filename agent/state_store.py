@@ -0,0 +1,127 @@
+"""
+State Store Module
+
+Write-behind JSON store for the agent's small persistent state (boredom score,
+admin DM ids, tool usage counts and timestamps) in one file.
+
+Callers only mark the store dirty; a background loop coalesces all changes
+into one write every STATE_FLUSH_INTERVAL seconds. Writes go to a temp file
+that is fsynced and renamed over the target, so a power loss leaves either the
+old or the new file, never a truncated one. graceful_shutdown forces a flush.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """Debounced, atomic JSON persistence for named state sections."""
+
+    def __init__(self, path: str = None, flush_interval: float = None):
+        self.path = path or getattr(config_settings, 'AGENT_STATE_FILE', 'workspace/agent_state.json')
+        self.flush_interval = flush_interval or getattr(config_settings, 'STATE_FLUSH_INTERVAL', 5)
+        self.data: Dict[str, Any] = {}  # Document as loaded from disk
+        self._providers: Dict[str, Callable[[], Any]] = {}
+        self._dirty_sections = set()
+        self._version = 0  # Bumped by mark_dirty
+        self._flushed_version = 0
+        self._lock = asyncio.Lock()
+
+        self.flush_count = 0
+        self.coalesced = 0  # mark_dirty calls absorbed by a later flush
+        self.last_flush: Optional[float] = None
+        self.last_flush_ms: Optional[float] = None
+        self.errors = 0
+
+    def load(self) -> dict:
+        """Reads the state file (missing or unreadable file -> empty state)."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load agent state: {e}")
+            self.data = {}
+        return self.data
+
+    def register(self, section: str, provider: Callable[[], Any]):
+        """Registers a top-level key; provider() returns its current value at flush time."""
+        self._providers[section] = provider
+
+    def mark_dirty(self, section: str = None):
+        """Schedules the state for the next coalesced flush (cheap, never touches disk)."""
+        if self._version != self._flushed_version:
+            self.coalesced += 1
+        self._version += 1
+        if section:
+            self._dirty_sections.add(section)
+
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._flushed_version
+
+    def _snapshot(self) -> str:
+        """Serialises all sections on the caller's thread (state is only mutated on the event loop)."""
+        document = dict(self.data)
+        for section, provider in self._providers.items():
+            document[section] = provider()
+        return json.dumps(document, indent=2)
+
+    def _write(self, payload: str):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def flush(self, force: bool = False) -> bool:
+        """Writes the state if dirty (or always with force). File I/O runs in the executor."""
+        async with self._lock:
+            if not force and not self.dirty:
+                return False
+            version = self._version
+            start = time.perf_counter()
+            try:
+                payload = self._snapshot()
+                await asyncio.get_running_loop().run_in_executor(None, self._write, payload)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Failed to save agent state: {e}")
+                return False
+            self._flushed_version = version
+            if self._version == version:
+                self._dirty_sections.clear()
+            self.flush_count += 1
+            self.last_flush = time.time()
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            return True
+
+    async def flush_loop(self):
+        """Background loop: one write per interval at most, only when something changed."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def get_stats(self) -> dict:
+        return {
+            'file': self.path,
+            'dirty': self.dirty,
+            'dirty_sections': ", ".join(sorted(self._dirty_sections)) or "-",
+            'flushes': self.flush_count,
+            'coalesced_updates': self.coalesced,
+            'last_flush': time.strftime('%H:%M:%S', time.localtime(self.last_flush)) if self.last_flush else "never",
+            'last_flush_ms': round(self.last_flush_ms, 1) if self.last_flush_ms is not None else None,
+            'errors': self.errors
+        }
@@ -0,0 +1,227 @@
+"""
+Task Supervisor Module
+
+Owns the agent's background asyncio tasks so none of them dies silently.
+
+- supervise(name, factory): long-lived named task (agent loops, Discord
+  client). If it crashes - or returns while the agent is still running - it
+  is restarted with exponential backoff (SUPERVISOR_BACKOFF_*); the backoff
+  resets once a run has stayed up for SUPERVISOR_STABLE_AFTER seconds.
+- spawn(kind, coro): ad-hoc task (live logs, live monitor, SSH tunnel start).
+  At most SUPERVISOR_KIND_LIMITS[kind] of one kind run at once; extra spawns
+  are refused instead of piling up.
+
+Every exception is logged and recorded in ErrorTracker. Live tasks with age
+and state are shown in !debug tasks and on the dashboard.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+BACKOFF = "backoff"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskEntry:
+    """Bookkeeping for one supervised or ad-hoc task."""
+
+    def __init__(self, name: str, kind: str, supervised: bool):
+        self.name = name
+        self.kind = kind
+        self.supervised = supervised
+        self.created_at = time.time()
+        self.started_at = self.created_at
+        self.state = RUNNING
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.next_restart_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class TaskSupervisor:
+    """Named tasks with restart policies, per-kind caps and exception capture."""
+
+    def __init__(self):
+        self.backoff_base = getattr(config_settings, 'SUPERVISOR_BACKOFF_BASE', 1.0)
+        self.backoff_max = getattr(config_settings, 'SUPERVISOR_BACKOFF_MAX', 300.0)
+        self.stable_after = getattr(config_settings, 'SUPERVISOR_STABLE_AFTER', 60.0)
+        self.kind_limits = getattr(config_settings, 'SUPERVISOR_KIND_LIMITS', {})
+        self.default_kind_limit = getattr(config_settings, 'SUPERVISOR_DEFAULT_KIND_LIMIT', 4)
+
+        self._entries: Dict[str, TaskEntry] = {}
+        self._adhoc_seq = 0
+        self.error_tracker = None
+        self.should_restart: Callable[[], bool] = lambda: True
+        self.on_restart: Optional[Callable[[str, Optional[BaseException]], Awaitable]] = None
+        self.refused = 0
+
+    def configure(self, error_tracker=None, should_restart: Callable[[], bool] = None,
+                  on_restart: Callable[[str, Optional[BaseException]], Awaitable] = None):
+        """Hooks up ErrorTracker, the 'agent still running' check and the restart notification."""
+        if error_tracker is not None:
+            self.error_tracker = error_tracker
+        if should_restart is not None:
+            self.should_restart = should_restart
+        if on_restart is not None:
+            self.on_restart = on_restart
+
+    # --- Supervised (long-lived) tasks ---
+
+    def supervise(self, name: str, factory: Callable[[], Awaitable], restart: bool = True) -> asyncio.Task:
+        """Starts factory() as a named task; restarts it with backoff when it crashes or exits early."""
+        current = self._entries.get(name)
+        if current is not None and current.task is not None and not current.task.done():
+            return current.task
+        entry = TaskEntry(name, "loop", supervised=True)
+        self._entries[name] = entry
+        entry.task = asyncio.create_task(self._run_supervised(entry, factory, restart), name=name)
+        return entry.task
+
+    async def _run_supervised(self, entry: TaskEntry, factory: Callable[[], Awaitable], restart: bool):
+        backoff = self.backoff_base
+        while True:
+            entry.state = RUNNING
+            entry.started_at = time.time()
+            entry.next_restart_at = None
+            error = None
+            try:
+                await factory()
+            except asyncio.CancelledError:
+                entry.state = CANCELLED
+                raise
+            except Exception as e:
+                error = e
+                self._capture(entry, e)
+
+            if not restart or not self.should_restart():
+                entry.state = FAILED if error else DONE
+                return
+            if error is None:
+                logger.warning(f"Task {entry.name} exited while the agent is running")
+
+            # A run that stayed up long enough resets the backoff
+            if time.time() - entry.started_at >= self.stable_after:
+                backoff = self.backoff_base
+            entry.restarts += 1
+            entry.state = BACKOFF
+            entry.next_restart_at = time.time() + backoff
+            logger.info(f"Restarting {entry.name} in {backoff:.0f}s (restart #{entry.restarts})")
+            if self.on_restart:
+                try:
+                    await self.on_restart(entry.name, error)
+                except Exception as e:
+                    logger.error(f"Restart notification for {entry.name} failed: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.backoff_max)
+
+    # --- Ad-hoc tasks ---
+
+    def spawn(self, kind: str, coro: Awaitable, name: str = None) -> Optional[asyncio.Task]:
+        """Runs a one-off coroutine as a tracked task. Returns None if the kind is at its cap."""
+        limit = self.kind_limits.get(kind, self.default_kind_limit)
+        if self.running_count(kind) >= limit:
+            coro.close()  # Never awaited - avoid the "coroutine was never awaited" warning
+            self.refused += 1
+            logger.warning(f"Task '{kind}' refused: {limit} already running")
+            return None
+        self._adhoc_seq += 1
+        entry = TaskEntry(name or f"{kind}#{self._adhoc_seq}", kind, supervised=False)
+        self._entries[entry.name] = entry
+        entry.task = asyncio.create_task(coro, name=entry.name)
+        entry.task.add_done_callback(lambda task, entry=entry: self._adhoc_done(entry, task))
+        return entry.task
+
+    def _adhoc_done(self, entry: TaskEntry, task: asyncio.Task):
+        if task.cancelled():
+            entry.state = CANCELLED
+        elif task.exception() is not None:
+            entry.state = FAILED
+            self._capture(entry, task.exception())
+        else:
+            entry.state = DONE
+        # Finished ad-hoc tasks are dropped; the last few failed ones stay visible in !debug tasks
+        if entry.state != FAILED:
+            self._entries.pop(entry.name, None)
+            return
+        failed = [e for e in self._entries.values() if not e.supervised and e.state == FAILED]
+        for old in failed[:-10]:
+            self._entries.pop(old.name, None)
+
+    # --- Shared ---
+
+    def _capture(self, entry: TaskEntry, error: BaseException):
+        entry.last_error = f"{type(error).__name__}: {error}"
+        logger.error(f"Task {entry.name} crashed: {entry.last_error}")
+        if self.error_tracker is not None:
+            tb_str = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            self.error_tracker.log_error(error, tb_str)
+
+    def running_count(self, kind: str) -> int:
+        return sum(1 for e in self._entries.values()
+                   if e.kind == kind and e.task is not None and not e.task.done())
+
+    async def cancel_all(self, exclude: Iterable[str] = ()):
+        """Cancels every task (shutdown) and waits for them to finish.
+
+        The calling task and the tasks named in `exclude` are skipped.
+        """
+        current = asyncio.current_task()
+        exclude = set(exclude)
+        tasks = [e.task for e in self._entries.values()
+                 if e.task is not None and not e.task.done() and e.task is not current
+                 and e.name not in exclude]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def tasks(self) -> List[dict]:
+        """Live (and failed ad-hoc) tasks, loops first."""
+        now = time.time()
+        items = []
+        for entry in sorted(self._entries.values(), key=lambda e: (not e.supervised, e.created_at)):
+            items.append({
+                'name': entry.name,
+                'kind': entry.kind,
+                'state': entry.state,
+                'age_s': round(now - entry.started_at),
+                'restarts': entry.restarts,
+                'restart_in_s': round(entry.next_restart_at - now) if entry.next_restart_at else None,
+                'last_error': (entry.last_error or "")[:100]
+            })
+        return items
+
+    def get_stats(self) -> dict:
+        states = {}
+        for entry in self._entries.values():
+            states[entry.state] = states.get(entry.state, 0) + 1
+        return {
+            'tasks': len(self._entries),
+            'states': ", ".join(f"{k}={v}" for k, v in sorted(states.items())) or "-",
+            'restarts': sum(e.restarts for e in self._entries.values()),
+            'refused': self.refused
+        }
+
+
+# Global instance (shared by the agent, command handler and Discord client)
+_supervisor: Optional[TaskSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+def get_supervisor() -> TaskSupervisor:
+    """Get the shared task supervisor."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = TaskSupervisor()
+        return _supervisor
@@ -0,0 +1,308 @@
+"""
+System Metrics Module
+
+One background thread samples CPU, RAM, swap, disk, network, temperature and
+the process table at a fixed cadence into a fixed-size ring buffer. Consumers
+(ResourceManager, HardwareMonitor, SystemTool, !monitor, !debug, the web
+dashboard) read the latest sample or a time window without calling psutil
+themselves, so nothing on the event loop waits for cpu_percent(interval=...).
+
+The buffer is written by the sampler thread only. A sample is fully built
+before it is published (slot store + index bump), so readers never take a lock.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import psutil
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SystemSample:
+    """One snapshot of the host. Byte values are raw bytes, rates are bytes/s."""
+    timestamp: float
+    cpu_percent: float
+    ram_percent: float
+    ram_used: int
+    ram_total: int
+    ram_available: int
+    swap_percent: float
+    swap_total: int
+    disk_percent: float
+    disk_used: int
+    disk_total: int
+    disk_free: int
+    net_sent_rate: float
+    net_recv_rate: float
+    net_bytes_sent: int
+    net_bytes_recv: int
+    temperature: Optional[float] = None
+    # Refreshed every METRICS_PROCESS_INTERVAL seconds; older samples share the same lists
+    processes: List[dict] = field(default_factory=list)
+    processes_mem_bytes: int = 0
+    disks: List[dict] = field(default_factory=list)
+
+
+class SystemMetricsSampler:
+    """Background psutil sampler with a lock-free ring buffer (single writer)."""
+
+    def __init__(self, interval: float = None, buffer_size: int = None, process_interval: float = None):
+        self.interval = interval or getattr(config_settings, 'METRICS_SAMPLE_INTERVAL', 2.0)
+        self.buffer_size = buffer_size or getattr(config_settings, 'METRICS_BUFFER_SIZE', 300)
+        self.process_interval = process_interval or getattr(config_settings, 'METRICS_PROCESS_INTERVAL', 10.0)
+
+        self._slots: List[Optional[SystemSample]] = [None] * self.buffer_size
+        self._count = 0  # Total samples written; newest is at (_count - 1) % buffer_size
+        self._latest: Optional[SystemSample] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._last_net = None
+        self._last_net_time = 0.0
+        self._last_process_scan = 0.0
+        self._process_cache = {}  # pid -> psutil.Process (cpu_percent needs the same object)
+        self._processes: List[dict] = []
+        self._processes_mem_bytes = 0
+        self._disks: List[dict] = []
+        self._is_rpi = self._detect_rpi()
+
+        self.sample_ms: Optional[float] = None
+        self.process_scan_ms: Optional[float] = None
+        self.errors = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        psutil.cpu_percent(interval=None)  # Prime the CPU counters
+        self._publish(self._collect(scan_processes=False))  # Readers get a sample right away
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"System metrics sampler started ({self.interval}s, {self.buffer_size} samples)")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._publish(self._collect())
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Metrics sampling failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def _publish(self, sample: SystemSample):
+        self._slots[self._count % self.buffer_size] = sample
+        self._count += 1
+        self._latest = sample
+
+    # --- Collection (sampler thread) ---
+
+    def _collect(self, scan_processes: bool = True) -> SystemSample:
+        start = time.perf_counter()
+        now = time.time()
+        ram = psutil.virtual_memory()
+        try:
+            swap = psutil.swap_memory()
+            swap_percent, swap_total = swap.percent, swap.total
+        except Exception:
+            swap_percent, swap_total = 0.0, 0
+        disk = psutil.disk_usage('/')
+
+        net = psutil.net_io_counters()
+        sent_rate = recv_rate = 0.0
+        if self._last_net is not None and now > self._last_net_time:
+            elapsed = now - self._last_net_time
+            sent_rate = max(0.0, (net.bytes_sent - self._last_net.bytes_sent) / elapsed)
+            recv_rate = max(0.0, (net.bytes_recv - self._last_net.bytes_recv) / elapsed)
+        self._last_net, self._last_net_time = net, now
+
+        if scan_processes and now - self._last_process_scan >= self.process_interval:
+            self._scan_processes(ram.total)
+            self._disks = self._scan_disks()
+            self._last_process_scan = now
+
+        sample = SystemSample(
+            timestamp=now,
+            cpu_percent=psutil.cpu_percent(interval=None),  # Average since the previous sample
+            ram_percent=ram.percent,
+            ram_used=ram.used,
+            ram_total=ram.total,
+            ram_available=ram.available,
+            swap_percent=swap_percent,
+            swap_total=swap_total,
+            disk_percent=disk.percent,
+            disk_used=disk.used,
+            disk_total=disk.total,
+            disk_free=disk.free,
+            net_sent_rate=sent_rate,
+            net_recv_rate=recv_rate,
+            net_bytes_sent=net.bytes_sent,
+            net_bytes_recv=net.bytes_recv,
+            temperature=self._read_temperature(),
+            processes=self._processes,
+            processes_mem_bytes=self._processes_mem_bytes,
+            disks=self._disks
+        )
+        self.sample_ms = (time.perf_counter() - start) * 1000
+        return sample
+
+    def _scan_processes(self, total_mem: int):
+        """Process table with normalised CPU and proportional memory (PSS > USS > RSS)."""
+        start = time.perf_counter()
+        cpu_count = psutil.cpu_count() or 1
+        current_pids = set()
+        processes = []
+        total_mem_usage = 0
+        for p in psutil.process_iter(['pid', 'name', 'username']):
+            try:
+                pid = p.info['pid']
+                current_pids.add(pid)
+                proc = self._process_cache.setdefault(pid, p)
+                if not proc.is_running():
+                    continue
+                # Summed across cores since the previous scan; normalise to 0-100% of the system
+                cpu = proc.cpu_percent(interval=None) / cpu_count
+                try:
+                    mem_info = proc.memory_full_info()
+                    mem_bytes = getattr(mem_info, 'pss', getattr(mem_info, 'uss', mem_info.rss))
+                except (psutil.AccessDenied, AttributeError):
+                    mem_info = proc.memory_info()
+                    mem_bytes = mem_info.rss - getattr(mem_info, 'shared', 0)
+                total_mem_usage += mem_bytes
+                processes.append({
+                    'pid': pid,
+                    'name': p.info['name'],
+                    'username': p.info.get('username'),
+                    'cpu_percent': cpu,
+                    'memory_mb': round(mem_bytes / (1024 * 1024), 1),
+                    'memory_percent': (mem_bytes / total_mem) * 100 if total_mem else 0.0
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+
+        for old_pid in [pid for pid in self._process_cache if pid not in current_pids]:
+            del self._process_cache[old_pid]
+        # Replace, never mutate: published samples keep referencing the old lists
+        self._processes = processes
+        self._processes_mem_bytes = total_mem_usage
+        self.process_scan_ms = (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _scan_disks() -> List[dict]:
+        disks = []
+        for part in psutil.disk_partitions():
+            if 'cdrom' in part.opts or part.fstype == '':
+                continue
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+                disks.append({'device': part.device, 'mountpoint': part.mountpoint,
+                              'percent': usage.percent, 'free': usage.free, 'total': usage.total})
+            except Exception:
+                pass
+        return disks
+
+    @staticmethod
+    def _detect_rpi() -> bool:
+        try:
+            with open('/proc/cpuinfo', 'r') as f:
+                return 'Raspberry Pi' in f.read()
+        except OSError:
+            return False
+
+    def _read_temperature(self) -> Optional[float]:
+        """CPU temperature in °C (sysfs, psutil sensors, vcgencmd on RPi) or None."""
+        try:
+            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
+                return float(f.read()) / 1000.0
+        except (OSError, ValueError):
+            pass
+        try:
+            sensors = psutil.sensors_temperatures()
+            for entries in sensors.values():
+                if entries:
+                    return float(entries[0].current)
+        except Exception:
+            pass
+        if self._is_rpi:
+            try:
+                output = subprocess.check_output(['vcgencmd', 'measure_temp'], timeout=2).decode('utf-8')
+                return float(output.replace('temp=', '').replace('\'C\n', ''))
+            except Exception:
+                pass
+        return None
+
+    # --- Readers (any thread, never block on psutil intervals) ---
+
+    def latest(self) -> SystemSample:
+        """Newest sample. Before the first one is published a sample is taken inline (non-blocking)."""
+        sample = self._latest
+        if sample is None:
+            sample = self._collect(scan_processes=False)
+            self._latest = sample
+        return sample
+
+    def window(self, seconds: float) -> List[SystemSample]:
+        """Samples from the last `seconds`, oldest first."""
+        count = self._count
+        slots = self._slots[:]  # Atomic copy under the GIL
+        cutoff = time.time() - seconds
+        n = min(count, self.buffer_size)
+        ordered = [slots[(count - n + i) % self.buffer_size] for i in range(n)]
+        return [s for s in ordered if s is not None and s.timestamp >= cutoff]
+
+    def cpu_average(self, seconds: float) -> float:
+        """Mean CPU usage over the last `seconds` (falls back to the latest sample)."""
+        samples = self.window(seconds)
+        if not samples:
+            return self.latest().cpu_percent
+        return sum(s.cpu_percent for s in samples) / len(samples)
+
+    def top_processes(self, key: str = 'memory_percent', limit: int = 5) -> List[dict]:
+        return sorted(self.latest().processes, key=lambda p: p[key], reverse=True)[:limit]
+
+    def get_stats(self) -> dict:
+        latest = self._latest
+        return {
+            'running': self.running,
+            'interval_s': self.interval,
+            'samples': f"{min(self._count, self.buffer_size)}/{self.buffer_size}",
+            'sample_age_s': round(time.time() - latest.timestamp, 1) if latest else None,
+            'sample_ms': round(self.sample_ms, 1) if self.sample_ms is not None else None,
+            'process_scan_ms': round(self.process_scan_ms) if self.process_scan_ms is not None else None,
+            'processes': len(latest.processes) if latest else 0,
+            'errors': self.errors
+        }
+
+
+# Global instance (shared by every psutil consumer)
+_sampler: Optional[SystemMetricsSampler] = None
+_sampler_lock = threading.Lock()
+
+def get_metrics_sampler() -> SystemMetricsSampler:
+    """Get the shared sampler, starting its thread on first use."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SystemMetricsSampler()
+        if not _sampler.running and not _sampler._stop_event.is_set():
+            _sampler.start()
+        return _sampler
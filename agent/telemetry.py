@@ -0,0 +1,120 @@
+"""
+Telemetry Module
+
+Rolling latency windows with percentile summaries.
+LLMTelemetry records per-call timing breakdowns of local (llama.cpp) and
+Gemini inference. Used by !debug llm and the web dashboard.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RollingStats:
+    """Keeps the last N samples of one metric and computes percentiles on demand."""
+
+    def __init__(self, maxlen: int = 200):
+        self.samples = deque(maxlen=maxlen)
+        self.total_count = 0
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.total_count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'count': len(self.samples)
+        }
+
+
+# Metric name -> (label, unit)
+LLM_METRICS = {
+    'queue_wait_ms': ('queue', 'ms'),
+    'prompt_eval_ms': ('prompt eval', 'ms'),
+    'ttft_ms': ('TTFT', 'ms'),
+    'network_ms': ('network', 'ms'),
+    'total_ms': ('total', 'ms'),
+    'gen_tps': ('gen', 'tok/s'),
+}
+
+
+class LLMTelemetry:
+    """Rolling per-call-site / per-provider LLM timing histograms (thread-safe)."""
+
+    def __init__(self, window: int = None):
+        self.window = window or getattr(config_settings, 'LLM_TELEMETRY_WINDOW', 200)
+        self._stats: Dict[Tuple[str, str], Dict[str, RollingStats]] = {}
+        self._last: Dict[Tuple[str, str], float] = {}  # key -> timestamp of last call
+        self._lock = threading.Lock()
+
+    def record(self, call_site: str, provider: str, **metrics):
+        """
+        Record one LLM call.
+
+        Args:
+            call_site: Logical caller (e.g. "decide_action", "filter", "ask")
+            provider: Backend that served it (e.g. "local/main", "gemini/gemini-2.5-flash")
+            **metrics: Any of LLM_METRICS keys; None values are skipped
+        """
+        key = (call_site, provider)
+        with self._lock:
+            series = self._stats.setdefault(key, {})
+            for name, value in metrics.items():
+                if value is None:
+                    continue
+                if name not in series:
+                    series[name] = RollingStats(self.window)
+                series[name].add(float(value))
+            self._last[key] = time.time()
+
+    def get_summary(self) -> Dict[str, Dict[str, dict]]:
+        """Returns {"call_site @ provider": {metric: {p50, p95, p99, count}}}."""
+        with self._lock:
+            return {
+                f"{site} @ {provider}": {name: stats.summary() for name, stats in series.items()}
+                for (site, provider), series in self._stats.items()
+            }
+
+    def format_summary(self) -> Dict[str, str]:
+        """Human readable p50/p95/p99 lines per call site and provider."""
+        formatted = {}
+        for key, metrics in sorted(self.get_summary().items()):
+            parts = []
+            calls = 0
+            for name, (label, unit) in LLM_METRICS.items():
+                summary = metrics.get(name)
+                if not summary or summary['count'] == 0:
+                    continue
+                calls = max(calls, summary['count'])
+                parts.append(f"{label} {summary['p50']:.0f}/{summary['p95']:.0f}/{summary['p99']:.0f}{unit}")
+            if parts:
+                formatted[key] = f"n={calls} | " + ", ".join(parts)
+        return formatted
+
+
+# Global instance
+_llm_telemetry = None
+
+def get_llm_telemetry() -> LLMTelemetry:
+    """Get or create global LLMTelemetry instance."""
+    global _llm_telemetry
+    if _llm_telemetry is None:
+        _llm_telemetry = LLMTelemetry()
+    return _llm_telemetry
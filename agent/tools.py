@@ -1,15 +1,21 @@
 import os
 import logging
 import platform
-import psutil
 import asyncio
 import json
+import re
 import sqlite3
+import concurrent.futures
 from typing import List, Dict, Any, Callable
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 import math as py_math
 import config_settings
+from .circuit_breaker import get_breaker, HALF_OPEN
+from .system_metrics import get_metrics_sampler
+from .topic_store import get_topic_store
+from .http_client import get_http_client
+from .search_cache import SearchCache
 
 # Try importing web tools
 try:
@@ -48,7 +54,18 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Regex to detect CJK (Chinese, Japanese, Korean) characters - Asian spam filter for search results
+# ranges: 4E00-9FFF (Common), 3400-4DBF (Ext A), Hiragana, Katakana, Hangul
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u309f\u30a0-\u30ff\uac00-\ud7af]')
+
+# DDGS is synchronous - searches run here instead of blocking the event loop
+_SEARCH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=getattr(config_settings, 'WEB_SEARCH_WORKERS', 2), thread_name_prefix="web-search"
+)
+
 class Tool(ABC):
+    http = None  # Shared HttpClient (keep-alive session), set by ToolRegistry.register
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -200,20 +217,19 @@ class SystemTool(Tool):
 
     async def execute(self, action: str = "info", **kwargs) -> str:
         if action == "info":
-            cpu = psutil.cpu_percent(interval=0.1)
-            ram = psutil.virtual_memory().percent
-            disk = psutil.disk_usage('/').percent
-            return f"System Info:\nOS: {platform.system()} {platform.release()}\nCPU Usage: {cpu}%\nRAM Usage: {ram}%\nDisk Usage: {disk}%"
+            sample = get_metrics_sampler().latest()
+            return f"System Info:\nOS: {platform.system()} {platform.release()}\nCPU Usage: {sample.cpu_percent}%\nRAM Usage: {sample.ram_percent}%\nDisk Usage: {sample.disk_percent}%"
         elif action == "process_list":
             # Limit to top 5 by memory to avoid flooding context
-            procs = sorted(psutil.process_iter(['name', 'memory_percent']), key=lambda p: p.info['memory_percent'], reverse=True)[:5]
-            return "Top 5 Processes:\n" + "\n".join([f"{p.info['name']}: {p.info['memory_percent']:.1f}%" for p in procs])
+            procs = get_metrics_sampler().top_processes('memory_percent', 5)
+            return "Top 5 Processes:\n" + "\n".join([f"{p['name']}: {p['memory_percent']:.1f}%" for p in procs])
         else:
             return "Error: Unknown action."
 
 class WebTool(Tool):
     def __init__(self, agent=None):
         self.agent = agent
+        self.search_cache = SearchCache()  # Filtered results by normalised query (LRU + TTL, shared in-flight)
 
     @property
     def name(self) -> str:
@@ -243,26 +259,11 @@ class WebTool(Tool):
 
                 # Default behavior: Search for something interesting
                 action = "search"
-                import random
-                import json
-                
-                # Try to load topics from file
-                try:
-                    topics_file = getattr(config_settings, 'TOPICS_FILE', 'boredom_topics.json')
-                    if os.path.exists(topics_file):
-                         with open(topics_file, 'r', encoding='utf-8') as f:
-                            topics = json.load(f)
-                    else:
-                        topics = []
-                except Exception as e:
-                    logger.warning(f"WebTool: Failed to load topics from file: {e}")
-                    topics = []
-                
-                # Fallback to defaults if file topics are missing or empty
-                if not topics:
-                    topics = ["latest AI news", "Raspberry Pi projects", "Python programming tips", "SpaceX news", "scientific discoveries"]
                 
-                query = random.choice(topics)
+                # Shared topic store (cached file, avoids recent repeats); defaults if it is empty
+                query = get_topic_store().sample(defaults=[
+                    "latest AI news", "Raspberry Pi projects", "Python programming tips", "SpaceX news", "scientific discoveries"
+                ])
                 logger.info(f"WebTool: Missing arguments. Defaulting to search for: '{query}'")
 
         # Filter out unexpected arguments (e.g., 'site')
@@ -273,47 +274,19 @@ class WebTool(Tool):
             if action == "search":
                 if not query: return "Error: Query required."
                 
-                # Use native query without appended filters to get broad results
-                # We fetch more results (10) and filter them client-side to ensure quality
-                raw_results = DDGS().text(query, max_results=10)
-                
-                filtered_results = []
-                import re
-                
-                # Regex to detect CJK (Chinese, Japanese, Korean) characters
-                # ranges: 4E00-9FFF (Common), 3400-4DBF (Ext A), 20000-2A6DF (Ext B), ...
-                # Simplified check for common ranges
-                cjk_pattern = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u309f\u30a0-\u30ff\uac00-\ud7af]')
-                
-                for r in raw_results:
-                    title = r.get('title', '')
-                    body = r.get('body', '')
-                    text_content = title + " " + body
-                    
-                    # 1. Reject if contains CJK characters (Asian spam filter)
-                    if cjk_pattern.search(text_content):
-                        continue
-                        
-                    # 2. Prefer Latin script (European/American)
-                    # Check if at least 50% of characters are ASCII/Latin (approximate)
-                    # This avoids Russian/Arabic only results if not desired, though user said "European" which includes Cyrillic.
-                    # User said "European and American", implying mostly Latin/Cyrillic. 
-                    # For now, the CJK rejection is the strongest signal against the spam we saw.
-                    
-                    filtered_results.append(r)
-                    if len(filtered_results) >= 3:
-                        break
+                # Cached / shared with a concurrent identical search; None = circuit open
+                found = await self.search_cache.get_or_fetch(query, lambda: self._search(query),
+                                                             cache_if=lambda result: bool(result[0]))
+                if found is None:
+                    breaker = get_breaker("duckduckgo")
+                    if breaker.state == HALF_OPEN:
+                        return "Error: Search backend recovering (probe request in progress, try again in a few seconds)"
+                    return f"Error: Search backend unavailable (circuit open, retry in {breaker.retry_in():.0f}s)"
+                filtered_results, note = found
                 
                 output = f"Search Results (Query: {query}):\n"
-                if not filtered_results:
-                    # If strict filtering killed everything, fallback to raw top 3 but warn
-                    # Or just return empty to force agent to try different query
-                    # Let's return raw first result if available as last resort, or empty
-                    if raw_results and not filtered_results:
-                         output += "(No European/American matches found, showing best raw result)\n"
-                         filtered_results = [raw_results[0]]
-                    else:
-                         output += "(No results found)\n"
+                if note:
+                    output += f"({note})\n"
                     
                 for i, r in enumerate(filtered_results, 1):
                     output += f"\n{i}. {r['title']}\n"
@@ -323,37 +296,90 @@ class WebTool(Tool):
             
             elif action == "read":
                 if not url: return "Error: URL required."
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=10) as resp:
-                        if resp.status != 200: return f"Error: HTTP {resp.status}"
-                        html = await resp.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        # Extract text and limit length
-                        text = soup.get_text(separator=' ', strip=True)
-                        
-                        # Store in memory if agent is available
-                        if self.agent:
-                            try:
-                                logger.info(f"WebTool: Processing content from {url} for memory...")
-                                # We pass the full text (or a larger chunk) to the filter
-                                # The filter will extract the "core, factual information"
-                                await self.agent.add_filtered_memory(
-                                    content=text[:5000], # Pass reasonable amount for LLM
-                                    metadata={
-                                        'type': 'web_knowledge',
-                                        'source': url,
-                                        'title': soup.title.string if soup.title else 'Webpage'
-                                    }
-                                )
-                            except Exception as e:
-                                logger.error(f"WebTool: Failed to process memory: {e}")
-                        
-                        return text[:limit] + ("..." if len(text) > limit else "") # Limit context
+                session = self.http.session()  # Shared keep-alive session
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    if resp.status != 200: return f"Error: HTTP {resp.status}"
+                    html = await resp.text()
+                soup = BeautifulSoup(html, 'html.parser')
+                # Extract text and limit length
+                text = soup.get_text(separator=' ', strip=True)
+                    
+                # Store in memory if agent is available
+                if self.agent:
+                    try:
+                        logger.info(f"WebTool: Processing content from {url} for memory...")
+                        # We pass the full text (or a larger chunk) to the filter
+                        # The filter will extract the "core, factual information"
+                        await self.agent.add_filtered_memory(
+                            content=text[:5000], # Pass reasonable amount for LLM
+                            metadata={
+                                'type': 'web_knowledge',
+                                'source': url,
+                                'title': soup.title.string if soup.title else 'Webpage'
+                            }
+                        )
+                    except Exception as e:
+                        logger.error(f"WebTool: Failed to process memory: {e}")
+                    
+                return text[:limit] + ("..." if len(text) > limit else "") # Limit context
             else:
                 return "Error: Unknown action."
         except Exception as e:
             return f"Error: {e}"
 
+    async def _search(self, query: str):
+        """One DuckDuckGo search in the search executor. Returns (results, note), None if the circuit is open."""
+        breaker = get_breaker("duckduckgo")
+        if not breaker.allow():
+            return None
+        
+        # Use native query without appended filters to get broad results
+        # We fetch more results (10) and filter them client-side to ensure quality
+        loop = asyncio.get_running_loop()
+        try:
+            # list() so a generator from older DDGS versions is also consumed off-loop
+            raw_results = await loop.run_in_executor(
+                _SEARCH_EXECUTOR, lambda: list(DDGS().text(query, max_results=10) or [])
+            )
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return self._filter_results(raw_results)
+
+    @staticmethod
+    def _filter_results(raw_results: List[dict]):
+        """Top 3 results without CJK spam. Returns (results, note)."""
+        filtered_results = []
+        for r in raw_results:
+            title = r.get('title', '')
+            body = r.get('body', '')
+            text_content = title + " " + body
+            
+            # 1. Reject if contains CJK characters (Asian spam filter)
+            if _CJK_PATTERN.search(text_content):
+                continue
+                
+            # 2. Prefer Latin script (European/American)
+            # Check if at least 50% of characters are ASCII/Latin (approximate)
+            # This avoids Russian/Arabic only results if not desired, though user said "European" which includes Cyrillic.
+            # User said "European and American", implying mostly Latin/Cyrillic. 
+            # For now, the CJK rejection is the strongest signal against the spam we saw.
+            
+            filtered_results.append(r)
+            if len(filtered_results) >= 3:
+                break
+        
+        if filtered_results:
+            return filtered_results, None
+        # If strict filtering killed everything, return the raw first result as last resort, or empty
+        if raw_results:
+            return [raw_results[0]], "No European/American matches found, showing best raw result"
+        return [], "No results found"
+
 class TimeTool(Tool):
     @property
     def name(self) -> str:
@@ -454,22 +480,34 @@ class WeatherTool(Tool):
         if location is None:
             location = config_settings.DEFAULT_LOCATION
         
+        breaker = get_breaker("wttr.in")
+        if not breaker.allow():
+            return f"Error: Weather service unavailable (circuit open, retry in {breaker.retry_in():.0f}s)"
+        
         try:
             # Use wttr.in - free, no API key needed
             url = f"http://wttr.in/{location}?format=%l:+%C+%t+%h+%w"
             # Increased timeout to 30s as wttr.in can be slow
             timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        return f"Error: HTTP {resp.status} - Weather service unavailable"
-                    text = await resp.text()
-                    if not text or not text.strip():
-                        return "Error: Weather service returned empty response"
-                    return f"Weather: {text.strip()}"
-        except asyncio.TimeoutError:
+            async with self.http.session().get(url, timeout=timeout) as resp:
+                if resp.status >= 500:
+                    breaker.record_failure(f"HTTP {resp.status}")
+                    return f"Error: HTTP {resp.status} - Weather service unavailable"
+                breaker.record_success()  # Service answered (4xx = bad location, not an outage)
+                if resp.status != 200:
+                    return f"Error: HTTP {resp.status} - Weather service unavailable"
+                text = await resp.text()
+                if not text or not text.strip():
+                    return "Error: Weather service returned empty response"
+                return f"Weather: {text.strip()}"
+        except asyncio.TimeoutError as e:
+            breaker.record_failure(e)
             return f"Error: Weather service timeout - try again later"
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
         except Exception as e:
+            breaker.record_failure(e)
             return f"Error: {type(e).__name__}: {str(e) or 'Unknown error'}"
 
 class CodeTool(Tool):
@@ -686,10 +724,20 @@ class TranslateTool(Tool):
             return "Error: Text required"
         
         try:
-            translator = GoogleTranslator(source=source, target=target)
+            translator = GoogleTranslator(source=source, target=target)  # Validates languages, no request
+        except Exception as e:
+            return f"Error: {e}"
+        
+        breaker = get_breaker("google_translate")
+        if not breaker.allow():
+            return f"Error: Translation service unavailable (circuit open, retry in {breaker.retry_in():.0f}s)"
+        
+        try:
             result = translator.translate(text)
+            breaker.record_success()
             return f"Translation ({source}->{target}): {result}"
         except Exception as e:
+            breaker.record_failure(e)
             return f"Error: {e}"
 
 class WikipediaTool(Tool):
@@ -763,7 +811,7 @@ class DiscordActivityTool(Tool):
             
             # Process activities to ensure learning
             for activity in filtered_activities:
-                asyncio.create_task(self.agent._process_activity(activity))
+                self.agent.submit_activity_research(activity)
             
             # Format output
             output = "Current User Activities:\n"
@@ -778,8 +826,10 @@ class ToolRegistry:
     def __init__(self):
         self.tools: Dict[str, Tool] = {}
         self.usage_stats: Dict[str, int] = {}
+        self.http = get_http_client()  # One keep-alive session for all HTTP tools
         
     def register(self, tool: Tool):
+        tool.http = self.http
         self.tools[tool.name] = tool
         self.usage_stats[tool.name] = 0
         logger.info(f"Registered tool: {tool.name}")
@@ -796,3 +846,7 @@ class ToolRegistry:
         
     def get_descriptions(self) -> str:
         return "\n".join([f"- {t.name}: {t.description}" for t in self.tools.values()])
+    
+    def get_names(self) -> List[str]:
+        """Returns names of all registered tools (used to build the tool-call grammar)."""
+        return list(self.tools.keys())
@@ -0,0 +1,172 @@
+"""
+Topic Store Module
+
+Shared, cached access to the boredom topics file (TOPICS_FILE). The file is
+read once and re-read only when its mtime changes (e.g. edited by hand);
+`!topic` edits go through the store, which updates the cache and writes the
+file atomically. Used by trigger_autonomous_action, WebTool's default search
+and !topic.
+
+sample() picks a topic at random, skipping the last TOPIC_RECENT_WINDOW picks
+and favouring topics that were picked less often, so the agent does not
+circle around the same few thoughts.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TopicStore:
+    """mtime-validated cache of the topics list with non-repeating weighted sampling."""
+
+    def __init__(self, path: str = None, recent_window: int = None):
+        self.path = path or getattr(config_settings, 'TOPICS_FILE', 'boredom_topics.json')
+        self.recent_window = recent_window or getattr(config_settings, 'TOPIC_RECENT_WINDOW', 3)
+        self._topics: List[str] = []
+        self._mtime: Optional[float] = None  # mtime of the loaded file (None = not loaded / missing)
+        self._loaded = False
+        self._recent = deque(maxlen=self.recent_window)
+        self._use_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.reloads = 0
+        self.samples = 0
+
+    # --- Reading ---
+
+    def _refresh(self):
+        """Re-reads the file if it changed since the last load (caller holds the lock)."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._mtime:
+            return
+
+        topics = []
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):  # {"topics": [...]} variant
+                    data = data.get('topics', [])
+                topics = [str(t) for t in data if str(t).strip()]
+            except Exception as e:
+                logger.error(f"Failed to load topics from {self.path}: {e}")
+                if self._loaded:
+                    return  # Keep the last good list (file may be mid-edit)
+        self._topics = topics
+        self._mtime = mtime
+        self._loaded = True
+        self.reloads += 1
+        logger.debug(f"Loaded {len(topics)} topics from {self.path}")
+
+    def topics(self) -> List[str]:
+        """Current topics (copy)."""
+        with self._lock:
+            self._refresh()
+            return list(self._topics)
+
+    def sample(self, defaults: List[str] = None) -> Optional[str]:
+        """Random topic, avoiding recent picks and weighted towards rarely used ones.
+
+        Args:
+            defaults: Used when the file is missing or empty
+
+        Returns:
+            Topic text, or None if there is nothing to pick from
+        """
+        with self._lock:
+            self._refresh()
+            pool = self._topics or list(defaults or [])
+            if not pool:
+                return None
+            # Skip the last picks, but always leave at least one candidate
+            recent = list(self._recent)[-(len(pool) - 1):] if len(pool) > 1 else []
+            candidates = [t for t in pool if t not in recent] or pool
+            weights = [1.0 / (1 + self._use_counts.get(t, 0)) for t in candidates]
+            topic = random.choices(candidates, weights=weights, k=1)[0]
+            self._recent.append(topic)
+            self._use_counts[topic] = self._use_counts.get(topic, 0) + 1
+            self.samples += 1
+            return topic
+
+    # --- Editing (!topic) ---
+
+    def add(self, topic: str) -> bool:
+        """Appends a topic. False if it already exists."""
+        with self._lock:
+            self._refresh()
+            if topic in self._topics:
+                return False
+            self._save(self._topics + [topic])
+            return True
+
+    def remove(self, topic: str) -> bool:
+        """Removes a topic by text. False if not found."""
+        with self._lock:
+            self._refresh()
+            if topic not in self._topics:
+                return False
+            self._save([t for t in self._topics if t != topic])
+            return True
+
+    def remove_at(self, index: int) -> Optional[str]:
+        """Removes a topic by 0-based index and returns it (None if out of range)."""
+        with self._lock:
+            self._refresh()
+            if not 0 <= index < len(self._topics):
+                return None
+            topics = list(self._topics)
+            removed = topics.pop(index)
+            self._save(topics)
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._save([])
+
+    def _save(self, topics: List[str]):
+        """Writes the list atomically and updates the cache (caller holds the lock)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(topics, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._topics = topics
+        self._mtime = os.stat(self.path).st_mtime
+        self._loaded = True
+        self._use_counts = {t: c for t, c in self._use_counts.items() if t in topics}
+
+    def get_stats(self) -> dict:
+        return {
+            'file': self.path,
+            'topics': len(self._topics),
+            'reloads': self.reloads,
+            'samples': self.samples,
+            'recent': len(self._recent)
+        }
+
+
+# Global instance (shared by core, WebTool and !topic)
+_store: Optional[TopicStore] = None
+_store_lock = threading.Lock()
+
+def get_topic_store() -> TopicStore:
+    """Get the shared topic store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TopicStore()
+        return _store
@@ -8,6 +8,7 @@ from flask import Flask, render_template_string, send_from_directory, abort, req
 from flask_socketio import SocketIO, emit
 from pyngrok import ngrok, conf
 import config_settings
+from .system_metrics import get_metrics_sampler
 
 logger = logging.getLogger(__name__)
 
@@ -880,6 +881,34 @@ TEMPLATE_BASE = """
             document.getElementById('res-ram').innerText = data.ram_percent + '% (' + data.ram_used + ' / ' + data.ram_total + ')';
             document.getElementById('res-disk').innerText = data.disk_percent + '% (' + data.disk_used + ' / ' + data.disk_total + ')';
             
+            // Update Performance (generic sections: {title: {label: value}})
+            var perfCard = document.getElementById('perf-card');
+            var perfSections = document.getElementById('perf-sections');
+            if (perfCard && perfSections && data.perf) {
+                perfSections.innerHTML = '';
+                var hasRows = false;
+                Object.keys(data.perf).forEach(function(title) {
+                    var rows = data.perf[title] || {};
+                    var keys = Object.keys(rows);
+                    if (keys.length === 0) return;
+                    hasRows = true;
+                    var heading = document.createElement('div');
+                    heading.className = 'status-label';
+                    heading.style.marginTop = '8px';
+                    heading.textContent = title;
+                    perfSections.appendChild(heading);
+                    keys.forEach(function(label) {
+                        var item = document.createElement('div');
+                        item.className = 'status-item';
+                        item.style.fontFamily = 'monospace';
+                        item.style.fontSize = '0.85em';
+                        item.textContent = label + ': ' + rows[label];
+                        perfSections.appendChild(item);
+                    });
+                });
+                perfCard.style.display = hasRows ? 'block' : 'none';
+            }
+            
             // Update Activity
             var activityList = document.getElementById('activity-list');
             activityList.innerHTML = '';
@@ -993,9 +1022,6 @@ class WebServer:
         self.connected_clients = 0 # Track active WS connections
         self.start_time = 0 # Track server start time for auto-shutdown
         
-        # Cache for process objects to get accurate CPU % (needs state)
-        self.process_cache = {}
-        
         # Configure routes
         self.app.add_url_rule('/', 'index', self.index)
         self.app.add_url_rule('/docs', 'docs_list', self.docs_list)
@@ -1054,12 +1080,10 @@ class WebServer:
     
     def index(self):
         """Main dashboard."""
-        import psutil
         
         # System Stats
-        cpu_percent = psutil.cpu_percent()
-        ram = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        sample = get_metrics_sampler().latest()
+        cpu_percent = sample.cpu_percent
         
         # Get consistent RAM usage from processes
         proc_data = self.get_processes_data()
@@ -1067,10 +1091,10 @@ class WebServer:
         
         if total_mem_from_procs > 0:
             ram_used_val = total_mem_from_procs
-            ram_percent_val = (total_mem_from_procs / ram.total) * 100
+            ram_percent_val = (total_mem_from_procs / sample.ram_total) * 100
         else:
-            ram_used_val = ram.used
-            ram_percent_val = ram.percent
+            ram_used_val = sample.ram_used
+            ram_percent_val = sample.ram_percent
         
         # Format bytes to GB
         def to_gb(bytes_val):
@@ -1078,11 +1102,11 @@ class WebServer:
             
         ram_percent = f"{ram_percent_val:.1f}"
         ram_used = to_gb(ram_used_val)
-        ram_total = to_gb(ram.total)
+        ram_total = to_gb(sample.ram_total)
         
-        disk_percent = disk.percent
-        disk_used = to_gb(disk.used)
-        disk_total = to_gb(disk.total)
+        disk_percent = sample.disk_percent
+        disk_used = to_gb(sample.disk_used)
+        disk_total = to_gb(sample.disk_total)
 
         # Prepare Activity List HTML
         import datetime
@@ -1164,6 +1188,11 @@ class WebServer:
             <div class="status-item"><span class="status-label">Project Version:</span> {getattr(config_settings, 'AGENT_VERSION', 'Unknown')}</div>
         </div>
         
+        <div class="status-card" id="perf-card" style="display: none;">
+            <h3>⚡ Performance</h3>
+            <div id="perf-sections"></div>
+        </div>
+        
         <h3>Recent Activity</h3>
 
         <ul id="activity-list">
@@ -1685,6 +1714,82 @@ class WebServer:
                 return f"Error reading log: {e}"
         return "Log file not found."
 
+    def _get_perf_sections(self) -> dict:
+        """Performance sections for the dashboard card: {title: {label: value}}."""
+        sections = {}
+        try:
+            sections['🧠 LLM latency p50/p95/p99'] = self.agent.llm.telemetry.format_summary()
+        except Exception as e:
+            logger.debug(f"Perf section 'llm' unavailable: {e}")
+        try:
+            actions = self.agent.actions.get_stats()
+            sections['📥 Action queue'] = {
+                'Depth': f"{actions['depth']} ({actions['depth_by_kind']})",
+                'Running': actions['running'],
+                'Throughput': f"{actions['throughput_per_min']}/min",
+                'Wait p50/p95': f"{actions['wait_p50_ms']} / {actions['wait_p95_ms']} ms",
+                'Done / failed / expired': f"{actions['completed']} / {actions['failed']} / {actions['expired']}",
+                'Deduplicated': actions['deduplicated']
+            }
+        except Exception as e:
+            logger.debug(f"Perf section 'actions' unavailable: {e}")
+        try:
+            metrics = get_metrics_sampler()
+            stats = metrics.get_stats()
+            sections['📈 System metrics sampler'] = {
+                'CPU avg 1 min': f"{metrics.cpu_average(60):.1f}%",
+                'Samples': f"{stats['samples']} every {stats['interval_s']}s",
+                'Sample cost': f"{stats['sample_ms']} ms (process scan {stats['process_scan_ms']} ms)"
+            }
+        except Exception as e:
+            logger.debug(f"Perf section 'metrics' unavailable: {e}")
+        try:
+            monitor = self.agent.lag_monitor
+            lag = monitor.get_stats()
+            section = {
+                'Lag p50/p95/p99': f"{lag['lag_p50_ms']} / {lag['lag_p95_ms']} / {lag['lag_p99_ms']} ms",
+                'Max / stalls': f"{lag['lag_max_ms']} ms / {lag['stalls']} (last {lag['last_stall']})"
+            }
+            for offender in monitor.top_offenders(3):
+                section[offender['function']] = f"{offender['count']}x, {offender['total_ms']:.0f} ms total"
+            sections['⏱️ Event loop lag'] = section
+        except Exception as e:
+            logger.debug(f"Perf section 'lag' unavailable: {e}")
+        try:
+            sched = self.agent.scheduler.get_stats()
+            sections['🗓️ Background scheduler'] = {
+                'Last decision': sched['last_decision'],
+                'Started (due / idle window)': f"{sched['started_due']} / {sched['started_opportunistic']}",
+                'Deferred': f"{sched['deferred_total']} ({sched['deferred']})",
+                'Budget': sched['budget_used']
+            }
+        except Exception as e:
+            logger.debug(f"Perf section 'scheduler' unavailable: {e}")
+        try:
+            section = {}
+            for task in self.agent.supervisor.tasks()[:15]:
+                value = f"{task['state']}, {task['age_s']}s"
+                if task['restarts']:
+                    value += f", {task['restarts']} restarts"
+                if task['last_error']:
+                    value += f" - {task['last_error'][:60]}"
+                section[task['name']] = value
+            sections['🧵 Tasks'] = section
+        except Exception as e:
+            logger.debug(f"Perf section 'tasks' unavailable: {e}")
+        try:
+            http = self.agent.http.get_stats()
+            sections['🌐 HTTP session'] = {
+                'Requests / errors': f"{http['requests']} / {http['errors']}",
+                'Connection reuse': f"{http['reuse_ratio']} ({http['connections_reused']} reused / {http['connections_new']} new)",
+                'DNS cache hits': http['dns_cache_hit_ratio'],
+                'Latency p50/p95': f"{http['latency_p50_ms']} / {http['latency_p95_ms']} ms",
+                'Limits': http['limits']
+            }
+        except Exception as e:
+            logger.debug(f"Perf section 'http' unavailable: {e}")
+        return sections
+
     def _get_llm_display_name(self):
         """Parses model filename to friendly name."""
         import re
@@ -1770,7 +1875,6 @@ class WebServer:
         """Background task to emit status updates via WebSocket."""
         import config_settings
         import time
-        import psutil
         import platform
         
         interval = getattr(config_settings, 'WEB_WEBSOCKET_UPDATE_INTERVAL', 2)
@@ -1802,30 +1906,35 @@ class WebServer:
                 total_mem_from_procs = proc_data.get('total_mem_bytes', 0)
                 
                 # Gather stats
-                cpu_percent = psutil.cpu_percent()
-                ram = psutil.virtual_memory()
-                disk = psutil.disk_usage('/')
+                sample = get_metrics_sampler().latest()
+                cpu_percent = sample.cpu_percent
                 
                 # Override RAM stats with sum of processes (for consistency)
                 # Keep total from system, but used/percent from sum
                 if total_mem_from_procs > 0:
                      ram_used_val = total_mem_from_procs
-                     ram_percent_val = (total_mem_from_procs / ram.total) * 100
+                     ram_percent_val = (total_mem_from_procs / sample.ram_total) * 100
                 else:
-                     ram_used_val = ram.used
-                     ram_percent_val = ram.percent
+                     ram_used_val = sample.ram_used
+                     ram_percent_val = sample.ram_percent
 
                 def to_gb(bytes_val):
                     return f"{bytes_val / (1024**3):.1f} GB"
                 
                 # Check Loop Status
                 loop_status = {}
-                loop_names = ['boredom_loop', 'observation_loop', 'action_loop', 'backup_loop']
+                loop_names = getattr(self.agent, 'loop_names', ['boredom_loop', 'observation_loop', 'action_loop', 'backup_loop'])
                 if hasattr(self.agent, 'loop_tasks'):
-                    for i, task in enumerate(self.agent.loop_tasks):
-                        name = loop_names[i] if i < len(loop_names) else f'loop_{i}'
-                        if not task.done():
+                    # Supervisor state: the supervising task stays alive while a crashed loop waits in backoff
+                    tasks = {t['name']: t for t in self.agent.supervisor.tasks()}
+                    for name in loop_names:
+                        task = tasks.get(name)
+                        if task is None:
+                            loop_status[name] = '❌ Not Init'
+                        elif task['state'] == 'running':
                             loop_status[name] = '🟢 Running'
+                        elif task['state'] == 'backoff':
+                            loop_status[name] = f"🟡 Restarting in {task['restart_in_s']}s"
                         else:
                             loop_status[name] = '🔴 Stopped'
                 else:
@@ -1842,10 +1951,10 @@ class WebServer:
                     'cpu_percent': cpu_percent,
                     'ram_percent': round(ram_percent_val, 1),
                     'ram_used': to_gb(ram_used_val),# Format bytes to GB
-                    'ram_total': to_gb(ram.total),
-                    'disk_percent': disk.percent,
-                    'disk_used': to_gb(disk.used),
-                    'disk_total': to_gb(disk.total),
+                    'ram_total': to_gb(sample.ram_total),
+                    'disk_percent': sample.disk_percent,
+                    'disk_used': to_gb(sample.disk_used),
+                    'disk_total': to_gb(sample.disk_total),
                     'action_history': self.agent.action_history[-20:] if self.agent.action_history else [],
                     'log_tail': self._get_log_tail(),
                     'connected_clients': self.connected_clients,
@@ -1854,7 +1963,8 @@ class WebServer:
                         'python': platform.python_version(),
                         'agent_version': getattr(config_settings, 'AGENT_VERSION', 'Unknown')
                     },
-                    'processes': proc_data
+                    'processes': proc_data,
+                    'perf': self._get_perf_sections()
                 }
                 
                 self.socketio.emit('status_update', stats)
@@ -2011,106 +2121,19 @@ class WebServer:
         logger.info("Web server full stop complete")
 
     def get_processes_data(self):
-        """Internal helper to get process data using cache for accurate CPU."""
-        import psutil
-        import os
+        """Top processes by CPU and memory from the shared metrics sampler (refreshed in the background)."""
         try:
-            # 1. Update cache with current processes
-            current_pids = set()
-            procs_info = []
-            total_mem_usage = 0
+            sample = get_metrics_sampler().latest()
+            top_cpu = sorted(sample.processes, key=lambda x: x['cpu_percent'], reverse=True)[:5]
+            top_mem = sorted(sample.processes, key=lambda x: x['memory_percent'], reverse=True)[:5]
             
-            # Get totals for normalization
-            cpu_count = psutil.cpu_count() or 1
-            total_mem = psutil.virtual_memory().total
-            
-            for p in psutil.process_iter(['pid', 'name', 'username']):
-                try:
-                    pid = p.info['pid']
-                    current_pids.add(pid)
-                    
-                    # Get or Create Process Object in Cache
-                    if pid not in self.process_cache:
-                        self.process_cache[pid] = p
-                    
-                    proc_obj = self.process_cache[pid]
-                    
-                    # Ensure process is still running with this PID
-                    if not proc_obj.is_running():
-                        continue
-                        
-                    # Get Stats
-                    # cpu_percent(interval=None) calculates % since last call.
-                    # This returns value summed across cores (can be > 100%).
-                    raw_cpu = proc_obj.cpu_percent(interval=None)
-                    
-                    # Normalize to 0-100% System Scale
-                    normalized_cpu = raw_cpu / cpu_count
-                    
-                    # Memory: PSS (Proportional) is best for summing up to Total.
-                    # USS (Unique) is strict private. RSS is total resident (includes shared).
-                    mem_bytes = 0
-                    metric_used = "unknown"
-                    try:
-                        # memory_full_info is expensive but needed for PSS/USS
-                        mem_info = proc_obj.memory_full_info()
-                        # Try PSS first, then USS, then fallback to RSS
-                        if hasattr(mem_info, 'pss'):
-                            mem_bytes = mem_info.pss
-                            metric_used = "pss"
-                        elif hasattr(mem_info, 'uss'):
-                            mem_bytes = mem_info.uss
-                            metric_used = "uss"
-                        else:
-                            mem_bytes = mem_info.rss
-                            metric_used = "rss"
-                    except (psutil.AccessDenied, AttributeError):
-                        # Fallback for permission errors or missing attrs
-                        mem_info = proc_obj.memory_info()
-                        mem_bytes = mem_info.rss
-                        # Try to subtract shared memory to approximate private/USS
-                        if hasattr(mem_info, 'shared'):
-                            mem_bytes -= mem_info.shared
-                            metric_used = "rss_minus_shared"
-                        else:
-                            metric_used = "rss_fallback"
-
-                    if pid == os.getpid() and not hasattr(self, '_mem_debug_logged'):
-                        logger.debug(f"Process Memory Metric: {metric_used} | Val: {mem_bytes/1024/1024:.1f}MB")
-                        self._mem_debug_logged = True
-                        
-                    mem_mb = round(mem_bytes / (1024 * 1024), 1)
-                    mem_percent = (mem_bytes / total_mem) * 100
-                    
-                    total_mem_usage += mem_bytes
-                    
-                    procs_info.append({
-                        'pid': pid,
-                        'name': p.info['name'],
-                        'cpu_percent': normalized_cpu,
-                        'memory_mb': mem_mb,
-                        'memory_percent': mem_percent
-                    })
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
-            
-            # Clean up cache
-            cached_pids = list(self.process_cache.keys())
-            for old_pid in cached_pids:
-                if old_pid not in current_pids:
-                    del self.process_cache[old_pid]
-                    
-            # Sort Top 5 (Sort by Percent)
-            top_cpu = sorted(procs_info, key=lambda x: x['cpu_percent'], reverse=True)[:5]
-            top_mem = sorted(procs_info, key=lambda x: x['memory_percent'], reverse=True)[:5]
-            
-            return {'cpu': top_cpu, 'memory': top_mem, 'total_mem_bytes': total_mem_usage}
+            return {'cpu': top_cpu, 'memory': top_mem, 'total_mem_bytes': sample.processes_mem_bytes}
             
         except Exception as e:
             logger.error(f"Error getting process data: {e}")
             return {'cpu': [], 'memory': [], 'total_mem_bytes': 0}
 
+
     def get_processes(self):
         """API Endpoint."""
         return jsonify(self.get_processes_data())
@@ -0,0 +1,116 @@
+"""
+Working Memory Module
+
+Keeps one bounded "working memory" string - a rolling summary of recent actions,
+learnings and goals - so decide_action and !ask do not paste raw memories into
+every prompt. The summary is refreshed in the background by the LLM only after
+enough new memories have been stored; readers always get the cached string.
+"""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import config_settings
+
+logger = logging.getLogger(__name__)
+
+
+class WorkingMemory:
+    """Cached, incrementally updated summary of the agent's recent memories."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.max_chars = getattr(config_settings, 'WORKING_MEMORY_MAX_CHARS', 600)
+        self.refresh_after = getattr(config_settings, 'WORKING_MEMORY_REFRESH_AFTER', 5)
+        self.min_interval = getattr(config_settings, 'WORKING_MEMORY_MIN_INTERVAL', 120)
+
+        self.summary = ""
+        self.last_memory_id = 0  # Newest memory already folded into the summary
+        self.last_refresh = 0.0
+        self.refresh_count = 0
+        self.last_refresh_ms: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def get_context(self) -> str:
+        """Returns the cached summary (never waits for the LLM).
+
+        Before the first LLM refresh a compact list of recent memories is used.
+        """
+        if not self.summary:
+            self.summary = self._fallback_summary(self.agent.memory.get_recent_memories(limit=5))
+        return self.summary
+
+    def maybe_refresh(self):
+        """Schedules a background refresh once enough new memories have arrived."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.time() - self.last_refresh < self.min_interval:
+            return
+        new_memories = self.agent.memory.get_memories_since(self.last_memory_id, limit=self.refresh_after * 4)
+        if len(new_memories) < self.refresh_after and self.summary:
+            return
+        if not new_memories:
+            return
+        self._refresh_task = asyncio.create_task(self._refresh(new_memories))
+
+    async def _refresh(self, new_memories: List[dict]):
+        start = time.perf_counter()
+        goals = "; ".join(self.agent.goals)
+        events = "\n".join(f"- {self._clip(m['content'], 200)}" for m in new_memories)
+        prompt = (
+            f"Current working memory:\n{self.summary or '(empty)'}\n\n"
+            f"New events and learnings:\n{events}\n\n"
+            f"Goals: {goals}\n\n"
+            f"Rewrite the working memory so it covers both. Keep the most useful facts, "
+            f"recent actions and open goals. At most {self.max_chars // 6} words, plain bullet points."
+        )
+        try:
+            updated = await self.agent.llm.generate_response(
+                prompt,
+                system_prompt="You maintain an AI agent's working memory. Output ONLY the updated bullet points.",
+                prompt_lookup=True, task="summary", call_site="working_memory"
+            )
+        except Exception as e:
+            logger.error(f"Working memory refresh failed: {e}")
+            updated = None
+
+        if not updated or updated == "LLM not available.":
+            # Keep the prompt bounded even without the LLM
+            updated = self._fallback_summary(list(reversed(new_memories)))
+        self.summary = self._clip(updated.strip(), self.max_chars)
+        self.last_memory_id = max(m['id'] for m in new_memories)
+        self.last_refresh = time.time()
+        self.refresh_count += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Working memory refreshed from {len(new_memories)} new memories "
+                    f"({len(self.summary)} chars, {self.last_refresh_ms:.0f}ms)")
+
+    def _fallback_summary(self, memories: List[dict]) -> str:
+        """Newest-first bullet list of memory contents, clipped to max_chars."""
+        if memories:
+            self.last_memory_id = max(self.last_memory_id, max(m['id'] for m in memories))
+        lines = []
+        used = 0
+        for memory in memories:
+            line = f"- {self._clip(memory['content'], 150)}"
+            if used + len(line) + 1 > self.max_chars:
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
+
+    @staticmethod
+    def _clip(text: str, limit: int) -> str:
+        return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+    def get_stats(self) -> dict:
+        return {
+            'chars': len(self.summary),
+            'max_chars': self.max_chars,
+            'refreshes': self.refresh_count,
+            'last_refresh': time.strftime('%H:%M:%S', time.localtime(self.last_refresh)) if self.last_refresh else "never",
+            'last_refresh_ms': round(self.last_refresh_ms) if self.last_refresh_ms is not None else None,
+            'refreshing': self._refresh_task is not None and not self._refresh_task.done()
+        }
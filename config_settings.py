@@ -12,6 +12,15 @@ RESOURCE_TIER_1_THRESHOLD = 80  # Warning & Cleanup %
 RESOURCE_TIER_2_THRESHOLD = 90  # Active mitigation %
 RESOURCE_TIER_3_THRESHOLD = 95  # Emergency mode %
 
+# System Metrics Sampler (one background thread feeds every psutil consumer)
+METRICS_SAMPLE_INTERVAL = 2.0  # Seconds between samples (CPU/RAM/swap/disk/net/temperature)
+METRICS_BUFFER_SIZE = 300  # Ring buffer length (300 x 2 s = 10 min of history)
+METRICS_PROCESS_INTERVAL = 10.0  # Seconds between process table / disk partition scans
+
+# Agent State Store (boredom, admin DMs, tool stats/timestamps in one write-behind JSON file)
+AGENT_STATE_FILE = "workspace/agent_state.json"
+STATE_FLUSH_INTERVAL = 5  # Seconds; changes are coalesced into at most one atomic write per interval
+
 # Dynamic SWAP Configuration
 ENABLE_DYNAMIC_SWAP = True
 SWAP_MIN_SIZE_GB = 2
@@ -28,9 +37,118 @@ LLM_THREADS_TIER1 = 3
 LLM_THREADS_TIER2 = 2
 LLM_THREADS_TIER3 = 1
 
+# LLM Model Loading (model is loaded in a background thread after startup)
+LLM_USE_MMAP = True   # Memory-map the GGUF file (fast load, pages shared with OS cache)
+LLM_USE_MLOCK = False # Lock model pages in RAM (prevents swapping, needs ulimit -l)
+LLM_READY_TIMEOUT = 120  # Max seconds a request waits for the model to finish loading
+LLM_BATCH_SIZE = 512  # Prompt processing batch (n_batch); overridden by the tuned profile
+LLM_TUNED_PROFILE_FILE = "llm_profile.json"  # Written by the autotuner (!debug llm-tune / python -m agent.llm_tuner)
+
+# LLM Inference Server (out-of-process model, survives agent restarts; Unix only)
+LLM_SERVER_MODE = False  # True = LLMClient talks to `python -m agent.llm_server` over a Unix socket
+LLM_SERVER_SOCKET = "/tmp/rpi_ai_llm.sock"
+LLM_SERVER_AUTOSTART = True  # Spawn the server if it is not running
+LLM_SERVER_LOG_FILE = "llm_server.log"
+LLM_SERVER_CONNECT_TIMEOUT = 5  # Seconds
+LLM_SERVER_REQUEST_TIMEOUT = 180  # Seconds before a generation is cancelled
+LLM_SERVER_CANCEL_GRACE = 10  # Seconds to wait for a cancelled generation before killing the server
+LLM_PROMPT_LOOKUP_ENABLED = False  # Prompt-lookup decoding for extractive calls (memory filter, search summaries). Loads the main model with logits_all: +RAM ~ n_ctx * vocab * 4 B (~600 MB for Qwen at n_ctx 1024) and extra compute on every call - enable only if benchmark_prompt_lookup.py shows a net gain
+LLM_PROMPT_LOOKUP_TOKENS = 2  # Speculated tokens per step (2 is best on CPU-only, ~10 on GPU)
+LLM_PARALLEL_SEQUENCES = 4  # Concurrent plain completions decoded together in one batch (1 = serial). Extra KV cache: n_ctx * N
+
+# LLM Model Pool & Routing
+# "main" is the primary model (repo/filename default to the LLMClient constructor) and is never evicted.
+# Other entries are loaded on demand and evicted LRU when the RAM budget is exceeded.
+# Only add a secondary model that is genuinely smaller/faster than main (not another quant of the same
+# weights) and route tasks to it below. A cold load holds the inference lock and stalls main inference.
+LLM_MODEL_POOL = {
+    "main": {"ram_mb": 600},
+    # "small": {"repo": "<hf repo>", "filename": "<model>.gguf", "ram_mb": 200, "n_threads": 2},
+}
+LLM_POOL_RAM_BUDGET_MB = 1200  # Combined RAM budget for resident local models
+LLM_POOL_TIER_BUDGET_FACTORS = {0: 1.0, 1: 1.0, 2: 0.75, 3: 0.5}  # Budget scale per resource tier
+LLM_TASK_ROUTES = {  # Task type -> pool model name or "gemini"
+    "filter": "main",      # add_filtered_memory
+    "classify": "main",    # !ask tool selection
+    "decision": "main",    # decide_action
+    "chat": "main",
+    "summary": "main",     # working memory refresh
+    "hard": "gemini",
+}
+LLM_HARD_DIFFICULTY = 1  # !ask difficulty score from which questions go to Gemini
+LLM_TELEMETRY_WINDOW = 200  # Samples kept per call site/provider/metric for p50/p95/p99
+
+# Working Memory (rolling summary used by decide_action and !ask instead of raw memories)
+WORKING_MEMORY_MAX_CHARS = 600  # Hard cap of the summary in the prompt (~200 tokens)
+WORKING_MEMORY_REFRESH_AFTER = 5  # New memories needed before the LLM rewrites the summary
+WORKING_MEMORY_MIN_INTERVAL = 120  # Min seconds between background refreshes
+
+# Action Queue (action_loop): max concurrently running actions per kind
+ACTION_QUEUE_LIMITS = {'command': 4, 'learning': 1, 'autonomous': 1, 'activity': 1}
+ACTION_QUEUE_DIRECT_COMMANDS = ["!restart", "!learn stop", "!debug"]  # Control commands that skip the queue and its limits
+
+# Learning Jobs (!learn all / !learn <tool>; persisted, resumed after restart)
+LEARNING_JOBS_DB = "workspace/learning_jobs.db"  # SQLite job queue
+LEARNING_MAX_PARALLEL = 2  # Tool trials running at once when the CPU has headroom
+LEARNING_CPU_BUDGET = 70.0  # No new trial starts above this CPU average (%); half of it allows full parallelism
+LEARNING_PAUSE_TIER = 1  # Resource tier at which learning backs off
+LEARNING_MAX_ATTEMPTS = 2  # Trials per tool before the job is marked failed
+LEARNING_BACKOFF_BASE = 5  # Seconds; doubles per retry / per overloaded check
+LEARNING_BACKOFF_MAX = 120  # Backoff cap in seconds
+
+# Task Supervisor (agent loops restart with backoff; ad-hoc background tasks are capped per kind)
+SUPERVISOR_BACKOFF_BASE = 1.0  # First restart delay in seconds (doubles per crash)
+SUPERVISOR_BACKOFF_MAX = 300.0  # Restart delay cap in seconds
+SUPERVISOR_STABLE_AFTER = 60.0  # A run this long resets the backoff
+SUPERVISOR_KIND_LIMITS = {'live_logs': 1, 'live_monitor': 2, 'ssh_tunnel': 1, 'control_command': 4, 'channel_worker': 50}  # Concurrent ad-hoc tasks per kind
+SUPERVISOR_DEFAULT_KIND_LIMIT = 4  # Limit for kinds not listed above
+
+# Shared HTTP Client (one keep-alive aiohttp session for tools and commands)
+HTTP_MAX_CONNECTIONS = 20  # Pooled connections in total
+HTTP_MAX_PER_HOST = 4  # Pooled connections per host
+HTTP_KEEPALIVE_TIMEOUT = 30  # Seconds an idle connection stays open for reuse
+HTTP_DNS_TTL = 300  # Seconds a DNS lookup is cached
+HTTP_TIMEOUT_TOTAL = 20  # Default request timeout in seconds (requests may pass their own)
+HTTP_TIMEOUT_CONNECT = 5  # Default connect timeout in seconds
+
+# Web Search (DuckDuckGo runs in a small thread pool; results cached by normalised query)
+WEB_SEARCH_WORKERS = 2  # Concurrent DDG searches (threads)
+WEB_SEARCH_CACHE_SIZE = 128  # Cached queries (least recently used are evicted)
+WEB_SEARCH_CACHE_TTL = 3600  # Seconds a search result stays cached
+
+# Startup Bootstrap (database, Discord login and web server start concurrently; !debug startup)
+DISCORD_READY_TIMEOUT = 30  # Seconds startup waits for Discord before running offline
+STARTUP_TIMELINE_FILE = "workspace/startup_timeline.json"  # Per-phase durations of recent boots
+STARTUP_TIMELINE_HISTORY = 5  # Boots kept in the timeline file
+
+# Event Loop Lag Monitor (lag_loop + watchdog thread; !debug lag)
+LOOP_LAG_INTERVAL = 0.25  # Heartbeat sleep in seconds
+LOOP_LAG_THRESHOLD_MS = 100  # Lag that counts as a stall and triggers a stack capture
+LOOP_LAG_WINDOW = 1200  # Lag samples kept for percentiles (~5 min at 0.25 s)
+
+# Multi-tool plans (one autonomous decision may call several independent tools concurrently)
+TOOL_PLAN_MAX_CALLS = 3  # Max tool calls per decision (1 = old single-call behaviour)
+TOOL_PLAN_TOOL_LIMITS = {'web_tool': 1, 'wikipedia_tool': 1, 'rss_tool': 1, 'weather_tool': 1, 'time_tool': 2, 'math_tool': 2}  # Concurrent calls per tool
+TOOL_PLAN_DEFAULT_TOOL_LIMIT = 1  # Limit for tools not listed above
+
+# Message Intake (event-driven; DMs/mentions are answered by per-channel workers)
+MESSAGE_MAX_CONCURRENT_REPLIES = 2  # LLM replies generated at once across all channels
+MESSAGE_CHANNEL_QUEUE_MAX = 20  # Pending DMs/mentions per channel before new ones are dropped
+MESSAGE_WORKER_IDLE_TIMEOUT = 300  # Seconds an idle channel worker stays alive
+
 # Boredom System
-BOREDOM_INTERVAL = 600  # Time in seconds between boredom checks (10 minutes)
+BOREDOM_INTERVAL = 600  # Boredom grows by BOREDOM_DECAY_RATE per this many seconds (10 minutes)
+
+# Background Scheduler (when autonomous work may start; checked every SCHEDULER_TICK)
+SCHEDULER_TICK = 30  # Seconds between scheduler checks in boredom_loop
+SCHEDULER_CPU_MAX = 60.0  # 30 s CPU average (%) above which due work is deferred
+SCHEDULER_IDLE_CPU = 20.0  # Below this CPU average work may start early (boredom above the low threshold)
+SCHEDULER_RAM_MAX = 80.0  # RAM usage (%) above which work is deferred
+SCHEDULER_TEMP_MAX = 70.0  # CPU temperature (°C) above which work is deferred
+SCHEDULER_INTERACTIVE_QUIET = 120  # Seconds after the last command/DM/mention before background work starts
+SCHEDULER_HOURLY_BUDGET = 900  # Max seconds of autonomous work per rolling hour
 TOPICS_FILE = "boredom_topics.json"  # Path to topics JSON file
+TOPIC_RECENT_WINDOW = 3  # Recently picked topics skipped by the topic sampler
 
 # Memory Scoring System
 MEMORY_CONFIG = {
@@ -47,6 +165,14 @@ MEMORY_CONFIG = {
 GITHUB_UPLOAD_MIN_INTERVAL = 2 * 60 * 60  # Minimum 2 hours between uploads (in seconds)
 GITHUB_REPO_NAME = "davca2848123/AI_agent"
 
+# Circuit Breakers (Gemini, DuckDuckGo, wttr.in, Google Translate)
+CIRCUIT_WINDOW_SECONDS = 300  # Sliding window for the failure rate
+CIRCUIT_MIN_CALLS = 4  # Calls in the window before the failure rate is evaluated
+CIRCUIT_FAILURE_RATE = 0.5  # Failure ratio that opens the breaker
+CIRCUIT_CONSECUTIVE_FAILURES = 3  # Consecutive failures that open it regardless of the window
+CIRCUIT_OPEN_SECONDS = 30  # First probe interval after opening (doubles after each failed probe)
+CIRCUIT_MAX_OPEN_SECONDS = 1800  # Cap for the probe interval
+
 # Error Recovery System
 STARTUP_RETRY_LIMIT = 3  # Maximum consecutive startup failures before long wait
 STARTUP_FAILURE_WAIT = 6 * 60 * 60  # 6 hours wait after exceeding retry limit (in seconds)
@@ -107,6 +233,9 @@ AGENT_VERSION = "Beta - Ongoing"
 
 # Discord Activity Tool Settings
 DISCORD_ACTIVITY_IGNORE_USERS = []  # List of user IDs to ignore in activity checks
+ACTIVITY_REFRESH_TTL = 30 * 24 * 60 * 60  # Re-research a known activity after 30 days (seconds)
+ACTIVITY_RETRY_AFTER = 60 * 60  # Retry a failed activity search after 1 hour (seconds)
+ACTIVITY_MAX_USERS = 20  # Users remembered per activity
 
 # File Paths
 STARTUP_FAILURE_FILE = ".startup_failures"
@@ -69,6 +69,10 @@ async def shutdown(sig=None):
     else:
         logger.info("Shutting down...")
     
+    # Flush pending agent state (debounced writes)
+    if agent_instance and hasattr(agent_instance, 'state_store'):
+        await agent_instance.state_store.flush()
+    
     # Close Discord connection immediately to go offline
     if agent_instance and agent_instance.discord and agent_instance.discord.client:
         logger.info("Closing Discord connection...")
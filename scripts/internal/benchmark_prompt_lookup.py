@@ -0,0 +1,118 @@
+"""
+Benchmark prompt-lookup decoding (LlamaPromptLookupDecoding) on the agent's local model.
+
+Runs the same extractive prompts (memory filter / search summary) and a chat prompt
+with and without prompt lookup and prints generation tokens/s for each.
+
+The baseline uses the agent's default model configuration (logits_all=False).
+Prompt lookup needs logits_all=True, so it runs on a second instance loaded
+that way - the speedup column includes the cost logits_all adds to every call.
+
+Usage (from project root):
+    python scripts/internal/benchmark_prompt_lookup.py [--runs 3] [--tokens 128] [--pred 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path to find config_settings
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import config_settings
+
+try:
+    from llama_cpp import Llama
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+    from huggingface_hub import hf_hub_download
+except ImportError as e:
+    print(f"❌ llama-cpp-python / huggingface_hub not installed: {e}")
+    sys.exit(1)
+
+MODEL_REPO = "Qwen/Qwen2.5-0.5B-Instruct-GGUF"
+MODEL_FILENAME = "qwen2.5-0.5b-instruct-q4_k_m.gguf"
+
+SOURCE_TEXT = (
+    "The Raspberry Pi 5 is a single-board computer released in October 2023 by the Raspberry Pi "
+    "Foundation. It uses a Broadcom BCM2712 quad-core Arm Cortex-A76 processor running at 2.4 GHz, "
+    "is available with 4 GB or 8 GB of LPDDR4X RAM and adds a PCIe 2.0 interface, a real-time clock "
+    "and a power button. The RP1 southbridge chip, designed in-house, handles most of the I/O."
+)
+
+CASES = [
+    ("memory_filter", "You are a strict data filter. Output ONLY the filtered fact.",
+     "You are a memory optimizer. Extract the core, factual information from the following text. "
+     "Remove fluff and unnecessary details. Keep it concise.\n\nText: user taught me that " + SOURCE_TEXT),
+    ("search_summary", "You are a helpful AI assistant. Synthesize the search results to answer the user's question.",
+     "Question: What CPU does the Raspberry Pi 5 use?\n\nSearch Results:\n" + SOURCE_TEXT +
+     "\n\nBased on the search results, provide a comprehensive answer to the question."),
+    ("chat", "You are a helpful AI assistant. Be concise and accurate.",
+     "Tell me a short story about a robot learning to paint."),
+]
+
+
+def format_prompt(system_prompt: str, prompt: str) -> str:
+    return f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{prompt}<|im_end|>\n<|im_start|>assistant\n"
+
+
+def run_case(llm, prompt: str, max_tokens: int, runs: int) -> float:
+    """Returns average generation tokens/s over the given number of runs."""
+    speeds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = llm(prompt, max_tokens=max_tokens, stop=["<|im_end|>"], echo=False, temperature=0.0)
+        elapsed = time.perf_counter() - start
+        tokens = output.get("usage", {}).get("completion_tokens", 0)
+        if elapsed > 0 and tokens:
+            speeds.append(tokens / elapsed)
+    return sum(speeds) / len(speeds) if speeds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt-lookup decoding")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per case (default: 3)")
+    parser.add_argument("--tokens", type=int, default=128, help="Max tokens per generation (default: 128)")
+    parser.add_argument("--pred", type=int, default=getattr(config_settings, 'LLM_PROMPT_LOOKUP_TOKENS', 2),
+                        help="num_pred_tokens for prompt lookup")
+    args = parser.parse_args()
+
+    cache_dir = getattr(config_settings, 'MODEL_CACHE_DIR', "./models/")
+    print(f"🔍 Resolving model {MODEL_REPO}/{MODEL_FILENAME}...")
+    model_path = hf_hub_download(repo_id=MODEL_REPO, filename=MODEL_FILENAME, cache_dir=cache_dir)
+
+    def load(logits_all: bool):
+        llm = Llama(
+            model_path=model_path,
+            verbose=False,
+            n_ctx=getattr(config_settings, 'LLM_CONTEXT_NORMAL', 1024),
+            n_threads=getattr(config_settings, 'LLM_THREADS_NORMAL', 4),
+            logits_all=logits_all
+        )
+        # Warm-up so the first measured run isn't penalised
+        llm(format_prompt("You are a test system.", "Reply OK"), max_tokens=4, echo=False)
+        return llm
+
+    # One instance at a time - both would not fit into RAM on a small Pi
+    print("⏳ Baseline (logits_all=False)...")
+    llm = load(logits_all=False)
+    baseline = {name: run_case(llm, format_prompt(system_prompt, prompt), args.tokens, args.runs)
+                for name, system_prompt, prompt in CASES}
+    del llm
+
+    print("⏳ Prompt lookup (logits_all=True)...")
+    llm = load(logits_all=True)
+    llm.draft_model = LlamaPromptLookupDecoding(num_pred_tokens=args.pred)
+    speculative = {name: run_case(llm, format_prompt(system_prompt, prompt), args.tokens, args.runs)
+                   for name, system_prompt, prompt in CASES}
+    del llm
+
+    print(f"\n📊 Generation speed (runs={args.runs}, max_tokens={args.tokens}, num_pred_tokens={args.pred})\n")
+    print(f"{'Case':<16}{'Baseline tok/s':>16}{'Lookup tok/s':>16}{'Speedup':>10}")
+    print("-" * 58)
+    for name, _, _ in CASES:
+        speedup = speculative[name] / baseline[name] if baseline[name] else 0.0
+        print(f"{name:<16}{baseline[name]:>16.2f}{speculative[name]:>16.2f}{speedup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Unit tests for the agent's standalone modules (no Discord, model or network needed).
+
+Kept in tests/unit/: the startup cleanup (_cleanup_old_tests) only deletes
+files directly in tests/, so this directory survives it.
+
+Run from the repository root: python -m pytest -q tests/unit
+"""
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,134 @@
+"""ActionQueue: key dedup, per-kind limits, priorities, start deadlines, cancellation."""
+
+import asyncio
+
+import pytest
+
+from agent.action_queue import ActionQueue
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _started(queue: ActionQueue):
+    """Runs one dispatch pass and lets the started tasks reach their first await."""
+    queue._dispatch()
+    await asyncio.sleep(0)
+
+
+def test_same_key_returns_existing_future():
+    async def scenario():
+        queue = ActionQueue(limits={'autonomous': 1})
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return "done"
+
+        first = queue.submit('autonomous', work, key='autonomous')
+        second = queue.submit('autonomous', work, key='autonomous')
+        assert first is second
+        assert queue.counters['deduplicated'] == 1
+
+        await _started(queue)
+        assert await first == "done"
+        assert calls == [1]
+        # Key is released after completion - a new submit queues a new action
+        third = queue.submit('autonomous', work, key='autonomous')
+        assert third is not first
+    run(scenario())
+
+
+def test_kind_limit_defers_extra_actions():
+    async def scenario():
+        queue = ActionQueue(limits={'command': 2})
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+
+        futures = [queue.submit('command', work) for _ in range(3)]
+        await _started(queue)
+        assert queue.running_count('command') == 2
+        assert len(queue.pending()) == 1
+
+        release.set()
+        await asyncio.gather(*futures[:2])
+        await _started(queue)
+        await futures[2]
+        assert queue.counters['completed'] == 3
+    run(scenario())
+
+
+def test_lower_priority_number_starts_first():
+    async def scenario():
+        queue = ActionQueue(limits={'activity': 1, 'command': 1})
+        # One action at a time overall, so the heap order decides
+        queue.gate = lambda action: queue.running_count('activity') + queue.running_count('command') == 0
+        order = []
+
+        def recorder(name):
+            async def work():
+                order.append(name)
+            return work
+
+        activity = queue.submit('activity', recorder('activity'))
+        command = queue.submit('command', recorder('command'))
+        await _started(queue)
+        await command
+        await _started(queue)
+        await activity
+        assert order == ['command', 'activity']
+    run(scenario())
+
+
+def test_expired_action_is_dropped_before_start():
+    async def scenario():
+        queue = ActionQueue(limits={'activity': 1}, gate=lambda action: False)
+
+        async def work():
+            raise AssertionError("must not run")
+
+        future = queue.submit('activity', work, key='research', deadline=0.01)
+        await _started(queue)  # Gate keeps it queued
+        await asyncio.sleep(0.02)
+        queue._dispatch()
+        assert future.cancelled()
+        assert queue.counters['expired'] == 1
+        assert not queue.is_active('research')
+    run(scenario())
+
+
+def test_cancel_by_kind_covers_queued_and_running():
+    async def scenario():
+        queue = ActionQueue(limits={'learning': 1})
+
+        async def work():
+            await asyncio.sleep(10)
+
+        running = queue.submit('learning', work)
+        queued = queue.submit('learning', work)
+        await _started(queue)
+
+        assert queue.cancel(kind='learning') == 2
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        assert queued.cancelled()
+        assert queue.running_count('learning') == 0
+    run(scenario())
+
+
+def test_failed_action_sets_exception_on_future():
+    async def scenario():
+        queue = ActionQueue(limits={'command': 1})
+
+        async def work():
+            raise ValueError("boom")
+
+        future = queue.submit('command', work)
+        await _started(queue)
+        with pytest.raises(ValueError):
+            await future
+        assert queue.counters['failed'] == 1
+    run(scenario())
@@ -0,0 +1,108 @@
+"""CircuitBreaker: tripping, single half-open probe, probe backoff, recovery."""
+
+import pytest
+
+from agent import circuit_breaker
+from agent.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, 'time', fake.time)
+    return fake
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker("test", window_s=60, min_calls=4, failure_rate=0.5,
+                          consecutive_failures=3, open_s=10, max_open_s=40)
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(3):
+        breaker.record_failure(ConnectionError("down"))
+
+
+def test_consecutive_failures_open_the_breaker(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure(ConnectionError("down"))
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert not breaker.available
+    assert breaker.retry_in() == 10
+    assert breaker.rejected == 1
+    assert breaker.last_error == "ConnectionError: down"
+
+
+def test_failure_rate_opens_the_breaker(clock):
+    breaker = make_breaker()
+    for ok in (True, False, True, False):
+        (breaker.record_success if ok else breaker.record_failure)()
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_exactly_one_probe_through(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10
+    assert breaker.available
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Concurrent callers fall back while the probe is out
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_doubles_the_interval_up_to_the_cap(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    intervals = []
+    for _ in range(4):
+        clock.now += breaker.retry_in()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        intervals.append(breaker.retry_in())
+    assert intervals == [20, 40, 40, 40]
+
+    # Recovery resets the interval
+    clock.now += breaker.retry_in()
+    assert breaker.allow()
+    breaker.record_success()
+    trip(breaker)
+    assert breaker.retry_in() == 10
+
+
+def test_released_probe_can_be_retried(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release_probe()  # The probing call was cancelled - no verdict
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_recovery_forgets_failures_before_the_outage(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 10
+    breaker.allow()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
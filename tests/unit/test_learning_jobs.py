@@ -0,0 +1,73 @@
+"""LearningJobStore: enqueue dedup, claim, retry/failure, cancel, restart recovery."""
+
+import pytest
+
+from agent.learning_jobs import CANCELLED, DONE, FAILED, PENDING, RUNNING, LearningJobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    jobs = LearningJobStore(db_path=str(tmp_path / "learning_jobs.db"), max_attempts=2)
+    yield jobs
+    jobs.close()
+
+
+def test_enqueue_skips_tools_already_queued(store):
+    assert store.enqueue(["web_search", "weather", "web_search"]) == 2
+    assert store.enqueue(["weather", "translate"]) == 1
+    assert [job['tool'] for job in store.active_jobs()] == ["web_search", "weather", "translate"]
+
+
+def test_claim_marks_jobs_running_oldest_first(store):
+    store.enqueue(["a", "b", "c"])
+    claimed = store.claim(2)
+    assert [(job['tool'], job['status'], job['attempts']) for job in claimed] == [("a", RUNNING, 1), ("b", RUNNING, 1)]
+    assert [job['tool'] for job in store.claim(5)] == ["c"]
+    assert store.claim(1) == []
+    assert store.claim(0) == []
+
+
+def test_failed_trial_retries_until_max_attempts(store):
+    store.enqueue(["weather"])
+    job = store.claim(1)[0]
+    assert store.fail(job['id'], "no tool call", retry_in=60)
+    # Not due yet
+    assert store.claim(1) == []
+    assert store.has_work()
+    assert 0 < store.next_due_in() <= 60
+
+    store.conn.execute("UPDATE learning_jobs SET next_attempt_at = 0")
+    job = store.claim(1)[0]
+    assert job['attempts'] == 2
+    assert not store.fail(job['id'], "no tool call", retry_in=60)
+    assert store.counts() == {FAILED: 1}
+    assert not store.has_work()
+    assert store.next_due_in() is None
+
+
+def test_complete_and_cancel(store):
+    store.enqueue(["a", "b", "c"])
+    first = store.claim(1)[0]
+    store.complete(first['id'], "learned")
+    store.claim(1)
+    assert store.cancel_all() == 2  # One running, one pending
+    assert store.counts() == {DONE: 1, CANCELLED: 2}
+    # A late result of a cancelled trial does not resurrect it
+    store.complete(first['id'] + 1, "too late")
+    assert store.counts() == {DONE: 1, CANCELLED: 2}
+    assert [job['result'] for job in store.recent_jobs()] == ["learned"]
+
+
+def test_interrupted_jobs_resume_after_restart(tmp_path):
+    path = str(tmp_path / "learning_jobs.db")
+    store = LearningJobStore(db_path=path)
+    store.enqueue(["a", "b"])
+    store.claim(1)
+    store.close()
+
+    reopened = LearningJobStore(db_path=path)
+    try:
+        assert reopened.recover_interrupted() == 1
+        assert reopened.counts() == {PENDING: 2}
+    finally:
+        reopened.close()
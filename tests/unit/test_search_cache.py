@@ -0,0 +1,138 @@
+"""SearchCache: normalised keys, TTL/LRU, in-flight sharing and takeover after cancellation."""
+
+import asyncio
+
+import pytest
+
+from agent.search_cache import SearchCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_normalised_query_hits_cache():
+    async def scenario():
+        cache = SearchCache(max_entries=8, ttl=60)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return ["result"]
+
+        assert await cache.get_or_fetch("Python  asyncio", fetch) == ["result"]
+        assert await cache.get_or_fetch(" python asyncio ", fetch) == ["result"]
+        assert calls == [1]
+        assert (cache.hits, cache.misses) == (1, 1)
+    run(scenario())
+
+
+def test_lru_eviction_and_cache_if():
+    async def scenario():
+        cache = SearchCache(max_entries=2, ttl=60)
+
+        def fetch_value(value):
+            async def fetch():
+                return value
+            return fetch
+
+        await cache.get_or_fetch("a", fetch_value(["a"]))
+        await cache.get_or_fetch("b", fetch_value(["b"]))
+        await cache.get_or_fetch("a", fetch_value(["stale"]))  # Hit - "a" becomes newest
+        await cache.get_or_fetch("c", fetch_value(["c"]))  # Evicts "b"
+        assert cache.evicted == 1
+        assert await cache.get_or_fetch("a", fetch_value(["new"])) == ["a"]
+        assert await cache.get_or_fetch("b", fetch_value(["b2"])) == ["b2"]
+
+        # Empty results are not worth caching (possible rate limit)
+        await cache.get_or_fetch("empty", fetch_value([]), cache_if=bool)
+        assert await cache.get_or_fetch("empty", fetch_value(["later"]), cache_if=bool) == ["later"]
+    run(scenario())
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def scenario():
+        cache = SearchCache(max_entries=8, ttl=60)
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return ["shared"]
+
+        callers = [asyncio.create_task(cache.get_or_fetch("query", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*callers) == [["shared"]] * 3
+        assert calls == [1]
+        assert cache.shared == 2
+    run(scenario())
+
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    async def scenario():
+        cache = SearchCache(max_entries=8, ttl=60)
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ConnectionError("rate limited")
+
+        callers = [asyncio.create_task(cache.get_or_fetch("query", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(r, ConnectionError) for r in results)
+
+        async def ok():
+            return ["ok"]
+        assert await cache.get_or_fetch("query", ok) == ["ok"]
+    run(scenario())
+
+
+def test_waiter_takes_over_when_fetching_caller_is_cancelled():
+    async def scenario():
+        cache = SearchCache(max_entries=8, ttl=60)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [f"run {len(calls)}"]
+
+        owner = asyncio.create_task(cache.get_or_fetch("query", fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get_or_fetch("query", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        # One waiter re-runs the fetch, the other joins it
+        assert await asyncio.gather(*waiters) == [["run 2"]] * 2
+        assert calls == [1, 1]
+        assert cache.taken_over == 1
+        assert cache.get_stats()['in_flight'] == 0
+    run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_fetch():
+    async def scenario():
+        cache = SearchCache(max_entries=8, ttl=60)
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return ["value"]
+
+        owner = asyncio.create_task(cache.get_or_fetch("query", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch("query", fetch))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await owner == ["value"]
+        assert cache.taken_over == 0
+    run(scenario())
@@ -0,0 +1,80 @@
+"""StateStore: coalesced dirty marks, atomic flush, reload, write errors."""
+
+import asyncio
+import json
+import os
+
+from agent.state_store import StateStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_many_updates_coalesce_into_one_write(tmp_path):
+    async def scenario():
+        path = tmp_path / "agent_state.json"
+        store = StateStore(path=str(path), flush_interval=5)
+        state = {'boredom_score': 0.0}
+        store.register('agent', lambda: dict(state))
+
+        for i in range(5):
+            state['boredom_score'] = i / 10
+            store.mark_dirty('agent')
+        assert store.dirty
+        assert store.coalesced == 4
+
+        assert await store.flush()
+        assert not await store.flush()  # Nothing changed since
+        assert store.flush_count == 1
+        assert json.loads(path.read_text(encoding='utf-8')) == {'agent': {'boredom_score': 0.4}}
+        assert not os.path.exists(f"{path}.tmp")
+    run(scenario())
+
+
+def test_unregistered_sections_survive_a_flush(tmp_path):
+    async def scenario():
+        path = tmp_path / "agent_state.json"
+        path.write_text(json.dumps({'legacy': [1, 2], 'tools': {}}), encoding='utf-8')
+        store = StateStore(path=str(path))
+        assert store.load() == {'legacy': [1, 2], 'tools': {}}
+        store.register('tools', lambda: {'web_search': 3})
+        store.mark_dirty('tools')
+        await store.flush()
+
+        reloaded = StateStore(path=str(path)).load()
+        assert reloaded == {'legacy': [1, 2], 'tools': {'web_search': 3}}
+    run(scenario())
+
+
+def test_change_during_flush_keeps_the_store_dirty(tmp_path):
+    async def scenario():
+        store = StateStore(path=str(tmp_path / "agent_state.json"))
+
+        def provider():
+            store.mark_dirty('agent')  # Like a state change racing the executor write
+            return {}
+
+        store.register('agent', provider)
+        store.mark_dirty('agent')
+        await store.flush()
+        assert store.dirty
+        assert store.get_stats()['dirty_sections'] == 'agent'
+    run(scenario())
+
+
+def test_unreadable_file_loads_empty_and_failed_write_is_counted(tmp_path):
+    async def scenario():
+        path = tmp_path / "agent_state.json"
+        path.write_text("{broken", encoding='utf-8')
+        store = StateStore(path=str(path))
+        assert store.load() == {}
+
+        # The target directory cannot be created - the write fails, the state stays dirty
+        (tmp_path / "blocker").write_text("", encoding='utf-8')
+        blocked = StateStore(path=str(tmp_path / "blocker" / "agent_state.json"))
+        blocked.mark_dirty()
+        assert not await blocked.flush()
+        assert blocked.errors == 1
+        assert blocked.dirty
+    run(scenario())
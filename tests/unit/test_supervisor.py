@@ -0,0 +1,134 @@
+"""TaskSupervisor: restart with backoff, ad-hoc kind caps, exception capture, cancel_all."""
+
+import asyncio
+
+from agent.supervisor import BACKOFF, CANCELLED, FAILED, TaskSupervisor
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.errors = []
+
+    def log_error(self, error, tb_str):
+        self.errors.append(error)
+
+
+def make_supervisor() -> TaskSupervisor:
+    supervisor = TaskSupervisor()
+    supervisor.backoff_base = 0.01
+    supervisor.backoff_max = 0.04
+    supervisor.stable_after = 60
+    supervisor.kind_limits = {'live_logs': 1}
+    return supervisor
+
+
+def test_crashing_loop_is_restarted_with_growing_backoff():
+    async def scenario():
+        supervisor = make_supervisor()
+        tracker = RecordingTracker()
+        restarts = []
+
+        async def on_restart(name, error):
+            restarts.append((name, type(error).__name__, supervisor.tasks()[0]['state']))
+
+        supervisor.configure(error_tracker=tracker, on_restart=on_restart)
+        runs = []
+        finished = asyncio.Event()
+
+        async def loop():
+            runs.append(1)
+            if len(runs) < 3:
+                raise RuntimeError("crash")
+            finished.set()
+            await asyncio.sleep(10)
+
+        supervisor.supervise('boredom_loop', loop)
+        await asyncio.wait_for(finished.wait(), timeout=2)
+
+        assert len(runs) == 3
+        assert restarts == [('boredom_loop', 'RuntimeError', BACKOFF)] * 2
+        assert len(tracker.errors) == 2
+        assert supervisor.get_stats()['restarts'] == 2
+        await supervisor.cancel_all()
+    run(scenario())
+
+
+def test_no_restart_once_agent_stops():
+    async def scenario():
+        supervisor = make_supervisor()
+        supervisor.configure(should_restart=lambda: False)
+
+        async def loop():
+            raise RuntimeError("crash")
+
+        task = supervisor.supervise('action_loop', loop)
+        await task
+        entry = supervisor.tasks()[0]
+        assert entry['state'] == FAILED
+        assert entry['restarts'] == 0
+    run(scenario())
+
+
+def test_spawn_refuses_over_kind_limit():
+    async def scenario():
+        supervisor = make_supervisor()
+
+        async def stream():
+            await asyncio.sleep(10)
+
+        first = supervisor.spawn('live_logs', stream())
+        assert first is not None
+        assert supervisor.spawn('live_logs', stream()) is None
+        assert supervisor.refused == 1
+        assert supervisor.running_count('live_logs') == 1
+        await supervisor.cancel_all()
+    run(scenario())
+
+
+def test_failed_spawn_is_captured_and_kept_visible():
+    async def scenario():
+        supervisor = make_supervisor()
+        tracker = RecordingTracker()
+        supervisor.configure(error_tracker=tracker)
+
+        async def broken():
+            raise ValueError("tunnel failed")
+
+        task = supervisor.spawn('ssh_tunnel', broken())
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)  # Done callback
+        assert [type(e) for e in tracker.errors] == [ValueError]
+        assert [t['state'] for t in supervisor.tasks()] == [FAILED]
+    run(scenario())
+
+
+def test_cancel_all_skips_caller_and_excluded_tasks():
+    async def scenario():
+        supervisor = make_supervisor()
+
+        async def forever():
+            await asyncio.sleep(10)
+
+        supervisor.supervise('memory_loop', forever)
+        discord = supervisor.supervise('discord_client', forever)
+        worker = supervisor.spawn('channel_worker', forever())
+
+        async def restart_command():
+            # Like !restart: the shutdown runs inside a supervised task
+            await supervisor.cancel_all(exclude=('discord_client',))
+            return "still running"
+
+        command = supervisor.spawn('control_command', restart_command())
+        assert await command == "still running"
+        assert worker.cancelled()
+        assert not discord.done()
+        states = {t['name']: t['state'] for t in supervisor.tasks()}
+        assert states['memory_loop'] == CANCELLED
+
+        await supervisor.cancel_all()
+        assert discord.cancelled()
+    run(scenario())